@@ -5,6 +5,13 @@
 #   • dataclass-based CLI args (no "unknown attribute" warnings)
 #   • expect_response for network wait + wait_for_selector for DOM
 #   • retry/backoff and clean logging
+#   • optional context pool (day3_browser_pool.BrowserPool): each retry
+#     draws a fresh context from warm browsers instead of launching Chromium
+#   • exponential backoff with full jitter; an optional backoff policy
+#     (day3_retry.RetryPolicy) can also give up early on errors not worth retrying
+#   • optional readiness engine (day3_readiness.ReadinessEngine): navigation
+#     stops at "commit", quotes are ready once their count is stable, and the
+#     per-try timeout comes from observed latency of the host
 #
 # Target: https://quotes.toscrape.com/js/
 # Usage:
@@ -15,19 +22,55 @@
 from __future__ import annotations
 
 import argparse
+import random
 import sys
 import time
+from contextlib import ExitStack
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, List, Optional, Protocol
 
 from playwright.sync_api import (
     sync_playwright,
     TimeoutError as PlaywrightTimeoutError,
+    BrowserContext,
     Page,
     Response,
 )
 
 
+class ContextPool(Protocol):
+    """Anything that hands out and takes back browser contexts (see day3_browser_pool.py)."""
+
+    def acquire(self, **context_kwargs) -> BrowserContext: ...
+
+    def release(self, context: BrowserContext) -> None: ...
+
+
+class BackoffPolicy(Protocol):
+    """Decides the wait before the next attempt; None means stop retrying (see day3_retry.py)."""
+
+    def next_delay(self, attempt: int, error: BaseException) -> Optional[float]: ...
+
+
+class Readiness(Protocol):
+    """Latency-derived timeouts + selector-count waits (see day3_readiness.py)."""
+
+    def timeout_ms(self, url: str) -> int: ...
+
+    def wait_for_count(
+        self, page: Page, selector: str, min_count: int = 1, stable_ms: int = 0, timeout_ms: Optional[int] = None
+    ) -> None: ...
+
+    def record(self, url: str, seconds: float) -> None: ...
+
+    def record_timeout(self, url: str, timeout_ms: int) -> None: ...
+
+
+def jittered_backoff(attempt: int, base_s: float = 1.0, cap_s: float = 6.0) -> float:
+    """Full jitter: random wait in [0, min(cap, base * 2^(attempt-1))]."""
+    return random.uniform(0, min(cap_s, base_s * (2 ** (attempt - 1))))
+
+
 @dataclass
 class CLIArgs:
     url: str
@@ -51,13 +94,16 @@ def parse_args(argv: Optional[List[str]] = None) -> CLIArgs:
     )
 
 
-def wait_and_get_quotes(page: Page, timeout_ms: int = 5000) -> List[str]:
+def wait_and_get_quotes(page: Page, timeout_ms: int = 5000, readiness: Optional[Readiness] = None) -> List[str]:
     """
     Wait for a dynamic DOM element and collect its text contents.
-    - Page.wait_for_selector(...)
+    - Page.wait_for_selector(...), or with readiness: until the quote count stops changing
     - Locator.all_text_contents()
     """
-    page.wait_for_selector("div.quote", timeout=timeout_ms)
+    if readiness is not None:
+        readiness.wait_for_count(page, "div.quote", stable_ms=50, timeout_ms=timeout_ms)
+    else:
+        page.wait_for_selector("div.quote", timeout=timeout_ms)
     return page.locator("div.quote").all_text_contents()
 
 
@@ -66,6 +112,7 @@ def wait_for_main_doc_response(
     target_url: str,
     timeout_ms: int = 5000,
     preview_len: int = 200,
+    wait_until: str = "load",
 ) -> str:
     """
     Use page.expect_response(predicate) to capture the main document response (status 200).
@@ -75,7 +122,7 @@ def wait_for_main_doc_response(
         return (resp.url == target_url) and (resp.status == 200)
 
     with page.expect_response(predicate, timeout=timeout_ms) as resp_info:
-        page.goto(target_url, timeout=timeout_ms)
+        page.goto(target_url, timeout=timeout_ms, wait_until=wait_until)
     resp: Response = resp_info.value
 
     try:
@@ -91,33 +138,55 @@ def run(
     max_retries: int,
     per_try_timeout_ms: int,
     headless: bool,
+    pool: Optional[ContextPool] = None,
+    backoff: Optional[BackoffPolicy] = None,
+    readiness: Optional[Readiness] = None,
+    metrics: Optional[Any] = None,
 ) -> int:
     """
     Main routine with retry/backoff. All symbols are strongly typed so Pylance
     recognizes attributes and methods without warnings.
+    With a pool, every attempt runs in a fresh context from a warm browser;
+    without one, a browser is launched for this run (original behaviour).
+    With a backoff policy, it decides the wait (or to give up) after each error.
+    With a readiness engine, the per-try timeout follows the host's observed latency.
+    With metrics (day3_metrics.Metrics), every failed attempt is counted: retries_total or
+    failures_total, labelled with the error type.
     """
     print(f"[i] Target URL: {target_url}")
     print(f"[i] Retries: {max_retries}, Timeout per try (ms): {per_try_timeout_ms}, Headless: {headless}")
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        page: Page = browser.new_page()
+    with ExitStack() as stack:
+        shared_page: Optional[Page] = None
+        if pool is None:
+            p = stack.enter_context(sync_playwright())
+            browser = p.chromium.launch(headless=headless)
+            stack.callback(browser.close)
+            shared_page = browser.new_page()
 
         for attempt in range(1, max_retries + 1):
+            context: Optional[BrowserContext] = pool.acquire() if pool is not None else None
+            timeout_ms = readiness.timeout_ms(target_url) if readiness is not None else per_try_timeout_ms
+            t0 = time.monotonic()
             try:
+                # inside the try: if new_page() fails, the context still goes back to the pool
+                page: Page = context.new_page() if context is not None else shared_page
                 print(f"\n[TRY {attempt}/{max_retries}] Waiting for document response (status=200)...")
                 doc_preview = wait_for_main_doc_response(
                     page=page,
                     target_url=target_url,
-                    timeout_ms=per_try_timeout_ms,
+                    timeout_ms=timeout_ms,
                     preview_len=200,
+                    wait_until="commit" if readiness is not None else "load",
                 )
                 print("[i] Document response preview:")
                 print(doc_preview if doc_preview else "[i] (empty body preview)")
 
                 print("[i] Waiting for dynamic DOM element: div.quote ...")
-                quotes: List[str] = wait_and_get_quotes(page, timeout_ms=per_try_timeout_ms)
+                quotes: List[str] = wait_and_get_quotes(page, timeout_ms=timeout_ms, readiness=readiness)
                 print(f"[✓] Collected {len(quotes)} quote blocks.")
+                if readiness is not None:
+                    readiness.record(target_url, time.monotonic() - t0)
 
                 for i, q in enumerate(quotes[:3], 1):
                     trimmed = " ".join(q.split())
@@ -125,18 +194,34 @@ def run(
                         trimmed = trimmed[:117] + "..."
                     print(f"   {i:02d}. {trimmed}")
 
-                browser.close()
                 return 0
 
             except PlaywrightTimeoutError as te:
-                print(f"[!] TimeoutError: {te}. Retrying...")
+                error: BaseException = te
+                print(f"[!] TimeoutError: {te}.")
+                if readiness is not None:
+                    readiness.record_timeout(target_url, timeout_ms)
             except Exception as e:
-                print(f"[!] Unexpected error: {e}. Retrying...")
-
-            time.sleep(min(2 * attempt, 6))
+                error = e
+                print(f"[!] Unexpected error: {e}.")
+            finally:
+                if pool is not None and context is not None:
+                    pool.release(context)
+
+            delay = None if attempt == max_retries else (
+                backoff.next_delay(attempt, error) if backoff is not None else jittered_backoff(attempt)
+            )
+            if metrics is not None:
+                metrics.record_retry(type(error).__name__, gave_up=delay is None)
+            if attempt == max_retries:
+                break
+            if delay is None:
+                print("[!] Error is not worth retrying.")
+                break
+            print(f"[i] Retrying in {delay:.1f}s...")
+            time.sleep(delay)
 
         print("\n[x] Failed after max retries. Please verify selectors, timeouts, or network conditions.")
-        browser.close()
         return 1
 
 
@@ -8,9 +8,10 @@
 import random
 import time
 import csv
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Tuple
+from urllib.parse import urljoin
 
-from playwright.sync_api import sync_playwright, expect, Page
+from playwright.sync_api import sync_playwright, expect, BrowserContext, Page
 
 USER_AGENTS: List[str] = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
@@ -22,8 +23,12 @@ def human_delay(a: float = 1.2, b: float = 2.8) -> None:
     """Random short sleep to look less robotic."""
     time.sleep(random.uniform(a, b))
 
-def save_debug(page: Page, prefix: str = "debug") -> None:
-    """Capture screenshot + HTML to understand what the site served."""
+def save_debug(page: Page, prefix: str = "debug", artifacts: Optional[Any] = None) -> None:
+    """Capture screenshot + HTML to understand what the site served.
+    Pass a day3_artifacts.ArtifactWriter to capture off the scraping thread, within budgets."""
+    if artifacts is not None:
+        artifacts.capture(page, prefix=prefix)
+        return
     ts = time.strftime("%Y%m%d_%H%M%S")
     page.screenshot(path=f"{prefix}_screenshot_{ts}.png", full_page=True)
     with open(f"{prefix}_dump_{ts}.html", "w", encoding="utf-8") as f:
@@ -34,13 +39,14 @@ def scrape_listing_page(page: Page) -> List[Dict[str, str]]:
     """Collect (title, price) items from the current listing page."""
     items = page.locator("article.product_pod")
     expect(items).to_have_count(20)
-    results: List[Dict[str, str]] = []
-    for i in range(items.count()):
-        card = items.nth(i)
-        title = card.locator("h3 a").get_attribute("title") or ""
-        price = card.locator(".price_color").inner_text()
-        results.append({"title": title, "price": price})
-    return results
+    # One eval_on_selector_all call for the whole page instead of two calls per card.
+    return page.eval_on_selector_all(
+        "article.product_pod",
+        """cards => cards.map(card => ({
+            title: card.querySelector("h3 a")?.getAttribute("title") || "",
+            price: (card.querySelector(".price_color")?.textContent || "").trim(),
+        }))""",
+    )
 
 def save_to_csv(data: List[Dict[str, str]], filename: str = "books.csv") -> None:
     """Save a list of dicts to a simple CSV file."""
@@ -53,6 +59,98 @@ def save_to_csv(data: List[Dict[str, str]], filename: str = "books.csv") -> None
         writer.writerows(data)
     print(f"[✓] Saved {len(data)} rows to {filename}")
 
+def context_options(ua: str) -> Dict[str, Any]:
+    """new_context(...) kwargs; also usable with BrowserPool.acquire(**context_options(ua))."""
+    return dict(
+        user_agent=ua,
+        viewport={"width": 1280, "height": 800},
+        locale="en-US",
+        java_script_enabled=True,
+        extra_http_headers={"Accept-Language": "en-US,en;q=0.9"},
+    )
+
+def prepare_context(context: BrowserContext, request_filter: Optional[Any] = None) -> None:
+    """Mask navigator.webdriver on every page of the context.
+    Pass a day3_resource_blocking.RequestFilter to skip images/fonts/CSS as well."""
+    context.add_init_script(
+        """Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"""
+    )
+    if request_filter is not None:
+        request_filter.install(context)
+
+def goto_listing(page: Page, url: str, readiness: Optional[Any] = None, min_count: int = 1, stable_ms: int = 100):
+    """page.goto() waiting for "load"; with a readiness engine (day3_readiness.py)
+    only until the product cards are in the DOM (at least min_count, count unchanged
+    for stable_ms), with a latency-derived timeout. The last page may hold fewer than
+    20 cards, and an error page (503, 404) has none: it is returned as soon as it
+    arrives so the caller (or the rate limiter) can react to the status. One
+    latency-derived deadline covers navigation and the card wait."""
+    if readiness is None:
+        return page.goto(url, timeout=15000)
+    return readiness.goto(page, url, selector="article.product_pod", min_count=min_count, stable_ms=stable_ms)
+
+def open_page(
+    page: Page,
+    url: str,
+    limiter: Optional[Any] = None,
+    readiness: Optional[Any] = None,
+    delay: Tuple[float, float] = (1.2, 2.8),
+) -> None:
+    """page.goto() paced by a shared rate limiter (day3_rate_limit.py) if given,
+    otherwise followed by a human_delay(*delay) like before."""
+    if limiter is None:
+        goto_listing(page, url, readiness)
+        human_delay(*delay)
+        return
+    limiter.acquire(url)
+    t0 = time.monotonic()
+    response = goto_listing(page, url, readiness)
+    if response is not None:
+        limiter.feedback(url, response.status, time.monotonic() - t0, response.headers.get("retry-after"))
+
+def crawl_books(
+    page: Page,
+    max_pages: int = 3,
+    start_url: str = "http://books.toscrape.com/",
+    sink: Optional[Any] = None,
+    limiter: Optional[Any] = None,
+    readiness: Optional[Any] = None,
+) -> List[Dict[str, str]]:
+    """Open the listing and follow "Next" with human-like delays.
+    With a sink (day3_sinks.py) rows are written per page instead of returned.
+    With a limiter (day3_rate_limit.AdaptiveRateLimiter) its per-host pacing
+    replaces the fixed delays.
+    With readiness (day3_readiness.ReadinessEngine) pages count as loaded once
+    their product cards are there, without waiting for images."""
+    open_page(page, start_url, limiter, readiness)
+    expect(page).to_have_title("All products | Books to Scrape - Sandbox")
+
+    all_books: List[Dict[str, str]] = []
+    total = 0
+    current = 1
+
+    while current <= max_pages:
+        print(f"[i] Scraping page {current}...")
+        rows = scrape_listing_page(page)
+        total += len(rows)
+        if sink is not None:
+            sink.write_rows(rows)
+        else:
+            all_books.extend(rows)
+        if limiter is None:
+            human_delay()
+
+        next_link = page.locator(".next a")
+        if next_link.count() > 0:
+            next_url = urljoin(page.url, next_link.get_attribute("href") or "")
+            open_page(page, next_url, limiter, readiness, delay=(1.0, 2.0))
+            current += 1
+        else:
+            break
+
+    print(f"\n[✓] Collected {total} books from {current} page(s).")
+    return all_books
+
 def main() -> None:
     ua = random.choice(USER_AGENTS)
     print(f"[i] Using UA: {ua}")
@@ -63,42 +161,12 @@ def main() -> None:
             args=["--disable-blink-features=AutomationControlled"]
         )
 
-        context = browser.new_context(
-            user_agent=ua,
-            viewport={"width": 1280, "height": 800},
-            locale="en-US",
-            java_script_enabled=True,
-            extra_http_headers={"Accept-Language": "en-US,en;q=0.9"},
-        )
-
-        context.add_init_script(
-            """Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"""
-        )
+        context = browser.new_context(**context_options(ua))
+        prepare_context(context)
 
         page = context.new_page()
         try:
-            page.goto("http://books.toscrape.com/", timeout=15000)
-            expect(page).to_have_title("All products | Books to Scrape - Sandbox")
-            human_delay()
-
-            all_books: List[Dict[str, str]] = []
-            max_pages = 3
-            current = 1
-
-            while current <= max_pages:
-                print(f"[i] Scraping page {current}...")
-                all_books.extend(scrape_listing_page(page))
-                human_delay()
-
-                next_link = page.locator(".next a")
-                if next_link.count() > 0:
-                    next_link.click()
-                    human_delay(1.0, 2.0)
-                    current += 1
-                else:
-                    break
-
-            print(f"\n[✓] Collected {len(all_books)} books from {current} page(s).")
+            all_books = crawl_books(page, max_pages=3)
             for b in all_books[:5]:
                 print(f" - {b['title']} | {b['price']}")
 
@@ -5,24 +5,73 @@
 # Keep it simple: open → loop pages → collect → print summary.
 # ------------------------------------------------------------
 
+from contextlib import nullcontext
+
 from playwright.sync_api import sync_playwright, expect, Page
 
 def scrape_listing_page(page: Page):
     """Return a list of dicts: [{'title': ..., 'price': ...}, ...] for the current page."""
     items = page.locator("article.product_pod")
     expect(items).to_have_count(20)  # Books to Scrape lists 20 items per page
-    results = []
 
-    count = items.count()
-    for i in range(count):
-        card = items.nth(i)
-        # Title is in the <a> title attribute inside <h3>
-        title = card.locator("h3 a").get_attribute("title")
-        # Price is a visible text like "£51.77"
-        price = card.locator(".price_color").inner_text()
-        results.append({"title": title or "", "price": price})
+    # Read every card in ONE browser call instead of get_attribute/inner_text per card
+    # (~40 round-trips → 1). See day3/code/day3_extraction.py for the declarative version.
+    return page.eval_on_selector_all(
+        "article.product_pod",
+        """cards => cards.map(card => ({
+            // Title is in the <a> title attribute inside <h3>
+            title: card.querySelector("h3 a")?.getAttribute("title") || "",
+            // Price is a visible text like "£51.77"
+            price: (card.querySelector(".price_color")?.textContent || "").trim(),
+        }))""",
+    )
+
+def crawl(page: Page, max_pages: int = 3, sink=None, metrics=None, session=None, validator=None):
+    """Follow "Next" links from the open page and collect all rows (also works on pooled contexts).
+    With a sink (day3_sinks.py) each page is written out right away and nothing is kept in memory.
+    With metrics (day3_metrics.Metrics) each page is traced: extract, write and goto phases,
+    and the per-phase summary is printed when the crawl ends.
+    With a session (day3_session.ManagedSession) the page may be swapped for a fresh one on the
+    same URL after a navigation, so long crawls do not keep growing in memory.
+    With a validator (day3_validation.Validator) every page's rows are checked outside the browser
+    (count, price format, title) and the page is captured only when a rule breaks."""
+    span = metrics.span if metrics is not None else (lambda phase: nullcontext())
+    all_books = []
+    total = 0
+    current = 1
+
+    while current <= max_pages:
+        print(f"[i] Scraping page {current} ...")
+        with metrics.trace(page.url) if metrics is not None else nullcontext():
+            with span("extract"):
+                rows = scrape_listing_page(page)
+                if validator is not None:
+                    validator.check_page(page, rows)
+            total += len(rows)
+            with span("write"):
+                if sink is not None:
+                    sink.write_rows(rows)
+                else:
+                    all_books += rows
+
+            # Find the "Next" link; if it exists, click it, else break
+            next_link = page.locator(".next a")
+            has_next = next_link.count() > 0
+            if has_next:
+                with span("goto"):
+                    next_link.click()
+                    page.wait_for_load_state("domcontentloaded")
+                if session is not None:
+                    page = session.checkpoint(page)
+        if has_next:
+            current += 1
+        else:
+            break
 
-    return results
+    print(f"\n[✓] Collected {total} books from {current} page(s).")
+    if metrics is not None:
+        print(metrics.summary())
+    return all_books
 
 def main():
     with sync_playwright() as p:
@@ -33,24 +82,9 @@ def main():
         page.goto("http://books.toscrape.com/")
         expect(page).to_have_title("All products | Books to Scrape - Sandbox")
 
-        all_books = []
-        max_pages = 3  # keep the demo small; increase if you want
-        current = 1
-
-        while current <= max_pages:
-            print(f"[i] Scraping page {current} ...")
-            all_books += scrape_listing_page(page)
-
-            # Find the "Next" link; if it exists, click it, else break
-            next_link = page.locator(".next a")
-            if next_link.count() > 0:
-                next_link.click()
-                current += 1
-            else:
-                break
+        all_books = crawl(page, max_pages=3)  # keep the demo small; increase if you want
 
         # Summary
-        print(f"\n[✓] Collected {len(all_books)} books from {current} page(s).")
         for b in all_books[:5]:
             print(f" - {b['title']} | {b['price']}")
 
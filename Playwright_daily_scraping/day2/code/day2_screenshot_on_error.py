@@ -5,10 +5,17 @@
 # Keep it simple: navigate → assert → intentionally fail → capture artifacts.
 # ------------------------------------------------------------
 
+from typing import Any, Optional
+
 from playwright.sync_api import sync_playwright, expect, Page, TimeoutError as PlaywrightTimeoutError
 
-def save_debug(page: Page, prefix: str = "error"):
-    """Save a full-page screenshot and the current HTML for debugging."""
+def save_debug(page: Page, prefix: str = "error", artifacts: Optional[Any] = None):
+    """Save a full-page screenshot and the current HTML for debugging.
+    With an artifact writer (day3_artifacts.ArtifactWriter) the capture is a
+    viewport JPEG + compressed HTML written in the background, within budgets."""
+    if artifacts is not None:
+        artifacts.capture(page, prefix=prefix)
+        return
     try:
         screenshot_path = f"{prefix}_screenshot.png"
         html_path = f"{prefix}_dump.html"
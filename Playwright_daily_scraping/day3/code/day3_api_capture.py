@@ -0,0 +1,268 @@
+# day3_api_capture.py
+# ------------------------------------------------------------
+# Goal: Harvest the data the page downloads, not the pixels it renders.
+#   1. Register URL/content-type rules on a context (context.on("response"))
+#   2. Matching JSON/HTML bodies go straight to an extractor → rows
+#      (no waiting for the DOM, no selectors on the rendered page)
+#   3. Replay more request URLs (page=2, 3, ...) over plain HTTP with the
+#      context's cookies + the captured request headers — no rendering
+#
+# Extractors for the quotes site:
+#   • /api/quotes?page=N       JSON  → json_list_extractor("quotes", ...)
+#   • /js/page/N/ (inline data) HTML → embedded_json_extractor("data", ...)
+#
+# Usage:
+#   python day3/code/day3_api_capture.py     (runs against the local fixture)
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import http.client
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from playwright.sync_api import sync_playwright, BrowserContext, Response
+
+from day3_extraction import ExtractionSchema, extract_rows_html
+from day3_http_client import HttpClient, HttpResponse
+
+# Headers we must not copy from the browser request into a replay.
+SKIP_REPLAY_HEADERS = {"cookie", "host", "content-length", "connection", "accept-encoding"}
+
+
+@dataclass
+class CapturedResponse:
+    url: str
+    status: int
+    content_type: str
+    body: bytes
+    request_headers: Dict[str, str] = field(default_factory=dict)
+    source: str = "browser"  # "browser" (captured) or "replay"
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+Extractor = Callable[[CapturedResponse], List[Dict[str, Any]]]
+
+
+def _dig(obj: Any, dotted: str) -> Any:
+    for key in dotted.split("."):
+        obj = obj.get(key) if isinstance(obj, dict) else None
+    return obj
+
+
+def json_list_extractor(list_path: str, fields: Dict[str, str]) -> Extractor:
+    """Rows from a JSON list, e.g. ("quotes", {"text": "text", "author": "author.name"})."""
+
+    def extract(resp: CapturedResponse) -> List[Dict[str, Any]]:
+        items = _dig(resp.json(), list_path) if list_path else resp.json()
+        return [{name: _dig(item, path) for name, path in fields.items()} for item in items or []]
+
+    return extract
+
+
+def embedded_json_extractor(var_name: str, fields: Dict[str, str]) -> Extractor:
+    """Rows from a `var <name> = [...];` literal inlined in an HTML page (quotes /js/)."""
+    pattern = re.compile(rf"var\s+{re.escape(var_name)}\s*=\s*(\[.*?\]);\s*$", re.S | re.M)
+
+    def extract(resp: CapturedResponse) -> List[Dict[str, Any]]:
+        m = pattern.search(resp.text)
+        if not m:
+            return []
+        return [{name: _dig(item, path) for name, path in fields.items()} for item in json.loads(m.group(1))]
+
+    return extract
+
+
+def html_schema_extractor(schema: ExtractionSchema) -> Extractor:
+    """Rows from server-rendered HTML using the usual CSS schema."""
+    return lambda resp: extract_rows_html(resp.text, schema)
+
+
+@dataclass
+class CaptureRule:
+    url_glob: str = "*"
+    content_types: Tuple[str, ...] = ("application/json",)
+    resource_types: Tuple[str, ...] = ()  # e.g. ("xhr", "fetch"); empty = any
+    extract: Optional[Extractor] = None
+
+    def matches(self, url: str, status: int, content_type: str, resource_type: str) -> bool:
+        return (
+            200 <= status < 300
+            and fnmatch(url, self.url_glob)
+            and any(ct in content_type for ct in self.content_types)
+            and (not self.resource_types or resource_type in self.resource_types)
+        )
+
+
+def cookie_header(cookies: Sequence[Dict[str, Any]], url: str) -> str:
+    """Build a Cookie header for `url` from context.cookies() output."""
+    parts = urlsplit(url)
+    host, path = parts.hostname or "", parts.path or "/"
+    pairs = []
+    for c in cookies:
+        domain = c.get("domain", "").lstrip(".")
+        if (host == domain or host.endswith("." + domain)) and path.startswith(c.get("path", "/")):
+            if c.get("secure") and parts.scheme != "https":
+                continue
+            pairs.append(f"{c['name']}={c['value']}")
+    return "; ".join(pairs)
+
+
+class ResponseCapture:
+    """
+    Stream matching responses of a context into extractors.
+
+        capture = ResponseCapture([CaptureRule("*/api/quotes*", extract=...)], on_rows=sink)
+        capture.attach(context)
+        page.goto(...)                    # rows arrive while the page loads
+        capture.replay(urls, context)     # more pages, no rendering
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[CaptureRule],
+        on_rows: Optional[Callable[[CapturedResponse, List[Dict[str, Any]]], None]] = None,
+    ) -> None:
+        self.rules = list(rules)
+        self.on_rows = on_rows
+        self.captured: List[CapturedResponse] = []
+        self.rows: List[Dict[str, Any]] = []
+        self.failed: Dict[str, str] = {}  # replayed URL -> error
+
+    def attach(self, context: BrowserContext) -> "ResponseCapture":
+        context.on("response", self._on_response)
+        return self
+
+    def _rule_for(self, url: str, status: int, content_type: str, resource_type: str) -> Optional[CaptureRule]:
+        return next((r for r in self.rules if r.matches(url, status, content_type, resource_type)), None)
+
+    def _on_response(self, response: Response) -> None:
+        content_type = response.headers.get("content-type", "")
+        rule = self._rule_for(response.url, response.status, content_type, response.request.resource_type)
+        if rule is None:
+            return
+        try:
+            body = response.body()
+        except Exception as e:  # redirects / evicted bodies
+            print(f"[!] Could not read body of {response.url}: {e}")
+            return
+        self._emit(
+            rule,
+            CapturedResponse(
+                url=response.url,
+                status=response.status,
+                content_type=content_type,
+                body=body,
+                request_headers=dict(response.request.headers),
+            ),
+        )
+
+    def _emit(self, rule: CaptureRule, captured: CapturedResponse) -> None:
+        self.captured.append(captured)
+        rows = rule.extract(captured) if rule.extract else []
+        self.rows.extend(rows)
+        if self.on_rows is not None:
+            self.on_rows(captured, rows)
+
+    # -- replay ----------------------------------------------------
+
+    def replay_headers(self, context: Optional[BrowserContext], url: str) -> Dict[str, str]:
+        """Headers of the last request the browser made + the context's cookies for `url`."""
+        headers: Dict[str, str] = {}
+        last = next((c for c in reversed(self.captured) if c.source == "browser"), None)
+        if last is not None:
+            headers = {k: v for k, v in last.request_headers.items() if k.lower() not in SKIP_REPLAY_HEADERS}
+        if context is not None:
+            cookies = cookie_header(context.cookies(), url)
+            if cookies:
+                headers["Cookie"] = cookies
+        return headers
+
+    def replay(
+        self,
+        urls: Sequence[str],
+        context: Optional[BrowserContext] = None,
+        client: Optional[HttpClient] = None,
+        workers: int = 8,
+    ) -> List[CapturedResponse]:
+        """Fetch `urls` over HTTP as the browser would have, and push them through the same rules.
+        A URL that cannot be fetched is logged and kept in `failed`; the others are still replayed."""
+        if not urls:
+            return []
+        session = client or HttpClient()
+        headers = self.replay_headers(context, urls[0])  # cookies read once, on this (Playwright) thread
+
+        def get(url: str) -> Optional[HttpResponse]:
+            try:
+                return session.get(url, headers=headers)
+            except (OSError, http.client.HTTPException) as e:
+                self.failed[url] = f"{type(e).__name__}: {e}"
+                print(f"[!] Replay of {url} failed: {self.failed[url]}")
+                return None
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                responses = [r for r in executor.map(get, urls) if r is not None]
+        finally:
+            if client is None:
+                session.close()
+
+        replayed: List[CapturedResponse] = []
+        for resp in responses:
+            content_type = resp.headers.get("content-type", "")
+            rule = self._rule_for(resp.url, resp.status, content_type, "")
+            if rule is None:
+                print(f"[!] Replay of {resp.url} did not match any rule (status={resp.status}).")
+                continue
+            captured = CapturedResponse(resp.url, resp.status, content_type, resp.body, headers, source="replay")
+            self._emit(rule, captured)
+            replayed.append(captured)
+        return replayed
+
+
+QUOTE_FIELDS = {"text": "text", "author": "author.name"}
+
+
+def main() -> None:
+    """Capture page 1 of each quotes flavour in the browser, replay pages 2..N over HTTP."""
+    from day3_fixture_site import FixtureSite
+
+    with FixtureSite() as site, sync_playwright() as p:
+        browser = p.chromium.launch()
+        context = browser.new_context()
+        capture = ResponseCapture(
+            [
+                CaptureRule("*/quotes/api/quotes*", extract=json_list_extractor("quotes", QUOTE_FIELDS)),
+                CaptureRule("*/quotes/js/*", content_types=("text/html",), extract=embedded_json_extractor("data", QUOTE_FIELDS)),
+            ],
+            on_rows=lambda r, rows: print(f"[i] {r.source:<7} {len(rows):>2} rows  {r.url}"),
+        ).attach(context)
+        page = context.new_page()
+        pages = site.quote_page_count
+
+        t0 = time.perf_counter()
+        page.goto(f"{site.quotes_url}scroll", wait_until="networkidle")
+        capture.replay([f"{site.quotes_url}api/quotes?page={n}" for n in range(2, pages + 1)], context)
+        page.goto(f"{site.quotes_url}js/", wait_until="domcontentloaded")
+        capture.replay([f"{site.quotes_url}js/page/{n}/" for n in range(2, pages + 1)], context)
+        elapsed = time.perf_counter() - t0
+        browser.close()
+
+    print(f"\n[✓] {len(capture.rows)} quotes from {len(capture.captured)} responses in {elapsed:.2f}s "
+          f"({sum(c.source == 'replay' for c in capture.captured)} replayed without rendering).")
+
+
+if __name__ == "__main__":
+    main()
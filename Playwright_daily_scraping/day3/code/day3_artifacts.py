@@ -0,0 +1,251 @@
+# day3_artifacts.py
+# ------------------------------------------------------------
+# Goal: Keep debug artifacts, but never let them stall the crawl.
+# Day 2 save_debug() takes a full-page PNG and writes page.content()
+# on the scraping thread; when a site starts failing every worker
+# spends its time writing files.
+#   • viewport JPEG by default (full-page PNG only when asked for)
+#   • HTML dumps compressed with gzip (or zstd if installed)
+#   • identical failure pages (same HTML hash) are kept once
+#   • per-run budgets: max artifacts and max bytes; over budget → skipped
+#     before anything is captured. Each accepted capture reserves its
+#     estimated size until the writer has stored it, so a burst of
+#     captures cannot overshoot max_bytes while the writer lags behind
+#   • compression + disk writes happen on a background writer thread;
+#     a full queue drops the artifact instead of blocking
+#   • manifest.jsonl lists what was kept (url, reason, hash, files)
+#
+# Usage:
+#   with ArtifactWriter("artifacts", max_count=50, max_bytes=20_000_000) as artifacts:
+#       ...
+#       except Exception as e:
+#           artifacts.capture(page, prefix="listing", reason=str(e))
+#   python day3/code/day3_bench_artifacts.py --failures 200
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, List, Optional, Set
+
+try:
+    import zstandard  # optional: smaller/faster HTML dumps
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+@dataclass
+class ArtifactStats:
+    captured: int = 0
+    duplicates: int = 0
+    over_budget: int = 0
+    queue_full: int = 0
+    failed: int = 0
+    bytes_written: int = 0
+    capture_s: List[float] = field(default_factory=list)  # time spent on the scraping thread
+
+    def summary(self) -> str:
+        avg_ms = 1000 * sum(self.capture_s) / len(self.capture_s) if self.capture_s else 0.0
+        return (
+            f"{self.captured} kept, {self.duplicates} duplicate, {self.over_budget} over budget, "
+            f"{self.queue_full} dropped (queue full), {self.bytes_written / 1024:.0f} KB written, "
+            f"{avg_ms:.1f} ms avg on the caller"
+        )
+
+
+@dataclass
+class _Job:
+    prefix: str
+    url: str
+    reason: str
+    digest: str
+    html: str
+    image: Optional[bytes]
+    image_ext: str
+    created: float
+    reserved: int = 0  # estimated bytes held against max_bytes until written
+
+
+class ArtifactWriter:
+    def __init__(
+        self,
+        directory: str = "artifacts",
+        max_count: int = 50,
+        max_bytes: int = 50 * 1024 * 1024,
+        screenshot: str = "viewport",  # "viewport" | "full" | "none"
+        jpeg_quality: int = 60,
+        compression: str = "auto",  # "auto" | "zstd" | "gzip"
+        queue_size: int = 32,
+    ) -> None:
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs zstandard: pip install zstandard")
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.screenshot = screenshot
+        self.jpeg_quality = jpeg_quality
+        self.compression = "zstd" if compression == "auto" and zstandard is not None else compression
+        if self.compression == "auto":
+            self.compression = "gzip"
+        self.stats = ArtifactStats()
+        self._seen: Set[str] = set()
+        self._accepted = 0
+        self._reserved = 0  # bytes of accepted captures not written yet
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._writer, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    # -- caller side (scraping thread) -----------------------------
+
+    def capture(self, page: Any, prefix: str = "error", reason: str = "") -> bool:
+        """Grab HTML (+ screenshot) from a sync Playwright page and queue it. Returns True if queued."""
+        t0 = time.perf_counter()
+        try:
+            if not self._has_budget():
+                return False
+            html = page.content()
+            digest = self._claim(html)
+            if digest is None:
+                return False
+            image = self._screenshot(page) if self.screenshot != "none" else None
+            return self._enqueue(prefix, page.url, reason, digest, html, image)
+        except Exception as e:
+            self.stats.failed += 1
+            print(f"[!] Artifact capture failed: {e}")
+            return False
+        finally:
+            self.stats.capture_s.append(time.perf_counter() - t0)
+
+    async def capture_async(self, page: Any, prefix: str = "error", reason: str = "") -> bool:
+        """Same as capture() for playwright.async_api pages."""
+        t0 = time.perf_counter()
+        try:
+            if not self._has_budget():
+                return False
+            html = await page.content()
+            digest = self._claim(html)
+            if digest is None:
+                return False
+            image = None
+            if self.screenshot != "none":
+                image = await page.screenshot(**self._screenshot_kwargs())
+            return self._enqueue(prefix, page.url, reason, digest, html, image)
+        except Exception as e:
+            self.stats.failed += 1
+            print(f"[!] Artifact capture failed: {e}")
+            return False
+        finally:
+            self.stats.capture_s.append(time.perf_counter() - t0)
+
+    def close(self) -> None:
+        """Wait for queued artifacts to be written, then stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+        print(f"[i] Artifacts in {self.dir}: {self.stats.summary()}")
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _has_budget(self) -> bool:
+        with self._lock:
+            if self._accepted >= self.max_count or self.stats.bytes_written + self._reserved >= self.max_bytes:
+                self.stats.over_budget += 1
+                return False
+        return True
+
+    def _claim(self, html: str) -> Optional[str]:
+        """Hash the page; None if an identical page was already kept (or the budget ran out meanwhile)."""
+        digest = hashlib.sha1(html.encode("utf-8", "replace")).hexdigest()[:16]
+        with self._lock:
+            if digest in self._seen:
+                self.stats.duplicates += 1
+                return None
+            if self._accepted >= self.max_count:
+                self.stats.over_budget += 1
+                return None
+            self._seen.add(digest)
+            self._accepted += 1
+        return digest
+
+    def _screenshot_kwargs(self) -> dict:
+        if self.screenshot == "full":
+            return {"type": "png", "full_page": True}
+        return {"type": "jpeg", "quality": self.jpeg_quality, "full_page": False}
+
+    def _screenshot(self, page: Any) -> bytes:
+        return page.screenshot(**self._screenshot_kwargs())
+
+    def _enqueue(self, prefix: str, url: str, reason: str, digest: str, html: str, image: Optional[bytes]) -> bool:
+        ext = "png" if self.screenshot == "full" else "jpg"
+        # HTML compresses ~5x with gzip/zstd; the image is stored as is.
+        estimate = len(html) // 5 + (len(image) if image is not None else 0)
+        job = _Job(prefix, url, reason, digest, html, image, ext, time.time(), estimate)
+        with self._lock:
+            if self.stats.bytes_written + self._reserved + estimate > self.max_bytes:
+                self.stats.over_budget += 1
+                self._accepted -= 1
+                return False
+            self._reserved += estimate
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.stats.queue_full += 1
+                self._accepted -= 1
+                self._reserved -= estimate
+                self._seen.discard(digest)
+            return False
+
+    # -- writer thread ---------------------------------------------
+
+    def _compress(self, html: str) -> bytes:
+        data = html.encode("utf-8")
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=6).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def _writer(self) -> None:
+        manifest = open(self.dir / "manifest.jsonl", "a", encoding="utf-8")
+        try:
+            while (job := self._queue.get()) is not None:
+                try:
+                    stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(job.created))
+                    base = f"{job.prefix}_{stamp}_{job.digest}"
+                    html_path = self.dir / f"{base}.html.{'zst' if self.compression == 'zstd' else 'gz'}"
+                    html_path.write_bytes(self._compress(job.html))
+                    files = [html_path.name]
+                    written = html_path.stat().st_size
+                    if job.image is not None:
+                        image_path = self.dir / f"{base}.{job.image_ext}"
+                        image_path.write_bytes(job.image)
+                        files.append(image_path.name)
+                        written += len(job.image)
+                    record = asdict(job)
+                    for key in ("html", "image", "image_ext", "reserved"):
+                        record.pop(key)
+                    manifest.write(json.dumps({**record, "files": files, "bytes": written}) + "\n")
+                    manifest.flush()
+                    with self._lock:
+                        self.stats.captured += 1
+                        self.stats.bytes_written += written
+                        self._reserved -= job.reserved
+                except Exception as e:
+                    with self._lock:
+                        self.stats.failed += 1
+                        self._reserved -= job.reserved
+                    print(f"[!] Artifact write failed: {e}")
+        finally:
+            manifest.close()
@@ -0,0 +1,191 @@
+# day3_async_crawler.py
+# ------------------------------------------------------------
+# Goal: Crawl every listing page in parallel with playwright.async_api.
+#   1. Open page 1, scrape it, read the pager ("Page 1 of 50" + next link)
+#   2. Turn the next link into a page-N URL template
+#   3. Fetch all remaining pages with N pages across M contexts,
+#      bounded by a concurrency limit
+#   4. Return the same {'title', 'price'} rows as scrape_listing_page,
+#      in page order
+#
+# Usage:
+#   python day3/code/day3_async_crawler.py --contexts 2 --pages-per-context 4 --concurrency 8
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import async_playwright, Browser, Page
+
+from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows_async
+
+# Reads the pager of a listing page in one call.
+PAGER_JS = """
+() => {
+    const current = document.querySelector(".pager .current");
+    const next = document.querySelector(".next a");
+    return {
+        current: current ? current.textContent.trim() : "",
+        next: next ? next.href : null,
+    };
+}
+"""
+
+
+@dataclass
+class CrawlConfig:
+    start_url: str = "http://books.toscrape.com/"
+    contexts: int = 2
+    pages_per_context: int = 4
+    concurrency: int = 8
+    max_pages: Optional[int] = None
+    timeout_ms: int = 15000
+    headless: bool = True
+
+
+@dataclass
+class CrawlResult:
+    rows: List[Dict[str, str]] = field(default_factory=list)
+    pages: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)  # url -> error
+    elapsed_s: float = 0.0
+
+
+def url_template_from_next(next_href: str, next_number: int = 2) -> Optional[str]:
+    """
+    ".../catalogue/page-2.html" -> ".../catalogue/page-{n}.html".
+    Returns None if the next link does not contain the expected page number.
+    """
+    matches = list(re.finditer(rf"(?<!\d){next_number}(?!\d)", next_href))
+    if not matches:
+        return None
+    m = matches[-1]
+    return next_href[: m.start()] + "{n}" + next_href[m.end() :]
+
+
+def listing_urls(first_url: str, pager: Dict[str, Optional[str]]) -> Optional[List[str]]:
+    """All listing URLs (page 1 first) from the pager of page 1, or None if no pattern was found."""
+    next_href = pager.get("next")
+    if not next_href:
+        return [first_url]
+    m = re.search(r"of\s+(\d+)", pager.get("current") or "")
+    template = url_template_from_next(next_href)
+    if not m or template is None:
+        return None
+    return [first_url] + [template.format(n=n) for n in range(2, int(m.group(1)) + 1)]
+
+
+async def scrape_listing_page_async(page: Page, timeout_ms: int = 15000) -> List[Dict[str, str]]:
+    """Async scrape_listing_page: wait for the cards, then read them in one call."""
+    await page.wait_for_selector(BOOK_LISTING_SCHEMA.item_selector, timeout=timeout_ms)
+    return await extract_rows_async(page, BOOK_LISTING_SCHEMA)
+
+
+async def follow_next_links(page: Page, config: CrawlConfig, result: CrawlResult) -> None:
+    """Fallback when no URL pattern is found: the Day 2 serial "Next" loop."""
+    while config.max_pages is None or result.pages < config.max_pages:
+        pager = await page.evaluate(PAGER_JS)
+        if not pager["next"]:
+            break
+        await page.goto(pager["next"], wait_until="domcontentloaded", timeout=config.timeout_ms)
+        result.rows += await scrape_listing_page_async(page, config.timeout_ms)
+        result.pages += 1
+
+
+async def crawl_with_browser(browser: Browser, config: CrawlConfig) -> CrawlResult:
+    started = time.perf_counter()
+    result = CrawlResult()
+    contexts = [await browser.new_context() for _ in range(max(1, config.contexts))]
+    try:
+        first = await contexts[0].new_page()
+        await first.goto(config.start_url, wait_until="domcontentloaded", timeout=config.timeout_ms)
+        first_rows = await scrape_listing_page_async(first, config.timeout_ms)
+        result.pages = 1
+
+        urls = listing_urls(first.url, await first.evaluate(PAGER_JS))
+        if urls is None:
+            print("[!] No page-N pattern found, following Next links one by one.")
+            result.rows = first_rows
+            await follow_next_links(first, config, result)
+            return result
+        if config.max_pages:
+            urls = urls[: config.max_pages]
+
+        by_index: Dict[int, List[Dict[str, str]]] = {0: first_rows}
+        queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+        for i, url in enumerate(urls[1:], start=1):
+            queue.put_nowait((i, url))
+        limit = asyncio.Semaphore(max(1, config.concurrency))
+
+        async def worker(page: Page) -> None:
+            while True:
+                try:
+                    i, url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                async with limit:
+                    try:
+                        await page.goto(url, wait_until="domcontentloaded", timeout=config.timeout_ms)
+                        by_index[i] = await scrape_listing_page_async(page, config.timeout_ms)
+                    except Exception as e:
+                        result.failed[url] = str(e)
+
+        per_context = max(1, config.pages_per_context)
+        pages = [first] + [await contexts[0].new_page() for _ in range(per_context - 1)]
+        for ctx in contexts[1:]:
+            pages += [await ctx.new_page() for _ in range(per_context)]
+        await asyncio.gather(*(worker(pg) for pg in pages))
+
+        result.pages = len(by_index)
+        result.rows = [row for i in sorted(by_index) for row in by_index[i]]
+        return result
+    finally:
+        for ctx in contexts:
+            await ctx.close()
+        result.elapsed_s = time.perf_counter() - started
+
+
+async def crawl(config: CrawlConfig) -> CrawlResult:
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=config.headless)
+        try:
+            return await crawl_with_browser(browser, config)
+        finally:
+            await browser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parallel listing-page crawler (Day 3)")
+    parser.add_argument("--url", default="http://books.toscrape.com/")
+    parser.add_argument("--contexts", type=int, default=2, help="Browser contexts (M).")
+    parser.add_argument("--pages-per-context", type=int, default=4, help="Pages per context (N).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max navigations in flight.")
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--headful", action="store_true")
+    ns = parser.parse_args()
+
+    config = CrawlConfig(
+        start_url=ns.url,
+        contexts=ns.contexts,
+        pages_per_context=ns.pages_per_context,
+        concurrency=ns.concurrency,
+        max_pages=ns.max_pages,
+        headless=not ns.headful,
+    )
+    result = asyncio.run(crawl(config))
+
+    print(f"\n[✓] Collected {len(result.rows)} books from {result.pages} page(s) in {result.elapsed_s:.2f}s.")
+    for url, err in result.failed.items():
+        print(f"[!] Failed: {url} ({err})")
+    for b in result.rows[:5]:
+        print(f" - {b['title']} | {b['price']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# day3_bench_artifacts.py
+# ------------------------------------------------------------
+# Benchmark: scraping speed during a failure storm.
+# Every page "fails" (expected selector missing) and artifacts are saved:
+#   • none     : no artifacts (baseline)
+#   • day2     : save_debug() — full-page PNG + page.content() written inline
+#   • writer   : ArtifactWriter — viewport JPEG, gzip/zstd HTML, dedup,
+#                budgets, background writes
+# Half of the failures are the same error page (404), like a blocked site.
+#
+# Usage:
+#   python day3/code/day3_bench_artifacts.py --failures 200
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from playwright.sync_api import Page, sync_playwright
+
+from day3_artifacts import ArtifactWriter
+from day3_fixture_site import FixtureSite
+
+CODE = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(CODE / "day2" / "code"))
+
+
+def storm(page: Page, urls: List[str], on_failure: Callable[[Page, int], None]) -> float:
+    t0 = time.perf_counter()
+    for i, url in enumerate(urls):
+        page.goto(url, wait_until="domcontentloaded")
+        if page.locator(".this_selector_does_not_exist").count() == 0:
+            on_failure(page, i)
+    return time.perf_counter() - t0
+
+
+def dir_size_mb(path: str) -> float:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / (1024 * 1024)
+
+
+def main() -> None:
+    from day2_screenshot_on_error import save_debug
+
+    parser = argparse.ArgumentParser(description="Debug artifact cost under a failure storm (Day 3)")
+    parser.add_argument("--failures", type=int, default=200)
+    parser.add_argument("--max-count", type=int, default=50)
+    ns = parser.parse_args()
+
+    results = []
+    with FixtureSite() as site, sync_playwright() as p:
+        browser = p.chromium.launch()
+        urls = [
+            site.listing_url(1 + i % site.page_count) if i % 2 else f"{site.base_url}catalogue/missing-{i}/index.html"
+            for i in range(ns.failures)
+        ]
+        for mode in ("none", "day2", "writer"):
+            page = browser.new_page()
+            with tempfile.TemporaryDirectory() as tmp:
+                cwd = os.getcwd()
+                os.chdir(tmp)  # save_debug writes into the working directory
+                try:
+                    if mode == "none":
+                        elapsed = storm(page, urls, lambda pg, i: None)
+                        note = ""
+                    elif mode == "day2":
+                        elapsed = storm(page, urls, lambda pg, i: save_debug(pg, prefix=f"fail_{i}"))
+                        note = f"{dir_size_mb(tmp):.1f} MB"
+                    else:
+                        artifacts = ArtifactWriter(os.path.join(tmp, "artifacts"), max_count=ns.max_count)
+                        elapsed = storm(page, urls, lambda pg, i: artifacts.capture(pg, prefix="fail"))
+                        artifacts.close()
+                        note = f"{dir_size_mb(tmp):.1f} MB; {artifacts.stats.summary()}"
+                finally:
+                    os.chdir(cwd)
+            page.close()
+            results.append((mode, elapsed, note))
+        browser.close()
+
+    print(f"\n{'mode':<8}{'seconds':>9}{'pages/s':>9}  artifacts")
+    for mode, elapsed, note in results:
+        print(f"{mode:<8}{elapsed:>9.2f}{ns.failures / elapsed:>9.1f}  {note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# day3_bench_async_crawl.py
+# ------------------------------------------------------------
+# Benchmark: serial vs parallel crawl of all 50 fixture listing pages.
+# The fixture adds a fixed per-request latency so the numbers look
+# like a real (remote) site instead of a 0 ms localhost.
+#
+# Usage:
+#   python day3/code/day3_bench_async_crawl.py --latency-ms 150
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from playwright.async_api import async_playwright
+
+from day3_async_crawler import CrawlConfig, CrawlResult, crawl_with_browser
+from day3_fixture_site import FixtureSite
+
+VARIANTS = {
+    "serial (1x1, c=1)": dict(contexts=1, pages_per_context=1, concurrency=1),
+    "parallel (2x4, c=8)": dict(contexts=2, pages_per_context=4, concurrency=8),
+    "parallel (4x4, c=16)": dict(contexts=4, pages_per_context=4, concurrency=16),
+}
+
+
+async def run_all(base_url: str, headless: bool) -> dict:
+    results = {}
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        for name, knobs in VARIANTS.items():
+            config = CrawlConfig(start_url=base_url, headless=headless, **knobs)
+            results[name] = await crawl_with_browser(browser, config)
+        await browser.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serial vs parallel crawl benchmark (Day 3)")
+    parser.add_argument("--latency-ms", type=int, default=150, help="Fixture latency per request.")
+    parser.add_argument("--headful", action="store_true")
+    ns = parser.parse_args()
+
+    with FixtureSite(latency_ms=ns.latency_ms) as site:
+        results = asyncio.run(run_all(site.base_url, headless=not ns.headful))
+
+    serial: CrawlResult = next(iter(results.values()))
+    per_page = serial.elapsed_s / max(1, serial.pages)
+    print(f"\n[i] {site.page_count} listing pages, {ns.latency_ms} ms latency per request")
+    print(f"{'variant':<22}{'pages':>7}{'rows':>7}{'seconds':>9}{'pages/s':>9}{'≈ serial pages':>16}")
+    for name, r in results.items():
+        print(
+            f"{name:<22}{r.pages:>7}{len(r.rows):>7}{r.elapsed_s:>9.2f}"
+            f"{r.pages / r.elapsed_s:>9.2f}{r.elapsed_s / per_page:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# day3_bench_columns.py
+# ------------------------------------------------------------
+# Benchmark: list of string dicts + csv.DictWriter (Day 2 save_to_csv)
+# vs typed column buffers (day3_columns.TypedSink).
+#   • rows look like extracted detail rows: title, "£51.77",
+#     "star-rating Three", "In stock (21 available)"
+#   • held MB  : Python memory holding all rows before the write
+#   • peak MB  : tracemalloc peak over accumulate + write
+#   • seconds for accumulating and for writing, plus output size;
+#     typed accumulation includes the parsing every CSV consumer
+#     would otherwise repeat (timed without tracemalloc)
+#   • "streaming" flushes every 10k rows, so nothing is held
+# pyarrow's own buffers are not seen by tracemalloc; they are freed
+# after every batch.
+#
+# Usage:
+#   python day3/code/day3_bench_columns.py --rows 100000
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from day3_columns import TypedSink, pa
+from day3_fixture_site import Book, build_catalogue
+
+
+def raw_rows(books: Sequence[Book]) -> Iterator[Dict[str, str]]:
+    for b in books:
+        yield {
+            "title": b.title,
+            "price": b.price,
+            "rating": f"star-rating {b.rating}",
+            "availability": f"In stock ({b.stock} available)",
+        }
+
+
+def size_mb(paths: Sequence[str]) -> float:
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p)) / (1024 * 1024)
+
+
+def run_mode(
+    books: Sequence[Book], tmp: str, name: str, formats: Optional[Sequence[str]], batch: int, trace: bool
+) -> tuple:
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    if formats is None:
+        rows: List[Dict[str, str]] = list(raw_rows(books))
+        t1 = time.perf_counter()
+        held = tracemalloc.get_traced_memory()[0] if trace else 0
+        outputs = [os.path.join(tmp, "day2.csv")]
+        with open(outputs[0], "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        del rows
+    else:
+        sink = TypedSink(os.path.join(tmp, name.replace(" ", "_")), formats=formats, batch_size=batch)
+        sink.write_rows(raw_rows(books))
+        t1 = time.perf_counter()
+        held = tracemalloc.get_traced_memory()[0] if trace else 0
+        sink.close()
+        outputs = [str(sink.output(fmt)) for fmt in formats]
+    t2 = time.perf_counter()
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return held, peak, t1 - t0, t2 - t1, size_mb(outputs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dict rows + CSV vs typed columnar output (Day 3)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    ns = parser.parse_args()
+
+    books = build_catalogue(ns.rows)
+    modes = [("dicts + save_to_csv", None, 0)]
+    if pa is not None:
+        modes += [("typed csv+parquet", ("csv", "parquet"), ns.rows + 1), ("typed streaming", ("csv", "parquet"), 10_000)]
+    else:
+        print("[!] pyarrow not installed: typed output limited to CSV")
+        modes += [("typed csv", ("csv",), ns.rows + 1), ("typed csv streaming", ("csv",), 10_000)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, formats, batch in modes:
+            _, _, accum_s, write_s, file_mb = run_mode(books, tmp, name, formats, batch, trace=False)
+            held, peak, *_ = run_mode(books, tmp, name, formats, batch, trace=True)  # tracemalloc slows things down
+            results.append((name, held, peak, accum_s, write_s, file_mb))
+
+    mb = 1024 * 1024
+    print(f"\n[i] {ns.rows} rows")
+    print(f"{'output':<22}{'held MB':>9}{'peak MB':>9}{'accum s':>9}{'write s':>9}{'file MB':>9}")
+    for name, held, peak, accum_s, write_s, file_mb in results:
+        print(f"{name:<22}{held / mb:>9.1f}{peak / mb:>9.1f}{accum_s:>9.2f}{write_s:>9.2f}{file_mb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# day3_bench_extraction.py
+# ------------------------------------------------------------
+# Benchmark: per-card loop (Day 2) vs one-call extraction (Day 3)
+# against the local fixture copy of books.toscrape.com.
+#   • counts Playwright protocol round-trips per page
+#   • measures pages per second (navigation + extraction)
+#
+# Usage:
+#   python day3/code/day3_bench_extraction.py --pages 20
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+from playwright.sync_api import sync_playwright, expect, Page
+
+from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows
+from day3_fixture_site import FixtureSite
+
+
+def scrape_listing_page_per_card(page: Page) -> List[Dict[str, str]]:
+    """The original Day 2 loop: get_attribute + inner_text for every card."""
+    items = page.locator("article.product_pod")
+    expect(items).to_have_count(20)
+    results: List[Dict[str, str]] = []
+    for i in range(items.count()):
+        card = items.nth(i)
+        title = card.locator("h3 a").get_attribute("title") or ""
+        price = card.locator(".price_color").inner_text()
+        results.append({"title": title, "price": price})
+    return results
+
+
+def scrape_listing_page_batch(page: Page) -> List[Dict[str, str]]:
+    """Same rows, one eval_on_selector_all call."""
+    expect(page.locator(BOOK_LISTING_SCHEMA.item_selector)).to_have_count(20)
+    return extract_rows(page, BOOK_LISTING_SCHEMA)
+
+
+@contextmanager
+def count_round_trips(page: Page) -> Iterator[List[int]]:
+    """
+    Count messages sent to the Playwright driver while the block runs.
+    Uses a private hook (_impl_obj._connection) — fine for a benchmark, not for scrapers.
+    """
+    connection = page._impl_obj._connection  # type: ignore[attr-defined]
+    original = connection._send_message_to_server
+    counter = [0]
+
+    def counting(*args, **kwargs):
+        counter[0] += 1
+        return original(*args, **kwargs)
+
+    connection._send_message_to_server = counting
+    try:
+        yield counter
+    finally:
+        connection._send_message_to_server = original
+
+
+def bench(page: Page, site: FixtureSite, pages: int, scrape: Callable[[Page], List[Dict[str, str]]]) -> Dict[str, float]:
+    rows = 0
+    extract_trips = 0
+    extract_seconds = 0.0
+    started = time.perf_counter()
+    for n in range(1, pages + 1):
+        page.goto(site.listing_url(n), wait_until="domcontentloaded")
+        t0 = time.perf_counter()
+        with count_round_trips(page) as trips:
+            rows += len(scrape(page))
+        extract_seconds += time.perf_counter() - t0
+        extract_trips += trips[0]
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "round_trips_per_page": extract_trips / pages,
+        "extract_ms_per_page": 1000 * extract_seconds / pages,
+        "pages_per_s": pages / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-card vs batch extraction benchmark (Day 3)")
+    parser.add_argument("--pages", type=int, default=20, help="Listing pages to scrape per variant.")
+    parser.add_argument("--headful", action="store_true")
+    ns = parser.parse_args()
+
+    with FixtureSite() as site, sync_playwright() as p:
+        pages = min(ns.pages, site.page_count)
+        browser = p.chromium.launch(headless=not ns.headful)
+        page = browser.new_page()
+        page.goto(site.base_url)  # warm-up
+
+        results = {
+            "per-card loop": bench(page, site, pages, scrape_listing_page_per_card),
+            "batch (1 eval)": bench(page, site, pages, scrape_listing_page_batch),
+        }
+        browser.close()
+
+    print(f"\n[i] {pages} listing pages from {site.base_url}")
+    print(f"{'variant':<16}{'rows':>7}{'trips/page':>12}{'extract ms':>12}{'pages/s':>10}")
+    for name, r in results.items():
+        print(
+            f"{name:<16}{r['rows']:>7}{r['round_trips_per_page']:>12.1f}"
+            f"{r['extract_ms_per_page']:>12.2f}{r['pages_per_s']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
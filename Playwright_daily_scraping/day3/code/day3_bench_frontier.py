@@ -0,0 +1,64 @@
+# day3_bench_frontier.py
+# ------------------------------------------------------------
+# Benchmark: enqueue / dequeue throughput of the SQLite frontier.
+#   1. enqueue N URLs in chunks (plus 10% duplicates that must be ignored)
+#   2. lease them in batches, mark done (batched commits)
+#   3. report URLs/s for each phase and the final state counts
+#
+# Usage:
+#   python day3/code/day3_bench_frontier.py --urls 200000 --batch 100
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from day3_frontier import Frontier
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite frontier throughput benchmark (Day 3)")
+    parser.add_argument("--urls", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=10_000, help="URLs per add() call.")
+    parser.add_argument("--batch", type=int, default=100, help="URLs per next_batch() call.")
+    parser.add_argument("--commit-every", type=int, default=1000)
+    ns = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.sqlite")
+        with Frontier(db, commit_every=ns.commit_every) as frontier:
+            urls = [f"http://books.toscrape.com/catalogue/book_{i}/index.html" for i in range(ns.urls)]
+            dupes = [u.replace("http://books", "HTTP://Books") + "#reviews" for u in urls[: ns.urls // 10]]
+
+            t0 = time.perf_counter()
+            added = 0
+            for start in range(0, len(urls), ns.chunk):
+                added += frontier.add(urls[start : start + ns.chunk])
+            added += frontier.add(dupes)
+            enqueue_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            dequeued = 0
+            while True:
+                batch = frontier.next_batch(ns.batch)
+                if not batch:
+                    break
+                for item in batch:
+                    frontier.mark_done(item)
+                dequeued += len(batch)
+            dequeue_s = time.perf_counter() - t0
+            counts = frontier.counts()
+        size_mb = os.path.getsize(db) / (1024 * 1024)
+
+    offered = ns.urls + len(dupes)
+    print(f"\n[i] {offered} URLs offered ({len(dupes)} duplicates after normalization), db {size_mb:.1f} MB")
+    print(f"   enqueue : {added} new in {enqueue_s:.2f}s → {offered / enqueue_s:,.0f} URLs/s")
+    print(f"   dequeue : {dequeued} leased + done in {dequeue_s:.2f}s → {dequeued / dequeue_s:,.0f} URLs/s")
+    print(f"   states  : {counts}")
+
+
+if __name__ == "__main__":
+    main()
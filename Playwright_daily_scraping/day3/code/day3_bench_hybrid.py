@@ -0,0 +1,48 @@
+# day3_bench_hybrid.py
+# ------------------------------------------------------------
+# Benchmark: pages/s for browser-only vs HTTP-first (hybrid) fetching
+# of all fixture listing pages. Both modes use the same schema and
+# must return the same rows.
+#
+# Usage:
+#   python day3/code/day3_bench_hybrid.py --latency-ms 20
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from day3_fixture_site import FixtureSite
+from day3_hybrid_fetcher import HybridFetcher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP-first vs browser-only benchmark (Day 3)")
+    parser.add_argument("--latency-ms", type=int, default=20, help="Fixture latency per request.")
+    parser.add_argument("--http-workers", type=int, default=8)
+    ns = parser.parse_args()
+
+    with FixtureSite(latency_ms=ns.latency_ms) as site:
+        urls = [site.listing_url(n) for n in range(1, site.page_count + 1)]
+        timings = {}
+        rows = {}
+        for mode, force_browser in (("browser-only", True), ("hybrid (HTTP first)", False)):
+            with HybridFetcher(force_browser=force_browser, http_workers=ns.http_workers) as fetcher:
+                t0 = time.perf_counter()
+                results = fetcher.fetch_many(urls)
+                timings[mode] = time.perf_counter() - t0
+                rows[mode] = [row for r in results for row in r.rows]
+                paths = {p: sum(r.path == p for r in results) for p in ("http", "browser")}
+            print(f"[i] {mode}: {paths}")
+
+    first, second = rows.values()
+    same = first == second
+    print(f"\n[i] {len(urls)} listing pages, {ns.latency_ms} ms latency, rows identical: {same}")
+    print(f"{'mode':<22}{'rows':>7}{'seconds':>9}{'pages/s':>10}")
+    for mode, seconds in timings.items():
+        print(f"{mode:<22}{len(rows[mode]):>7}{seconds:>9.2f}{len(urls) / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# day3_bench_resource_blocking.py
+# ------------------------------------------------------------
+# Benchmark: bytes transferred and page-load time per blocking profile
+# on the local fixture site (listing pages carry 20 images + CSS/JS/font).
+#
+# Usage:
+#   python day3/code/day3_bench_resource_blocking.py --pages 10 --latency-ms 30
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from playwright.sync_api import sync_playwright
+
+from day3_fixture_site import FixtureSite
+from day3_resource_blocking import PROFILES, RequestFilter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resource blocking benchmark (Day 3)")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency-ms", type=int, default=30, help="Fixture latency per request.")
+    ns = parser.parse_args()
+
+    rows = []
+    with FixtureSite(latency_ms=ns.latency_ms) as site, sync_playwright() as p:
+        browser = p.chromium.launch()
+        for name in PROFILES:
+            context = browser.new_context()
+            stats = RequestFilter.from_profile(name).install(context)
+            page = context.new_page()
+            load_ms = []
+            for n in range(1, ns.pages + 1):
+                t0 = time.perf_counter()
+                page.goto(site.listing_url(n), wait_until="load")
+                load_ms.append(1000 * (time.perf_counter() - t0))
+            context.close()
+            totals = stats.totals()
+            rows.append((name, totals, statistics.median(load_ms)))
+        browser.close()
+
+    baseline_bytes = rows[0][1].bytes_received or 1
+    baseline_ms = rows[0][2] or 1
+    print(f"\n[i] {ns.pages} listing pages, {ns.latency_ms} ms latency per request")
+    print(f"{'profile':<11}{'allowed':>9}{'blocked':>9}{'KB recv':>10}{'bytes saved':>13}{'load p50 ms':>13}{'faster':>8}")
+    for name, t, p50 in rows:
+        print(
+            f"{name:<11}{t.allowed:>9}{t.blocked:>9}{t.bytes_received / 1024:>10.0f}"
+            f"{1 - t.bytes_received / baseline_bytes:>12.0%}{p50:>13.1f}{baseline_ms / p50:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# day3_bench_sharded.py
+# ------------------------------------------------------------
+# Benchmark: crawl throughput vs number of worker processes.
+#   • the fixture (listing + detail pages) runs in its own process
+#   • for each process count: fresh coordinator, same shard spec,
+#     every worker leases shards until none are left
+#   • reports pages/s, speed-up over 1 process and merged row count
+#
+# --backend browser is the real case (one Chromium pool per process);
+# --backend http shows the same scaling without a browser.
+#
+# Usage:
+#   python day3/code/day3_bench_sharded.py --processes 1 2 4 8 --backend browser
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from day3_bench_sinks import start_fixture
+from day3_fixture_site import Catalogue
+from day3_sharded_crawl import ShardCoordinator, ShardSpec, merge_outputs, run_processes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded crawl scaling benchmark (Day 3)")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--books", type=int, default=400)
+    parser.add_argument("--shards", type=int, default=32)
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--concurrency", type=int, default=1, help="In-flight requests per process (http backend).")
+    ns = parser.parse_args()
+
+    catalogue = Catalogue(ns.books)  # same seed as the server → same slugs
+    proc, base_url = start_fixture(books=ns.books, latency_ms=ns.latency_ms)
+    urls = [base_url] + [f"{base_url}catalogue/page-{n}.html" for n in range(2, catalogue.page_count + 1)]
+    urls += [f"{base_url}catalogue/{b.slug}/index.html" for b in catalogue.books]
+
+    results = []
+    try:
+        for processes in ns.processes:
+            with tempfile.TemporaryDirectory() as tmp:
+                db = os.path.join(tmp, "coordinator.sqlite")
+                coordinator = ShardCoordinator(db)
+                coordinator.init(urls, ShardSpec(ns.shards))
+                coordinator.close()
+                elapsed = run_processes(db, tmp, processes, ns.backend, ns.concurrency)
+                rows, _ = merge_outputs(Path(tmp).glob("shard-*.jsonl"), os.path.join(tmp, "merged.jsonl"))
+            results.append((processes, elapsed, rows))
+    finally:
+        proc.terminate()
+
+    base = results[0][1]
+    print(f"\n[i] {len(urls)} pages, {ns.shards} shards, backend={ns.backend}, {os.cpu_count()} CPUs")
+    print(f"{'processes':>10}{'seconds':>10}{'pages/s':>10}{'speed-up':>10}{'rows':>8}")
+    for processes, elapsed, rows in results:
+        print(f"{processes:>10}{elapsed:>10.2f}{len(urls) / elapsed:>10.1f}{base / elapsed:>9.1f}x{rows:>8}")
+
+
+if __name__ == "__main__":
+    main()
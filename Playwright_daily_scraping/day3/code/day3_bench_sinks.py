@@ -0,0 +1,121 @@
+# day3_bench_sinks.py
+# ------------------------------------------------------------
+# Benchmark: peak Python memory of "collect everything, save at the end"
+# (Day 2 save_to_csv) vs streaming sinks, over a large synthetic
+# fixture site (100k books = 5000 listing pages by default).
+#
+# The fixture runs in a separate process so its own memory does not
+# show up in tracemalloc. Pages are fetched over HTTP + lxml to keep
+# the benchmark about the OUTPUT side, not the browser.
+#
+# Usage:
+#   python day3/code/day3_bench_sinks.py --pages 250 1000 5000
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows_html
+from day3_http_client import HttpClient
+from day3_sinks import open_sink
+
+FIXTURE = Path(__file__).with_name("day3_fixture_site.py")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fixture(books: int, latency_ms: int = 0, max_rps: float = 0.0, error_rate: float = 0.0) -> tuple:
+    port = free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable, str(FIXTURE), "--port", str(port), "--books", str(books),
+            "--latency-ms", str(latency_ms), "--max-rps", str(max_rps), "--error-rate", str(error_rate),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fixture server did not start")
+
+
+def save_to_csv(data: List[Dict[str, str]], filename: str) -> None:
+    """Day 2 behaviour: one write at the very end."""
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "price"])
+        writer.writeheader()
+        writer.writerows(data)
+
+
+def crawl(client: HttpClient, base_url: str, pages: int, on_page: Callable[[List[Dict[str, str]]], None]) -> None:
+    for n in range(1, pages + 1):
+        url = base_url if n == 1 else f"{base_url}catalogue/page-{n}.html"
+        on_page(extract_rows_html(client.get(url).text, BOOK_LISTING_SCHEMA))
+
+
+def measure(fn: Callable[[], None]) -> tuple:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Buffered vs streaming output memory benchmark (Day 3)")
+    parser.add_argument("--pages", type=int, nargs="+", default=[250, 1000, 5000])
+    ns = parser.parse_args()
+
+    proc, base_url = start_fixture(books=20 * max(ns.pages))
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp, HttpClient() as client:
+            for pages in ns.pages:
+
+                def buffered() -> None:
+                    all_books: List[Dict[str, str]] = []
+                    crawl(client, base_url, pages, all_books.extend)
+                    save_to_csv(all_books, os.path.join(tmp, "buffered.csv"))
+
+                results.append(("buffered + save_to_csv", pages, *measure(buffered)))
+                for ext in ("csv", "jsonl", "parquet"):
+
+                    def streaming() -> None:
+                        with open_sink(os.path.join(tmp, f"stream_{pages}.{ext}"), append=False) as sink:
+                            crawl(client, base_url, pages, sink.write_rows)
+
+                    try:
+                        results.append((f"streaming {ext}", pages, *measure(streaming)))
+                    except ImportError as e:
+                        print(f"[!] Skipping {ext}: {e}")
+    finally:
+        proc.terminate()
+
+    print(f"\n{'writer':<24}{'pages':>7}{'rows':>9}{'peak MB':>10}{'seconds':>9}")
+    for name, pages, peak_mb, seconds in results:
+        print(f"{name:<24}{pages:>7}{20 * pages:>9}{peak_mb:>10.2f}{seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
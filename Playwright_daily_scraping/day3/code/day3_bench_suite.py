@@ -0,0 +1,392 @@
+# day3_bench_suite.py
+# ------------------------------------------------------------
+# Goal: One repeatable benchmark for the existing flows, run against
+#       the local fixture site instead of the live toscrape sites.
+#   • flows:
+#       day1_run       Day 1 run() on the JS-rendered quotes page
+#       pagination     Day 2 crawl() ("Next" clicks + scrape_listing_page)
+#       anti_blocking  Day 2 crawl_books() (UA/context hygiene, paced by
+#                      the adaptive rate limiter instead of human_delay)
+#       http_listing   the same listing pages over HTTP + lxml (reference,
+#                      no browser needed)
+#   • fixture in its own process with --latency-ms / --max-rps /
+#     --error-rate, so slow, throttled or failing sites are reproducible
+#   • per flow: pages/s, p50/p95 page latency, errors, CPU seconds and
+#     peak RSS (this process + browsers, via psutil when installed)
+#   • --readiness runs the browser flows with day3_readiness instead of
+#     full "load" waits and fixed timeouts
+#   • results as JSON; --baseline compares against a stored run and
+#     exits with 1 when a flow got slower than --tolerance allows
+#
+# Usage:
+#   python day3/code/day3_bench_suite.py --out bench.json
+#   python day3/code/day3_bench_suite.py --baseline bench.json --tolerance 0.15
+#   python day3/code/day3_bench_suite.py --flows pagination --latency-ms 50 --error-rate 0.05
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from day3_bench_sinks import start_fixture
+from day3_detail_pipeline import NEXT_LINK_SCHEMA
+from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows_html
+from day3_http_client import HttpClient
+
+try:
+    import psutil  # optional: CPU/RSS of the browser processes too
+except ImportError:  # pragma: no cover
+    psutil = None
+
+CODE = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(CODE / "day1" / "code"))
+sys.path.insert(0, str(CODE / "day2" / "code"))
+
+FLOWS = ("day1_run", "pagination", "anti_blocking", "http_listing")
+BROWSER_FLOWS = {"day1_run", "pagination", "anti_blocking"}
+
+# metric → True when higher is better
+COMPARED = {"pages_per_s": True, "p50_ms": False, "p95_ms": False, "cpu_s": False, "rss_peak_mb": False}
+
+
+@dataclass
+class FlowResult:
+    flow: str
+    pages: int
+    errors: int
+    seconds: float
+    pages_per_s: float
+    p50_ms: float
+    p95_ms: float
+    cpu_s: Optional[float]
+    rss_peak_mb: Optional[float]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (exact, unlike histogram buckets)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+class PageLatencies:
+    """Main-document latency and errors of every page opened in a context."""
+
+    def __init__(self) -> None:
+        self.ms: List[float] = []
+        self.errors = 0
+
+    def attach(self, context: Any) -> None:
+        context.on("requestfinished", self._finished)
+        context.on("response", self._response)
+        context.on("requestfailed", lambda request: self._failed(request.resource_type))
+
+    def _finished(self, request: Any) -> None:
+        end = request.timing.get("responseEnd", -1)  # ms since the request started
+        if request.resource_type == "document" and end >= 0:
+            self.ms.append(end)
+
+    def _response(self, response: Any) -> None:
+        if response.request.resource_type == "document" and response.status >= 400:
+            self.errors += 1
+
+    def _failed(self, resource_type: str) -> None:
+        if resource_type == "document":
+            self.errors += 1
+
+
+class ResourceSampler:
+    """CPU seconds and peak RSS of this process and its children, sampled on a thread.
+    Without psutil only this process's CPU time is measured."""
+
+    def __init__(self, exclude_pids: Tuple[int, ...] = (), every_s: float = 0.1) -> None:
+        self.exclude = set(exclude_pids)
+        self.every_s = every_s
+        self.rss_peak = 0
+        self._cpu_start: Dict[int, float] = {}
+        self._cpu_last: Dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._times0 = os.times()
+
+    def _processes(self) -> List[Any]:
+        me = psutil.Process()
+        return [p for p in [me] + me.children(recursive=True) if p.pid not in self.exclude]
+
+    def _sample(self) -> None:
+        rss = 0
+        for proc in self._processes():
+            try:
+                cpu = proc.cpu_times()
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+            self._cpu_start.setdefault(proc.pid, cpu.user + cpu.system)
+            self._cpu_last[proc.pid] = cpu.user + cpu.system
+        self.rss_peak = max(self.rss_peak, rss)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.every_s):
+            self._sample()
+
+    def __enter__(self) -> "ResourceSampler":
+        if psutil is not None:
+            self._sample()
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if psutil is not None:
+            self._thread.join()
+            self._sample()
+
+    def cpu_s(self) -> float:
+        if psutil is None:
+            t1 = os.times()
+            return (t1.user - self._times0.user) + (t1.system - self._times0.system)
+        return sum(self._cpu_last[pid] - self._cpu_start[pid] for pid in self._cpu_last)
+
+    def rss_peak_mb(self) -> Optional[float]:
+        return self.rss_peak / (1024 * 1024) if psutil is not None else None
+
+
+class _LatencyPool:
+    """Minimal ContextPool for Day 1 run(): fresh context per attempt, latencies attached."""
+
+    def __init__(self, browser: Any, latencies: PageLatencies) -> None:
+        self.browser = browser
+        self.latencies = latencies
+
+    def acquire(self, **context_kwargs: Any) -> Any:
+        context = self.browser.new_context(**context_kwargs)
+        self.latencies.attach(context)
+        return context
+
+    def release(self, context: Any) -> None:
+        context.close()
+
+
+# -- flows: (browser, base_url, pages, readiness) → PageLatencies ----------
+
+
+def flow_day1_run(browser: Any, base_url: str, pages: int, readiness: Optional[Any] = None) -> PageLatencies:
+    from day1_resilient_scraper import run
+
+    latencies = PageLatencies()
+    pool = _LatencyPool(browser, latencies)
+    for _ in range(pages):
+        run(
+            f"{base_url}quotes/js/", max_retries=3, per_try_timeout_ms=10000, headless=True, pool=pool, readiness=readiness
+        )
+    return latencies
+
+
+def flow_pagination(browser: Any, base_url: str, pages: int, readiness: Optional[Any] = None) -> PageLatencies:
+    from day2_pagination import crawl
+
+    latencies = PageLatencies()
+    context = browser.new_context()
+    latencies.attach(context)
+    try:
+        page = context.new_page()
+        if readiness is not None:
+            readiness.goto(page, base_url, selector="article.product_pod", min_count=20)
+        else:
+            page.goto(base_url)
+        crawl(page, max_pages=pages)
+    finally:
+        context.close()
+    return latencies
+
+
+def flow_anti_blocking(browser: Any, base_url: str, pages: int, readiness: Optional[Any] = None) -> PageLatencies:
+    from day2_anti_blocking_basics import USER_AGENTS, context_options, crawl_books, prepare_context
+    from day3_rate_limit import AdaptiveRateLimiter
+
+    latencies = PageLatencies()
+    context = browser.new_context(**context_options(USER_AGENTS[0]))
+    prepare_context(context)
+    latencies.attach(context)
+    try:
+        crawl_books(
+            context.new_page(), max_pages=pages, start_url=base_url,
+            limiter=AdaptiveRateLimiter(seed=0), readiness=readiness,
+        )
+    finally:
+        context.close()
+    return latencies
+
+
+def flow_http_listing(
+    browser: Any, base_url: str, pages: int, readiness: Optional[Any] = None, attempts: int = 3
+) -> PageLatencies:
+    from urllib.parse import urljoin
+
+    latencies = PageLatencies()
+    url: Optional[str] = base_url
+    with HttpClient() as client:
+        for _ in range(pages):
+            if url is None:
+                break
+            for _ in range(attempts):
+                t0 = time.perf_counter()
+                resp = client.get(url)
+                latencies.ms.append(1000 * (time.perf_counter() - t0))
+                if resp.status == 200:
+                    break
+                latencies.errors += 1
+            html = resp.text
+            extract_rows_html(html, BOOK_LISTING_SCHEMA)
+            next_links = extract_rows_html(html, NEXT_LINK_SCHEMA)
+            url = urljoin(url, next_links[0]["href"]) if next_links else None
+    return latencies
+
+
+FLOW_FUNCS: Dict[str, Callable[..., PageLatencies]] = {
+    "day1_run": flow_day1_run,
+    "pagination": flow_pagination,
+    "anti_blocking": flow_anti_blocking,
+    "http_listing": flow_http_listing,
+}
+
+
+def run_flow(
+    name: str, browser: Any, base_url: str, pages: int, fixture_pid: int, verbose: bool, readiness: Optional[Any] = None
+) -> FlowResult:
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with ResourceSampler(exclude_pids=(fixture_pid,)) as sampler:
+        t0 = time.perf_counter()
+        with quiet:
+            latencies = FLOW_FUNCS[name](browser, base_url, pages, readiness)
+        elapsed = time.perf_counter() - t0
+    ok = len(latencies.ms) - latencies.errors
+    return FlowResult(
+        flow=name,
+        pages=ok,
+        errors=latencies.errors,
+        seconds=round(elapsed, 3),
+        pages_per_s=round(ok / elapsed, 2) if elapsed else 0.0,
+        p50_ms=round(percentile(latencies.ms, 0.50), 1),
+        p95_ms=round(percentile(latencies.ms, 0.95), 1),
+        cpu_s=round(sampler.cpu_s(), 2),
+        rss_peak_mb=round(sampler.rss_peak_mb(), 1) if sampler.rss_peak_mb() is not None else None,
+    )
+
+
+# -- baseline comparison --------------------------------------------------
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print a change table; return the regressions (worse than tolerance, e.g. 0.1 = 10%)."""
+    regressions = []
+    print(f"\n{'flow':<15}{'metric':<13}{'baseline':>10}{'current':>10}{'change':>9}")
+    for flow, result in current["flows"].items():
+        before = baseline.get("flows", {}).get(flow)
+        if before is None:
+            print(f"{flow:<15}(not in baseline)")
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = "  [!]" if worse > tolerance else ""
+            print(f"{flow:<15}{metric:<13}{old:>10g}{new:>10g}{change:>+8.0%}{flag}")
+            if flag:
+                regressions.append(f"{flow}.{metric}: {old:g} → {new:g} ({change:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reproducible benchmark suite on the fixture site (Day 3)")
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=list(FLOWS))
+    parser.add_argument("--pages", type=int, default=20, help="Listing pages per flow (day1_run: runs).")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Fixture throttle (429 above this rate).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fixture requests answered with 503.")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="Earlier --out file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression per metric (0.10 = 10%%).")
+    parser.add_argument("--readiness", action="store_true", help="Browser flows wait via day3_readiness.")
+    parser.add_argument("--verbose", action="store_true", help="Show the flows' own output.")
+    ns = parser.parse_args()
+
+    proc, base_url = start_fixture(ns.books, ns.latency_ms, ns.max_rps, ns.error_rate)
+    results: Dict[str, Any] = {}
+    readiness = None
+    if ns.readiness:
+        from day3_readiness import ReadinessEngine
+
+        readiness = ReadinessEngine()
+    try:
+        with contextlib.ExitStack() as stack:
+            browser = None
+            if BROWSER_FLOWS & set(ns.flows):
+                from playwright.sync_api import sync_playwright
+
+                try:
+                    browser = stack.enter_context(sync_playwright()).chromium.launch()
+                    stack.callback(browser.close)
+                except Exception as e:
+                    print(f"[!] Browser flows skipped, Chromium did not start: {str(e).splitlines()[0]}")
+            for name in ns.flows:
+                if name in BROWSER_FLOWS and browser is None:
+                    continue
+                print(f"[i] {name} ...")
+                try:
+                    result = run_flow(name, browser, base_url, ns.pages, proc.pid, ns.verbose, readiness)
+                    results[name] = asdict(result)
+                except Exception as e:
+                    print(f"[!] {name} failed: {e}")
+    finally:
+        proc.terminate()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(ns).items() if k not in ("out", "baseline", "tolerance", "verbose")},
+        "flows": results,
+    }
+    Path(ns.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(f"\n{'flow':<15}{'pages':>6}{'errors':>7}{'pages/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'CPU s':>7}{'RSS MB':>8}")
+    for r in results.values():
+        rss = f"{r['rss_peak_mb']:.0f}" if r["rss_peak_mb"] is not None else "-"
+        print(
+            f"{r['flow']:<15}{r['pages']:>6}{r['errors']:>7}{r['pages_per_s']:>9.1f}"
+            f"{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['cpu_s']:>7.2f}{rss:>8}"
+        )
+    print(f"[✓] Wrote {ns.out}")
+
+    if ns.baseline:
+        baseline = json.loads(Path(ns.baseline).read_text(encoding="utf-8"))
+        same = lambda config: {k: v for k, v in config.items() if k != "flows"}
+        if same(baseline.get("config", {})) != same(report["config"]):
+            print("[!] Baseline was recorded with a different config; numbers may not be comparable.")
+        regressions = compare(report, baseline, ns.tolerance)
+        if regressions:
+            print(f"\n[!] {len(regressions)} regression(s) beyond {ns.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n[✓] No regression beyond {ns.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
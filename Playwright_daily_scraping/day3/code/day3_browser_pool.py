@@ -0,0 +1,260 @@
+# day3_browser_pool.py
+# ------------------------------------------------------------
+# Goal: Keep Chromium warm between short jobs.
+#   • a pool of long-lived browser processes
+#   • acquire() hands out a FRESH, isolated context (cookies/storage never leak)
+#   • release() closes the context; the browser stays up for the next job
+#   • a browser is recycled after K contexts or when its RSS grows too much
+#   • metrics: launch (cold start) latency, acquire latency, reuse count
+#
+# Works with any code that needs a context or page, e.g.
+#   run(..., pool=pool)                        # day1_resilient_scraper.py
+#   ctx = pool.acquire(); crawl(ctx.new_page()) # day2_pagination.py
+#   pool.release(ctx)
+#
+# The sync Playwright API is single-threaded: use one pool per thread.
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Playwright
+
+try:
+    import psutil  # optional: only needed for memory-based recycling
+except ImportError:  # pragma: no cover
+    psutil = None
+
+
+def browser_process_rss_mb(browser: Browser) -> Optional[Dict[str, float]]:
+    """
+    RSS of a Chromium browser per process type ("browser", "renderer", "gpu", ...), in MB.
+    PIDs come from CDP SystemInfo.getProcessInfo; RSS from psutil.
+    Returns None when it cannot be measured (no psutil, non-Chromium, ...).
+    """
+    if psutil is None:
+        return None
+    try:
+        session = browser.new_browser_cdp_session()
+        try:
+            info = session.send("SystemInfo.getProcessInfo")
+        finally:
+            session.detach()
+    except Exception:
+        return None
+    by_type: Dict[str, float] = {}
+    for proc in info.get("processInfo", []):
+        try:
+            rss = psutil.Process(proc["id"]).memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        by_type[proc.get("type", "other")] = by_type.get(proc.get("type", "other"), 0.0) + rss / (1024 * 1024)
+    return by_type
+
+
+def browser_rss_mb(browser: Browser) -> Optional[float]:
+    """Total RSS of a Chromium browser (browser + renderer + GPU processes), in MB."""
+    by_type = browser_process_rss_mb(browser)
+    return sum(by_type.values()) if by_type is not None else None
+
+
+@dataclass
+class PooledBrowser:
+    browser: Browser
+    launched_at: float
+    contexts_served: int = 0
+    active: int = 0
+    retiring: bool = False
+
+
+@dataclass
+class PoolStats:
+    launches: int = 0
+    launch_seconds: List[float] = field(default_factory=list)
+    acquire_seconds: List[float] = field(default_factory=list)
+    contexts: int = 0
+    reused: int = 0  # contexts served by an already-running browser
+    recycled_by_count: int = 0
+    recycled_by_memory: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "launches": self.launches,
+            "launch_ms_avg": 1000 * statistics.mean(self.launch_seconds) if self.launch_seconds else 0.0,
+            "acquire_ms_avg": 1000 * statistics.mean(self.acquire_seconds) if self.acquire_seconds else 0.0,
+            "contexts": self.contexts,
+            "reuse_ratio": self.reused / self.contexts if self.contexts else 0.0,
+            "recycled_by_count": self.recycled_by_count,
+            "recycled_by_memory": self.recycled_by_memory,
+        }
+
+
+class BrowserPool:
+    """
+    Long-lived browsers handing out fresh contexts.
+
+        with sync_playwright() as p, BrowserPool(p, size=2) as pool:
+            with pool.context() as ctx:
+                page = ctx.new_page()
+    """
+
+    def __init__(
+        self,
+        playwright: Playwright,
+        size: int = 1,
+        max_contexts_per_browser: int = 50,
+        max_rss_mb: Optional[float] = None,
+        headless: bool = True,
+        **launch_kwargs: Any,
+    ) -> None:
+        self.playwright = playwright
+        self.size = max(1, size)
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.launch_kwargs = {"headless": headless, **launch_kwargs}
+        self.stats = PoolStats()
+        self._browsers: List[PooledBrowser] = []
+        self._owner: Dict[int, PooledBrowser] = {}  # id(context) -> browser slot
+        if max_rss_mb is not None and psutil is None:
+            print("[!] psutil not installed: memory-based recycling is disabled.")
+
+    def warm_up(self) -> "BrowserPool":
+        """Launch all browsers up-front so the first jobs do not pay the cold start."""
+        while len(self._live()) < self.size:
+            self._launch()
+        return self
+
+    def acquire(self, **context_kwargs: Any) -> BrowserContext:
+        """Return a new isolated context on a warm browser (launching one if needed)."""
+        t0 = time.perf_counter()
+        slot = self._pick()
+        reused = slot.contexts_served > 0
+        context = slot.browser.new_context(**context_kwargs)
+        slot.contexts_served += 1
+        slot.active += 1
+        self._owner[id(context)] = slot
+        self.stats.contexts += 1
+        self.stats.reused += int(reused)
+        self.stats.acquire_seconds.append(time.perf_counter() - t0)
+        return context
+
+    def release(self, context: BrowserContext) -> None:
+        """Close the context and return its browser to the pool (or retire it)."""
+        slot = self._owner.pop(id(context), None)
+        try:
+            context.close()
+        except Exception as e:
+            print(f"[!] Context close failed: {e}")
+        if slot is None:
+            return
+        slot.active -= 1
+        if not slot.retiring and slot.contexts_served >= self.max_contexts_per_browser:
+            slot.retiring = True
+            self.stats.recycled_by_count += 1
+        if not slot.retiring and self.max_rss_mb is not None:
+            rss = browser_rss_mb(slot.browser)
+            if rss is not None and rss > self.max_rss_mb:
+                print(f"[i] Browser RSS {rss:.0f} MB > {self.max_rss_mb:.0f} MB, recycling.")
+                slot.retiring = True
+                self.stats.recycled_by_memory += 1
+        if slot.retiring and slot.active == 0:
+            self._close(slot)
+
+    @contextmanager
+    def context(self, **context_kwargs: Any) -> Iterator[BrowserContext]:
+        ctx = self.acquire(**context_kwargs)
+        try:
+            yield ctx
+        finally:
+            self.release(ctx)
+
+    def close(self) -> None:
+        for slot in list(self._browsers):
+            self._close(slot)
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- internals -------------------------------------------------
+
+    def _live(self) -> List[PooledBrowser]:
+        return [s for s in self._browsers if not s.retiring and s.browser.is_connected()]
+
+    def _pick(self) -> PooledBrowser:
+        for slot in self._browsers:
+            if not slot.browser.is_connected():
+                slot.retiring = True
+        live = self._live()
+        if len(live) < self.size and (not live or min(s.active for s in live) > 0):
+            return self._launch()
+        return min(live, key=lambda s: s.active)
+
+    def _launch(self) -> PooledBrowser:
+        t0 = time.perf_counter()
+        browser = self.playwright.chromium.launch(**self.launch_kwargs)
+        elapsed = time.perf_counter() - t0
+        self.stats.launches += 1
+        self.stats.launch_seconds.append(elapsed)
+        slot = PooledBrowser(browser=browser, launched_at=time.time())
+        self._browsers.append(slot)
+        return slot
+
+    def _close(self, slot: PooledBrowser) -> None:
+        if slot in self._browsers:
+            self._browsers.remove(slot)
+        try:
+            slot.browser.close()
+        except Exception as e:
+            print(f"[!] Browser close failed: {e}")
+
+
+def main() -> None:
+    """Cold start per job vs pooled browsers, on the local fixture site."""
+    from day3_fixture_site import FixtureSite
+
+    parser = argparse.ArgumentParser(description="Browser pool demo/benchmark (Day 3)")
+    parser.add_argument("--jobs", type=int, default=20, help="Short jobs to run per variant.")
+    parser.add_argument("--size", type=int, default=1, help="Browsers kept warm.")
+    parser.add_argument("--recycle-after", type=int, default=10, help="Contexts per browser (K).")
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    ns = parser.parse_args()
+
+    def job(ctx: BrowserContext, url: str) -> int:
+        page = ctx.new_page()
+        page.goto(url, wait_until="domcontentloaded")
+        return page.locator("article.product_pod").count()
+
+    with FixtureSite() as site, sync_playwright() as p:
+        t0 = time.perf_counter()
+        for n in range(ns.jobs):
+            browser = p.chromium.launch()
+            job(browser.new_context(), site.listing_url(n % site.page_count + 1))
+            browser.close()
+        cold = time.perf_counter() - t0
+
+        with BrowserPool(p, size=ns.size, max_contexts_per_browser=ns.recycle_after, max_rss_mb=ns.max_rss_mb) as pool:
+            t0 = time.perf_counter()
+            for n in range(ns.jobs):
+                with pool.context() as ctx:
+                    job(ctx, site.listing_url(n % site.page_count + 1))
+            pooled = time.perf_counter() - t0
+            summary = pool.stats.summary()
+
+    print(f"\n[i] {ns.jobs} jobs")
+    print(f"   launch per job : {cold:.2f}s ({1000 * cold / ns.jobs:.0f} ms/job)")
+    print(f"   browser pool   : {pooled:.2f}s ({1000 * pooled / ns.jobs:.0f} ms/job)")
+    for key, value in summary.items():
+        print(f"   {key:<18} {value:.2f}" if isinstance(value, float) else f"   {key:<18} {value}")
+
+
+if __name__ == "__main__":
+    main()
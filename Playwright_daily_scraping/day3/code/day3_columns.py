@@ -0,0 +1,365 @@
+# day3_columns.py
+# ------------------------------------------------------------
+# Goal: Typed, columnar output instead of dicts of strings.
+# Extracted rows look like {"title": ..., "price": "£51.77"}; every
+# consumer re-parses the price and keeps Python dicts around.
+#   • normalize(): price → integer pence + ISO currency code,
+#     "star-rating Three" / "Three" → 3, "In stock (21 available)" → 21
+#   • ColumnBuffer: one compact buffer per column — array('q'/'i'/'b')
+#     for numbers, offsets + one bytearray for strings, small int codes
+#     for categories (currency) — with a validity bitmap for nulls;
+#     the layout is Arrow's, so batches become pyarrow arrays
+#     without per-value conversion
+#   • TypedSink: same write_rows()/close() interface as day3_sinks,
+#     flushes every batch as a Parquet row group, an Arrow IPC record
+#     batch and/or typed CSV lines
+#
+# Usage:
+#   with TypedSink("out/books", formats=("parquet", "csv")) as sink:
+#       sink.write_rows(rows)        # out/books.parquet + out/books.csv
+#   python day3/code/day3_bench_columns.py --rows 100000
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import csv
+import re
+from array import array
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from day3_sinks import Row, RowSink
+
+try:
+    import pyarrow as pa  # optional: Parquet / Arrow output
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = ipc = pq = None
+
+CURRENCY_SYMBOLS = {"£": "GBP", "$": "USD", "€": "EUR", "¥": "JPY"}
+RATING_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+PRICE_RE = re.compile(r"([£$€¥]|[A-Z]{3})?\s*([0-9][0-9,]*(?:\.[0-9]+)?)")
+STOCK_RE = re.compile(r"\((\d+) available\)")
+
+# normalized column → kind ("int64" | "int32" | "int8" | "string" | "category")
+TYPED_COLUMNS: Dict[str, str] = {
+    "price_pence": "int64",
+    "currency": "category",
+    "rating": "int8",
+    "stock": "int32",
+}
+
+
+def parse_price(text: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """'£51.77' → (5177, 'GBP'); also copes with the 'Â£' mojibake of the live site."""
+    if not text:
+        return None, None
+    m = PRICE_RE.search(text.replace("Â", ""))
+    if not m:
+        return None, None
+    whole, _, frac = m.group(2).replace(",", "").partition(".")
+    if len(frac) <= 2:  # the usual case, without Decimal
+        pence = int(whole) * 100 + int((frac + "00")[:2])
+    else:
+        try:
+            pence = int((Decimal(f"{whole}.{frac}") * 100).to_integral_value())
+        except InvalidOperation:
+            return None, None
+    symbol = m.group(1)
+    return pence, CURRENCY_SYMBOLS.get(symbol, symbol)
+
+
+def parse_rating(text: Optional[str]) -> Optional[int]:
+    """'star-rating Three' / 'Three' / '3' → 3."""
+    if not text:
+        return None
+    for word in text.lower().split():
+        if word in RATING_WORDS:
+            return RATING_WORDS[word]
+        if word.isdigit():
+            return int(word)
+    return None
+
+
+def parse_stock(text: Any) -> Optional[int]:
+    """'In stock (21 available)' → 21; ints pass through."""
+    if isinstance(text, int):
+        return text
+    if not text:
+        return None
+    m = STOCK_RE.search(text)
+    return int(m.group(1)) if m else (0 if "out of stock" in text.lower() else None)
+
+
+def normalize(row: Row) -> Row:
+    """Typed version of an extracted row; unknown fields are kept as strings."""
+    out: Row = {}
+    for key, value in row.items():
+        if key == "price":
+            out["price_pence"], out["currency"] = parse_price(value)
+        elif key == "rating":
+            out["rating"] = parse_rating(value)
+        elif key in ("availability", "stock"):
+            out["stock"] = parse_stock(value)
+        else:
+            out[key] = None if value is None else str(value)
+    return out
+
+
+# -- column buffers ---------------------------------------------------------
+
+
+class _Column:
+    def __init__(self) -> None:
+        self.length = 0
+        self.null_count = 0
+        self._validity = bytearray()  # Arrow validity bitmap, LSB first
+
+    def _mark(self, valid: bool) -> None:
+        i = self.length
+        if i % 8 == 0:
+            self._validity.append(0)
+        if valid:
+            self._validity[-1] |= 1 << (i % 8)
+        else:
+            self.null_count += 1
+        self.length += 1
+
+    def _is_valid(self, i: int) -> bool:
+        return bool(self._validity[i >> 3] >> (i & 7) & 1)
+
+    def _validity_buffer(self) -> Any:
+        return pa.py_buffer(bytes(self._validity)) if self.null_count else None
+
+    def nbytes(self) -> int:
+        return len(self._validity)
+
+
+class IntColumn(_Column):
+    TYPECODES = {"int64": "q", "int32": "i", "int8": "b"}
+
+    def __init__(self, kind: str = "int64") -> None:
+        super().__init__()
+        self.kind = kind
+        self.values = array(self.TYPECODES[kind])
+
+    def append(self, value: Optional[int]) -> None:
+        self._mark(value is not None)
+        self.values.append(0 if value is None else value)
+
+    def __iter__(self) -> Iterator[Optional[int]]:
+        for i, v in enumerate(self.values):
+            yield v if self._is_valid(i) else None
+
+    def to_arrow(self) -> Any:
+        buffers = [self._validity_buffer(), pa.py_buffer(self.values)]
+        return pa.Array.from_buffers(getattr(pa, self.kind)(), self.length, buffers, self.null_count)
+
+    def nbytes(self) -> int:
+        return super().nbytes() + self.values.itemsize * len(self.values)
+
+
+class StrColumn(_Column):
+    def __init__(self) -> None:
+        super().__init__()
+        self.offsets = array("i", [0])
+        self.data = bytearray()
+
+    def append(self, value: Optional[str]) -> None:
+        self._mark(value is not None)
+        if value is not None:
+            self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        data, offsets = self.data, self.offsets
+        for i in range(self.length):
+            yield data[offsets[i] : offsets[i + 1]].decode("utf-8") if self._is_valid(i) else None
+
+    def to_arrow(self) -> Any:
+        buffers = [self._validity_buffer(), pa.py_buffer(self.offsets), pa.py_buffer(bytes(self.data))]
+        return pa.Array.from_buffers(pa.string(), self.length, buffers, self.null_count)
+
+    def nbytes(self) -> int:
+        return super().nbytes() + 4 * len(self.offsets) + len(self.data)
+
+
+class CategoryColumn(_Column):
+    """Few distinct strings (currency codes): int8 codes + a small dictionary."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.codes = array("b")
+        self.categories: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def append(self, value: Optional[str]) -> None:
+        self._mark(value is not None)
+        if value is None:
+            self.codes.append(0)
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        for i, code in enumerate(self.codes):
+            yield self.categories[code] if self._is_valid(i) else None
+
+    def to_arrow(self) -> Any:
+        indices = pa.Array.from_buffers(
+            pa.int8(), self.length, [self._validity_buffer(), pa.py_buffer(self.codes)], self.null_count
+        )
+        return pa.DictionaryArray.from_arrays(indices, pa.array(self.categories or [], pa.string()))
+
+    def nbytes(self) -> int:
+        return super().nbytes() + len(self.codes)
+
+
+def _new_column(name: str) -> _Column:
+    kind = TYPED_COLUMNS.get(name, "string")
+    if kind == "string":
+        return StrColumn()
+    if kind == "category":
+        return CategoryColumn()
+    return IntColumn(kind)
+
+
+class ColumnBuffer:
+    """Normalized rows kept column by column; new fields get a column back-filled with nulls."""
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, _Column] = {}
+        self.length = 0
+
+    def append(self, row: Row) -> None:
+        typed = normalize(row)
+        columns = self.columns
+        if typed.keys() == columns.keys():  # the usual case: same fields as before
+            for name, value in typed.items():
+                columns[name].append(value)
+            self.length += 1
+            return
+        for name, value in typed.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = _new_column(name)
+                for _ in range(self.length):
+                    column.append(None)
+            column.append(value)
+        self.length += 1
+        for column in columns.values():
+            if column.length < self.length:  # field missing in this row
+                column.append(None)
+
+    def extend(self, rows: Iterable[Row]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def nbytes(self) -> int:
+        return sum(c.nbytes() for c in self.columns.values())
+
+    def rows(self, names: Optional[Sequence[str]] = None) -> Iterator[Tuple[Any, ...]]:
+        """Value tuples in column order (or in the order of `names`)."""
+        return zip(*(self.columns[n] for n in (names or list(self.columns))))
+
+    def to_arrow(self) -> Any:
+        if pa is None:
+            raise ImportError("Arrow output needs pyarrow: pip install pyarrow")
+        return pa.table({name: column.to_arrow() for name, column in self.columns.items()})
+
+    def clear(self) -> None:
+        """Empty buffers, same columns (so every batch has the same schema).
+        Category dictionaries are kept, so codes stay stable across batches."""
+        fresh: Dict[str, _Column] = {}
+        for name, column in self.columns.items():
+            fresh[name] = _new_column(name)
+            if isinstance(column, CategoryColumn):
+                fresh[name].categories, fresh[name]._lookup = column.categories, column._lookup
+        self.columns = fresh
+        self.length = 0
+
+
+class TypedSink(RowSink):
+    """
+    Typed columnar output: `<path>.parquet`, `<path>.arrow` and/or `<path>.csv`.
+    Rows go straight into a ColumnBuffer (no list of dicts); each full batch is
+    written to every format and the buffer is reused. Always starts a fresh run.
+    """
+
+    FORMATS = ("parquet", "arrow", "csv")
+
+    def __init__(
+        self, path: str, formats: Sequence[str] = ("parquet", "csv"), batch_size: int = 10_000, **kwargs: Any
+    ) -> None:
+        unknown = set(formats) - set(self.FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown format(s) {sorted(unknown)}; use {self.FORMATS}")
+        if pa is None and set(formats) & {"parquet", "arrow"}:
+            raise ImportError("Parquet/Arrow output needs pyarrow: pip install pyarrow")
+        super().__init__(path, batch_size=batch_size, **kwargs)
+        self.formats = tuple(formats)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.columns = ColumnBuffer()
+        self._schema = None
+        self._warned = False
+        self._parquet = self._arrow = self._csv_file = self._csv = None
+
+    def output(self, fmt: str) -> Path:
+        return self.path.with_name(f"{self.path.name}.{fmt}")
+
+    def write_rows(self, rows: Iterable[Row]) -> None:
+        for row in rows:
+            self.columns.append(row)
+            if len(self.columns) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        n = len(self.columns)
+        if not n:
+            return
+        if self.fieldnames is None:
+            self.fieldnames = list(self.columns.columns)
+        late = [name for name in self.columns.columns if name not in self.fieldnames]
+        if late and not self._warned:
+            print(f"[!] Field(s) {late} first seen after the first batch are not written (schema is fixed).")
+            self._warned = True
+        if "csv" in self.formats:
+            self._write_csv()
+        if set(self.formats) & {"parquet", "arrow"}:
+            self._write_arrow(self.columns.to_arrow())
+        self.rows_written += n
+        self.columns.clear()
+
+    def _write_csv(self) -> None:
+        if self._csv is None:
+            self._csv_file = open(self.output("csv"), "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(self.fieldnames)
+        self._csv.writerows(self.columns.rows(self.fieldnames))
+
+    def _write_arrow(self, table: Any) -> None:
+        if self._schema is None:
+            self._schema = table.schema
+            if "parquet" in self.formats:
+                self._parquet = pq.ParquetWriter(str(self.output("parquet")), self._schema)
+            if "arrow" in self.formats:
+                options = ipc.IpcWriteOptions(emit_dictionary_deltas=True)  # new currencies in later batches
+                self._arrow = ipc.new_file(str(self.output("arrow")), self._schema, options=options)
+        table = table.select(self._schema.names).cast(self._schema)  # later batches: same columns, same order
+        if self._parquet is not None:
+            self._parquet.write_table(table)
+        if self._arrow is not None:
+            self._arrow.write_table(table)
+
+    def _close(self) -> None:
+        for writer in (self._parquet, self._arrow, self._csv_file):
+            if writer is not None:
+                writer.close()
@@ -0,0 +1,300 @@
+# day3_detail_pipeline.py
+# ------------------------------------------------------------
+# Goal: Visit every product detail page without click() / go_back().
+# Two stages connected by a queue:
+#   1. listing stage: listing page → rows (title, price, detail link)
+#      + the next listing page; new detail URLs go into the detail queue
+#   2. detail stage: N workers open detail URLs directly and extract
+#      UPC, stock, rating and description
+#   • a seen-set (normalized URLs) skips duplicate listing/detail links
+#   • detail rows are joined to their listing row by URL and streamed
+#     to a sink
+#   • per-stage pages/s and queue depth (sampled) are reported
+# Detail pages start while the listing stage is still paging.
+#
+# Backends: "browser" (async Playwright, one page per worker) or "http"
+# (keep-alive client + lxml, same selectors).
+#
+# Usage:
+#   python day3/code/day3_detail_pipeline.py --detail-workers 8 --out books_details.jsonl
+#   python day3/code/day3_detail_pipeline.py --fixture --backend http
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set
+from urllib.parse import urljoin
+
+from day3_extraction import (
+    BOOK_DETAIL_SCHEMA,
+    BOOK_LISTING_SCHEMA,
+    ExtractionSchema,
+    Field,
+    extract_rows_async,
+    extract_rows_html,
+)
+from day3_frontier import normalize_url
+
+Row = Dict[str, Any]
+
+LISTING_WITH_LINKS_SCHEMA = ExtractionSchema(
+    item_selector=BOOK_LISTING_SCHEMA.item_selector,
+    fields={**BOOK_LISTING_SCHEMA.fields, "href": Field("h3 a", "href")},
+)
+NEXT_LINK_SCHEMA = ExtractionSchema(item_selector=".next a", fields={"href": Field("", "href")})
+
+
+def clean_detail(row: Row) -> Row:
+    """'In stock (21 available)' → 21, 'star-rating Three' → 'Three'."""
+    m = re.search(r"\((\d+) available\)", row.get("availability", ""))
+    return {
+        "upc": row.get("upc", ""),
+        "stock": int(m.group(1)) if m else 0,
+        "rating": (row.get("rating") or "").replace("star-rating", "").strip(),
+        "description": row.get("description", ""),
+    }
+
+
+# -- fetchers ---------------------------------------------------------
+
+
+class HttpPageFetcher:
+    def __init__(self, workers: int = 8) -> None:
+        from day3_http_client import HttpClient
+
+        self.client = HttpClient(max_idle_per_host=workers)
+
+    async def fetch(self, url: str, schemas: Sequence[ExtractionSchema]) -> List[List[Row]]:
+        resp = await asyncio.to_thread(self.client.get, url)
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}")
+        text = resp.text
+        return [extract_rows_html(text, schema) for schema in schemas]
+
+    async def close(self) -> None:
+        self.client.close()
+
+
+class BrowserPageFetcher:
+    """A fixed set of pages (spread over a few contexts) shared by all workers."""
+
+    def __init__(self, workers: int = 8, contexts: int = 2, headless: bool = True, timeout_ms: int = 15000) -> None:
+        self.workers = workers
+        self.contexts = contexts
+        self.headless = headless
+        self.timeout_ms = timeout_ms
+        self._pages: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._playwright = self._browser = None
+
+    async def start(self) -> "BrowserPageFetcher":
+        from playwright.async_api import async_playwright
+
+        from day3_resource_blocking import PROFILES
+
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        contexts = []
+        for _ in range(max(1, min(self.contexts, self.workers))):
+            ctx = await self._browser.new_context()
+            await PROFILES["text-only"].install_async(ctx)
+            contexts.append(ctx)
+        for i in range(self.workers):
+            self._pages.put_nowait(await contexts[i % len(contexts)].new_page())
+        return self
+
+    async def fetch(self, url: str, schemas: Sequence[ExtractionSchema]) -> List[List[Row]]:
+        page = await self._pages.get()
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+            return [await extract_rows_async(page, schema) for schema in schemas]
+        finally:
+            self._pages.put_nowait(page)
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+
+# -- pipeline ---------------------------------------------------------
+
+
+@dataclass
+class StageStats:
+    name: str
+    pages: int = 0
+    failed: int = 0
+    first_start: Optional[float] = None
+    last_end: float = 0.0
+    max_queue: int = 0
+    queue_samples: List[int] = field(default_factory=list)
+
+    def pages_per_s(self) -> float:
+        if self.first_start is None or self.last_end <= self.first_start:
+            return 0.0
+        return self.pages / (self.last_end - self.first_start)
+
+    def summary(self) -> str:
+        avg_q = sum(self.queue_samples) / len(self.queue_samples) if self.queue_samples else 0.0
+        return (
+            f"{self.name:<8} {self.pages:>5} pages ({self.failed} failed) "
+            f"{self.pages_per_s():>7.1f} pages/s | queue max {self.max_queue}, avg {avg_q:.1f}"
+        )
+
+
+class DetailPipeline:
+    def __init__(
+        self,
+        fetcher: Any,
+        sink: Optional[Any] = None,
+        detail_workers: int = 8,
+        max_listing_pages: Optional[int] = None,
+        sample_every_s: float = 0.25,
+    ) -> None:
+        self.fetcher = fetcher
+        self.sink = sink
+        self.detail_workers = detail_workers
+        self.max_listing_pages = max_listing_pages
+        self.sample_every_s = sample_every_s
+        self.seen: Set[str] = set()
+        self.duplicates = 0
+        self.listing_rows: Dict[str, Row] = {}  # normalized detail URL → listing row
+        self.rows: List[Row] = []  # joined rows (only kept without a sink)
+        self.listing = StageStats("listing")
+        self.detail = StageStats("detail")
+        self._listing_q: "asyncio.Queue[str]" = asyncio.Queue()
+        self._detail_q: "asyncio.Queue[str]" = asyncio.Queue()
+
+    def _admit(self, url: str) -> bool:
+        key = normalize_url(url)
+        if key in self.seen:
+            self.duplicates += 1
+            return False
+        self.seen.add(key)
+        return True
+
+    async def run(self, start_url: str) -> None:
+        self._admit(start_url)
+        self._listing_q.put_nowait(start_url)
+        workers = [asyncio.create_task(self._listing_worker())]
+        workers += [asyncio.create_task(self._detail_worker()) for _ in range(self.detail_workers)]
+        sampler = asyncio.create_task(self._sample_queues())
+        await self._listing_q.join()
+        await self._detail_q.join()
+        for task in workers + [sampler]:
+            task.cancel()
+        await asyncio.gather(*workers, sampler, return_exceptions=True)
+
+    async def _listing_worker(self) -> None:
+        while True:
+            url = await self._listing_q.get()
+            stats = self.listing
+            stats.first_start = stats.first_start or time.perf_counter()
+            try:
+                rows, next_links = await self.fetcher.fetch(url, [LISTING_WITH_LINKS_SCHEMA, NEXT_LINK_SCHEMA])
+                for row in rows:
+                    detail_url = urljoin(url, row.pop("href"))
+                    if self._admit(detail_url):
+                        self.listing_rows[normalize_url(detail_url)] = row
+                        self._detail_q.put_nowait(detail_url)
+                stats.pages += 1
+                within_limit = self.max_listing_pages is None or stats.pages < self.max_listing_pages
+                if next_links and within_limit:
+                    next_url = urljoin(url, next_links[0]["href"])
+                    if self._admit(next_url):
+                        self._listing_q.put_nowait(next_url)
+            except Exception as e:
+                stats.failed += 1
+                print(f"[!] listing {url}: {e}")
+            finally:
+                stats.last_end = time.perf_counter()
+                self._listing_q.task_done()
+
+    async def _detail_worker(self) -> None:
+        while True:
+            url = await self._detail_q.get()
+            stats = self.detail
+            stats.first_start = stats.first_start or time.perf_counter()
+            try:
+                (details,) = await self.fetcher.fetch(url, [BOOK_DETAIL_SCHEMA])
+                if not details:
+                    raise RuntimeError("no product on page")
+                row = {"url": url, **self.listing_rows.pop(normalize_url(url), {}), **clean_detail(details[0])}
+                if self.sink is not None:
+                    self.sink.write(row)
+                else:
+                    self.rows.append(row)
+                stats.pages += 1
+            except Exception as e:
+                stats.failed += 1
+                print(f"[!] detail {url}: {e}")
+            finally:
+                stats.last_end = time.perf_counter()
+                self._detail_q.task_done()
+
+    async def _sample_queues(self) -> None:
+        while True:
+            for stats, queue in ((self.listing, self._listing_q), (self.detail, self._detail_q)):
+                depth = queue.qsize()
+                stats.queue_samples.append(depth)
+                stats.max_queue = max(stats.max_queue, depth)
+            await asyncio.sleep(self.sample_every_s)
+
+
+async def run_pipeline(
+    start_url: str,
+    backend: str = "browser",
+    detail_workers: int = 8,
+    out: Optional[str] = None,
+    max_listing_pages: Optional[int] = None,
+) -> DetailPipeline:
+    from day3_sinks import open_sink
+
+    if backend == "http":
+        fetcher: Any = HttpPageFetcher(detail_workers)
+    else:
+        fetcher = await BrowserPageFetcher(detail_workers).start()
+    sink = open_sink(out, append=False) if out else None
+    pipeline = DetailPipeline(fetcher, sink, detail_workers, max_listing_pages)
+    t0 = time.perf_counter()
+    try:
+        await pipeline.run(start_url)
+    finally:
+        await fetcher.close()
+        if sink is not None:
+            sink.close()
+    elapsed = time.perf_counter() - t0
+    written = sink.rows_written if sink is not None else len(pipeline.rows)
+    print(f"\n[✓] {written} joined rows in {elapsed:.1f}s ({pipeline.duplicates} duplicate link(s) skipped)")
+    print(f"   {pipeline.listing.summary()}")
+    print(f"   {pipeline.detail.summary()}")
+    return pipeline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Listing → detail fan-out pipeline (Day 3)")
+    parser.add_argument("--url", default="http://books.toscrape.com/")
+    parser.add_argument("--fixture", action="store_true", help="Run against the local fixture site.")
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--detail-workers", type=int, default=8)
+    parser.add_argument("--max-listing-pages", type=int, default=None)
+    parser.add_argument("--out", default="books_details.jsonl")
+    ns = parser.parse_args()
+
+    if ns.fixture:
+        from day3_fixture_site import FixtureSite
+
+        with FixtureSite(latency_ms=20) as site:
+            asyncio.run(run_pipeline(site.base_url, ns.backend, ns.detail_workers, ns.out, ns.max_listing_pages))
+    else:
+        asyncio.run(run_pipeline(ns.url, ns.backend, ns.detail_workers, ns.out, ns.max_listing_pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# day3_diff.py
+# ------------------------------------------------------------
+# Goal: See what changed since the last run instead of overwriting it.
+#   • every item is keyed on a stable identity: UPC, else product URL
+#     (normalized), else title (works, but titles are not unique)
+#   • the previous run is an indexed snapshot (SQLite, key → price,
+#     row digest, row); a CSV/JSONL/Parquet output is indexed on the fly
+#   • today's rows are streamed in batches: one indexed lookup per
+#     batch, records emitted as they are found:
+#       added         key not in the previous snapshot
+#       price_changed same key, different price (old/new, delta in pence)
+#       changed       same key and price, some other field differs
+#       removed       previous key not seen today (found with one
+#                     NOT EXISTS scan at the end)
+#   • today's rows are indexed while diffing (--save) and become the
+#     snapshot for tomorrow; neither run is ever held in memory
+#
+# Usage:
+#   python day3/code/day3_diff.py --prev runs/2026-10-16.csv --today runs/2026-10-17.csv --out changes.jsonl
+#   python day3/code/day3_diff.py --prev runs/2026-10-16.sqlite --today books.jsonl --save runs/2026-10-17.sqlite
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from day3_columns import parse_price
+from day3_frontier import normalize_url
+from day3_sinks import Row, open_sink, read_rows
+
+KEY_FIELDS = ("upc", "url", "href", "title")  # first one present wins
+CHANGE_FIELDS = ["change", "key", "price_old", "price_new", "delta_pence"]
+LOOKUP_CHUNK = 500  # keys per IN (...) query
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS items (
+    key TEXT PRIMARY KEY,
+    price TEXT,
+    price_pence INTEGER,
+    digest BLOB NOT NULL,
+    row TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class DiffStats:
+    rows: int = 0
+    added: int = 0
+    removed: int = 0
+    price_changed: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    duplicates: int = 0  # same key twice in today's rows (first one kept)
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows} rows: {self.added} added, {self.removed} removed, {self.price_changed} price changed, "
+            f"{self.changed} other changes, {self.unchanged} unchanged, {self.duplicates} duplicate key(s)"
+        )
+
+
+def pick_key_field(row: Row) -> str:
+    for name in KEY_FIELDS:
+        if row.get(name):
+            if name == "title":
+                print("[!] No upc/url field: keying on title (not guaranteed unique).")
+            return name
+    raise ValueError(f"Rows have none of the key fields {KEY_FIELDS}")
+
+
+def item_key(row: Row, key_field: str) -> Optional[str]:
+    value = row.get(key_field)
+    if not value:
+        return None
+    value = str(value).strip()
+    return normalize_url(value) if key_field in ("url", "href") and "://" in value else value
+
+
+def encode_row(row: Row) -> Tuple[str, bytes]:
+    """Canonical JSON of a row and its digest (compared instead of the full row)."""
+    text = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return text, hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def change_record(meta: Row, row: Row) -> Row:
+    """Diff fields first, then the row; a row field with the same name never overrides the diff fields."""
+    return {**meta, **{k: v for k, v in row.items() if k not in meta}}
+
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+class SnapshotIndex:
+    """One run's items, keyed, on disk."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")  # a snapshot can always be rebuilt from its rows
+        self._db.executescript(SNAPSHOT_SCHEMA)
+
+    @property
+    def key_field(self) -> Optional[str]:
+        found = self._db.execute("SELECT value FROM meta WHERE name = 'key_field'").fetchone()
+        return found[0] if found else None
+
+    @key_field.setter
+    def key_field(self, name: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('key_field', ?)", (name,))
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def add(self, keyed: List[Tuple[str, Row]]) -> List[Optional[Tuple[Optional[int], bytes]]]:
+        """Insert a batch of (key, row); per item (price_pence, digest), or None for a duplicate key."""
+        seen = {k for k, *_ in self.lookup([k for k, _ in keyed])}
+        result: List[Optional[Tuple[Optional[int], bytes]]] = []
+        records = []
+        for key, row in keyed:
+            if key in seen:
+                result.append(None)
+                continue
+            seen.add(key)
+            price = row.get("price")
+            pence = parse_price(price)[0]
+            text, digest = encode_row(row)
+            records.append((key, price, pence, digest, text))
+            result.append((pence, digest))
+        self._db.execute("BEGIN")
+        self._db.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?)", records)
+        self._db.execute("COMMIT")
+        return result
+
+    def lookup(self, keys: List[str]) -> Iterator[Tuple[str, Optional[str], Optional[int], bytes, str]]:
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i : i + LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            yield from self._db.execute(
+                f"SELECT key, price, price_pence, digest, row FROM items WHERE key IN ({marks})", chunk
+            )
+
+    def missing_from(self, other: "SnapshotIndex") -> Iterator[Tuple[str, Optional[str], str]]:
+        """Items of this snapshot whose key is not in `other` (one indexed anti-join)."""
+        self._db.execute("ATTACH DATABASE ? AS other", (other.path,))
+        try:
+            yield from self._db.execute(
+                "SELECT key, price, row FROM items i WHERE NOT EXISTS (SELECT 1 FROM other.items o WHERE o.key = i.key)"
+            )
+        finally:
+            self._db.execute("DETACH DATABASE other")
+
+    def close(self) -> None:
+        self._db.close()
+
+    @classmethod
+    def build(cls, rows: Iterable[Row], path: str, key_field: Optional[str] = None, batch_size: int = 5000) -> "SnapshotIndex":
+        """Index a run's output (streamed) into `path`."""
+        index = cls(path)
+        for batch in _batches(rows, batch_size):
+            key_field = key_field or pick_key_field(batch[0])
+            index.add([(k, r) for r in batch if (k := item_key(r, key_field)) is not None])
+        if key_field:
+            index.key_field = key_field
+        return index
+
+
+def diff_snapshots(
+    prev: SnapshotIndex,
+    today: Iterable[Row],
+    current: SnapshotIndex,
+    key_field: Optional[str] = None,
+    stats: Optional[DiffStats] = None,
+    batch_size: int = 2000,
+) -> Iterator[Row]:
+    """Stream today's rows against `prev`, indexing them into `current`; yields change records."""
+    stats = stats if stats is not None else DiffStats()
+    key_field = key_field or prev.key_field
+    for batch in _batches(today, batch_size):
+        key_field = key_field or pick_key_field(batch[0])
+        keyed = [(k, r) for r in batch if (k := item_key(r, key_field)) is not None]
+        stats.rows += len(batch)
+        added = current.add(keyed)
+        before = {key: (price, pence, digest) for key, price, pence, digest, _ in prev.lookup([k for k, _ in keyed])}
+        for (key, row), encoded in zip(keyed, added):
+            if encoded is None:
+                stats.duplicates += 1
+                continue
+            old = before.get(key)
+            if old is None:
+                stats.added += 1
+                yield change_record({"change": "added", "key": key, "price_new": row.get("price")}, row)
+                continue
+            old_price, old_pence, old_digest = old
+            new_pence, new_digest = encoded
+            if old_pence != new_pence or (old_pence is None and old_price != row.get("price")):
+                stats.price_changed += 1
+                delta = new_pence - old_pence if old_pence is not None and new_pence is not None else None
+                yield change_record(
+                    {
+                        "change": "price_changed", "key": key, "price_old": old_price,
+                        "price_new": row.get("price"), "delta_pence": delta,
+                    },
+                    row,
+                )
+            elif old_digest != new_digest:
+                stats.changed += 1
+                yield change_record({"change": "changed", "key": key}, row)
+            else:
+                stats.unchanged += 1
+    current.key_field = key_field or ""
+    for key, price, row_json in prev.missing_from(current):
+        stats.removed += 1
+        yield change_record({"change": "removed", "key": key, "price_old": price}, json.loads(row_json))
+
+
+def open_snapshot(path: str, workdir: str, key_field: Optional[str] = None) -> SnapshotIndex:
+    """An existing .sqlite snapshot, or a CSV/JSONL/Parquet output indexed into workdir."""
+    if path.endswith((".sqlite", ".db")):
+        return SnapshotIndex(path)
+    print(f"[i] Indexing {path} ...")
+    return SnapshotIndex.build(read_rows(path), os.path.join(workdir, "prev.sqlite"), key_field)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Change detection between two runs (Day 3)")
+    parser.add_argument("--prev", required=True, help="Previous run: .csv/.jsonl/.parquet output or a .sqlite snapshot.")
+    parser.add_argument("--today", required=True, help="Today's output (.csv/.jsonl/.parquet).")
+    parser.add_argument("--out", default="changes.jsonl", help="Change records (.jsonl or .csv).")
+    parser.add_argument("--key", choices=KEY_FIELDS, default=None, help="Identity field (default: auto).")
+    parser.add_argument("--save", default=None, help="Keep today's snapshot here (.sqlite) for the next diff.")
+    ns = parser.parse_args()
+
+    stats = DiffStats()
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        if ns.save and os.path.exists(ns.save):
+            os.remove(ns.save)
+        prev = open_snapshot(ns.prev, tmp, ns.key)
+        current = SnapshotIndex(ns.save or os.path.join(tmp, "today.sqlite"))
+        today = read_rows(ns.today)
+        first = next(today, None)
+        fields = CHANGE_FIELDS + [f for f in (first or {}) if f not in CHANGE_FIELDS]
+        # Opened up front: a day without changes still replaces yesterday's output (with an empty one).
+        sink = open_sink(ns.out, fieldnames=fields, append=False)
+        try:
+            rows = chain([first], today) if first is not None else today
+            for record in diff_snapshots(prev, rows, current, ns.key, stats):
+                sink.write(record)
+        finally:
+            sink.close()
+            prev.close()
+            current.close()
+
+    print(f"[✓] {stats.summary()} in {time.perf_counter() - t0:.1f}s")
+    print(f"[✓] Wrote {sink.rows_written} change record(s) to {ns.out}")
+    if ns.save:
+        print(f"[i] Snapshot for the next run: {ns.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# day3_extraction.py
+# ------------------------------------------------------------
+# Goal: Declarative field extraction in ONE browser round-trip.
+#   • describe the rows once: item selector + {field: (selector, attribute|text)}
+#   • run a single page.eval_on_selector_all(...) per page
+#   • get every row back at once (no items.nth(i) loop)
+#
+# The Day 2 loop calls get_attribute + inner_text per card, which is
+# ~40 round-trips for a 20-item page. This does the same work in 1.
+#
+# extract_rows_html() applies the SAME schema to raw HTML with lxml,
+# so static pages can skip the browser entirely (day3_hybrid_fetcher.py).
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from playwright.sync_api import Page
+from playwright.async_api import Page as AsyncPage
+
+try:
+    import lxml.html  # optional: only needed for extract_rows_html (+ cssselect)
+except ImportError:  # pragma: no cover
+    lxml = None
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    One column of a row.
+    - selector: CSS selector relative to the item ("" = the item itself)
+    - attribute: attribute to read; None reads the trimmed text content
+    """
+    selector: str = ""
+    attribute: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ExtractionSchema:
+    item_selector: str
+    fields: Dict[str, Field] = field(default_factory=dict)
+
+    def js_arg(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Serializable form passed to the in-page extractor."""
+        return {name: {"selector": f.selector, "attribute": f.attribute} for name, f in self.fields.items()}
+
+
+# Runs inside the page: one call maps every matched item to a row.
+# textContent (not innerText) so the browser does not have to compute layout.
+EXTRACT_ROWS_JS = """
+(items, fields) => items.map((item) => {
+    const row = {};
+    for (const [name, spec] of Object.entries(fields)) {
+        const node = spec.selector ? item.querySelector(spec.selector) : item;
+        if (!node) { row[name] = ""; continue; }
+        const value = spec.attribute ? node.getAttribute(spec.attribute) : node.textContent;
+        row[name] = (value || "").trim();
+    }
+    return row;
+})
+"""
+
+
+BOOK_LISTING_SCHEMA = ExtractionSchema(
+    item_selector="article.product_pod",
+    fields={
+        "title": Field("h3 a", "title"),
+        "price": Field(".price_color"),
+    },
+)
+
+BOOK_DETAIL_SCHEMA = ExtractionSchema(
+    item_selector="article.product_page",
+    fields={
+        "title": Field(".product_main h1"),
+        "price": Field(".product_main .price_color"),
+        "availability": Field(".product_main .availability"),
+        "upc": Field("table tr:first-child td"),
+        "rating": Field(".product_main .star-rating", "class"),  # "star-rating Three"
+        "description": Field("#product_description + p"),
+    },
+)
+
+QUOTE_SCHEMA = ExtractionSchema(
+    item_selector="div.quote",
+    fields={
+        "text": Field("span.text"),
+        "author": Field("small.author"),
+    },
+)
+
+
+def extract_rows(page: Page, schema: ExtractionSchema) -> List[Dict[str, str]]:
+    """Return all rows matching `schema` on the current page (single round-trip)."""
+    return page.eval_on_selector_all(schema.item_selector, EXTRACT_ROWS_JS, schema.js_arg())
+
+
+def extract_rows_html(html: str, schema: ExtractionSchema) -> List[Dict[str, str]]:
+    """Apply `schema` to an HTML string (no browser). Same semantics as EXTRACT_ROWS_JS."""
+    if lxml is None:
+        raise ImportError("extract_rows_html needs lxml and cssselect: pip install lxml cssselect")
+    root = lxml.html.fromstring(html)
+    rows: List[Dict[str, str]] = []
+    for item in root.cssselect(schema.item_selector):
+        row: Dict[str, str] = {}
+        for name, f in schema.fields.items():
+            nodes = item.cssselect(f.selector) if f.selector else [item]
+            if not nodes:
+                row[name] = ""
+                continue
+            value = nodes[0].get(f.attribute) if f.attribute else nodes[0].text_content()
+            row[name] = (value or "").strip()
+        rows.append(row)
+    return rows
+
+
+async def extract_rows_async(page: AsyncPage, schema: ExtractionSchema) -> List[Dict[str, str]]:
+    """Async twin of extract_rows() for playwright.async_api pages."""
+    return await page.eval_on_selector_all(schema.item_selector, EXTRACT_ROWS_JS, schema.js_arg())
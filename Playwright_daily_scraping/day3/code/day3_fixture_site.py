@@ -0,0 +1,537 @@
+# day3_fixture_site.py
+# ------------------------------------------------------------
+# Goal: Serve a local, deterministic copy of books.toscrape.com
+#       (and quotes.toscrape.com under /quotes/) so benchmarks never
+#       touch the live sites.
+#   • same markup as the real listing/detail pages
+#     (article.product_pod, h3 a[title], .price_color, .next a)
+#   • generated catalogue (seeded), 20 books per page
+#   • quotes: static (/quotes/), JS-rendered (/quotes/js/, data inlined
+#     in a <script> like the real site), infinite scroll (/quotes/scroll)
+#     and a "Load more" button (/quotes/loadmore), both backed by
+#     /quotes/api/quotes?page=N
+#   • images/CSS/JS assets so resource costs look realistic
+#   • optional per-request latency (the real site is never 0 ms away)
+#   • ETag / Last-Modified validators and 304 Not Modified replies
+#   • optional throttling (--max-rps): over the limit → 429 + Retry-After
+#   • optional error injection (--error-rate): a seeded share of requests
+#     answers 503, like an overloaded origin
+#
+# Usage:
+#   python day3/code/day3_fixture_site.py --port 8000
+#   (then open http://127.0.0.1:8000/)
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+WORDS: List[str] = [
+    "light", "attic", "velvet", "objects", "sapiens", "requiem", "dirty", "coming",
+    "boys", "boat", "black", "maria", "starving", "hearts", "shakespeare", "sonnets",
+    "set", "me", "free", "rip", "it", "up", "start", "again", "olio", "mesaerion",
+    "libertarianism", "beginners", "night", "garden", "river", "silent", "city", "stars",
+]
+RATINGS: List[str] = ["One", "Two", "Three", "Four", "Five"]
+
+ASSET_SIZES: Dict[str, int] = {"image": 12_000, "css": 30_000, "js": 40_000, "font": 20_000}
+
+
+@dataclass
+class Book:
+    id: int
+    title: str
+    slug: str
+    price: str
+    rating: str
+    upc: str
+    stock: int
+    description: str
+
+
+def build_catalogue(n_books: int = 1000, seed: int = 42) -> List[Book]:
+    """Generate a deterministic list of books."""
+    rng = random.Random(seed)
+    books: List[Book] = []
+    for i in range(n_books):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(2, 6))]
+        title = " ".join(w.capitalize() for w in words) + f" Vol. {i + 1}"
+        book_id = n_books - i
+        slug = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") + f"_{book_id}"
+        books.append(
+            Book(
+                id=book_id,
+                title=title,
+                slug=slug,
+                price=f"£{rng.uniform(10, 60):.2f}",
+                rating=rng.choice(RATINGS),
+                upc=f"{rng.getrandbits(64):016x}",
+                stock=rng.randint(1, 22),
+                description=" ".join(rng.choice(WORDS) for _ in range(60)).capitalize() + ".",
+            )
+        )
+    return books
+
+
+def _layout(title: str, body: str, prefix: str) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="en-us">
+<head>
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="{prefix}static/oscar/css/styles.css">
+<link rel="preload" as="font" href="{prefix}static/oscar/fonts/glyphicons.woff" crossorigin>
+</head>
+<body id="default" class="default">
+<div class="container-fluid page">
+<div class="page_inner">
+<ul class="breadcrumb"><li><a href="{prefix}index.html">Home</a></li></ul>
+<div class="row">
+<aside class="sidebar col-sm-4 col-md-3">
+<div class="side_categories"><ul class="nav nav-list"><li><a href="{prefix}index.html">Books</a>
+<ul><li><a href="{prefix}index.html">Travel</a></li><li><a href="{prefix}index.html">Mystery</a></li>
+<li><a href="{prefix}index.html">Poetry</a></li></ul></li></ul></div>
+</aside>
+<div class="col-sm-8 col-md-9">
+{body}
+</div>
+</div>
+</div>
+</div>
+<script src="{prefix}static/oscar/js/bootstrap.min.js"></script>
+</body>
+</html>
+"""
+
+
+class Catalogue:
+    """Pre-rendered HTML for every listing and detail page of the fixture."""
+
+    def __init__(self, n_books: int = 1000, per_page: int = 20, seed: int = 42) -> None:
+        self.books = build_catalogue(n_books, seed)
+        self.by_slug: Dict[str, Book] = {b.slug: b for b in self.books}
+        self.per_page = per_page
+        self.page_count = max(1, -(-len(self.books) // per_page))
+        self._cache: Dict[str, str] = {}
+
+    def listing(self, n: int) -> Optional[str]:
+        if not 1 <= n <= self.page_count:
+            return None
+        key = f"listing:{n}"
+        if key not in self._cache:
+            self._cache[key] = self._render_listing(n)
+        return self._cache[key]
+
+    def detail(self, slug: str) -> Optional[str]:
+        key = f"detail:{slug}"
+        if key not in self._cache:
+            book = self.by_slug.get(slug)
+            if book is None:
+                return None
+            self._cache[key] = self._render_detail(book)
+        return self._cache[key]
+
+    def _render_listing(self, n: int) -> str:
+        # Page 1 lives at "/", pages 2+ at "/catalogue/page-N.html" (same as the real site).
+        prefix = "" if n == 1 else "../"
+        link_base = "catalogue/" if n == 1 else ""
+        books = self.books[(n - 1) * self.per_page : n * self.per_page]
+        cards = []
+        for b in books:
+            short = b.title if len(b.title) < 40 else b.title[:37] + "..."
+            cards.append(
+                f"""<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3">
+<article class="product_pod">
+<div class="image_container"><a href="{link_base}{b.slug}/index.html"><img src="{prefix}media/cache/{b.id}.jpg" alt="{html.escape(b.title)}" class="thumbnail"></a></div>
+<p class="star-rating {b.rating}"><i class="icon-star"></i></p>
+<h3><a href="{link_base}{b.slug}/index.html" title="{html.escape(b.title)}">{html.escape(short)}</a></h3>
+<div class="product_price">
+<p class="price_color">{b.price}</p>
+<p class="instock availability"><i class="icon-ok"></i> In stock</p>
+</div>
+</article>
+</li>"""
+            )
+        pager = [f'<li class="current">Page {n} of {self.page_count}</li>']
+        if n > 1:
+            prev_href = "../index.html" if n == 2 else f"page-{n - 1}.html"
+            pager.insert(0, f'<li class="previous"><a href="{prev_href}">previous</a></li>')
+        if n < self.page_count:
+            pager.append(f'<li class="next"><a href="{link_base}page-{n + 1}.html">next</a></li>')
+        body = (
+            '<div class="page-header action"><h1>All products</h1></div>\n'
+            f'<section><ol class="row">{"".join(cards)}</ol>\n'
+            f'<div><ul class="pager">{"".join(pager)}</ul></div></section>'
+        )
+        return _layout("All products | Books to Scrape - Sandbox", body, prefix)
+
+    def _render_detail(self, b: Book) -> str:
+        body = f"""<article class="product_page">
+<div class="row">
+<div class="col-sm-6"><div id="product_gallery"><img src="../../media/cache/{b.id}.jpg" alt="{html.escape(b.title)}"></div></div>
+<div class="col-sm-6 product_main">
+<h1>{html.escape(b.title)}</h1>
+<p class="price_color">{b.price}</p>
+<p class="instock availability"><i class="icon-ok"></i> In stock ({b.stock} available)</p>
+<p class="star-rating {b.rating}"><i class="icon-star"></i></p>
+</div>
+</div>
+<div id="product_description" class="sub-header"><h2>Product Description</h2></div>
+<p>{html.escape(b.description)}</p>
+<table class="table table-striped">
+<tr><th>UPC</th><td>{b.upc}</td></tr>
+<tr><th>Product Type</th><td>Books</td></tr>
+<tr><th>Price (excl. tax)</th><td>{b.price}</td></tr>
+<tr><th>Availability</th><td>In stock ({b.stock} available)</td></tr>
+</table>
+</article>"""
+        return _layout(f"{b.title} | Books to Scrape - Sandbox", body, "../../")
+
+
+QUOTES_PER_PAGE = 10
+
+
+class QuoteCatalogue:
+    """Quotes in the flavours of quotes.toscrape.com: static, /js/ and /scroll (+ a load-more variant)."""
+
+    def __init__(self, n_quotes: int = 100, seed: int = 7) -> None:
+        rng = random.Random(seed)
+        authors = ["Albert Einstein", "Jane Austen", "Marilyn Monroe", "J.K. Rowling", "Mark Twain", "Steve Martin"]
+        self.quotes = [
+            {
+                "text": "“" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + ".”",
+                "author": {"name": rng.choice(authors)},
+                "tags": rng.sample(WORDS, 2),
+            }
+            for _ in range(n_quotes)
+        ]
+        self.page_count = max(1, -(-len(self.quotes) // QUOTES_PER_PAGE))
+
+    def _slice(self, n: int) -> List[dict]:
+        return self.quotes[(n - 1) * QUOTES_PER_PAGE : n * QUOTES_PER_PAGE]
+
+    def api_page(self, n: int) -> str:
+        return json.dumps({"has_next": n < self.page_count, "page": n, "quotes": self._slice(n), "tag": None})
+
+    def static_page(self, n: int, base: str = "/quotes/") -> Optional[str]:
+        if not 1 <= n <= self.page_count:
+            return None
+        cards = "".join(
+            f'<div class="quote"><span class="text">{html.escape(q["text"])}</span>'
+            f'<span>by <small class="author">{html.escape(q["author"]["name"])}</small></span>'
+            f'<div class="tags">{" ".join(html.escape(t) for t in q["tags"])}</div></div>'
+            for q in self._slice(n)
+        )
+        return self._page(cards, n, base)
+
+    def js_page(self, n: int) -> Optional[str]:
+        if not 1 <= n <= self.page_count:
+            return None
+        # Same trick as the real /js/ pages: data inlined, DOM built by script.
+        script = (
+            f"<script>var data = {json.dumps(self._slice(n))};\n"
+            "for (var i in data) { var d = data[i];\n"
+            "  var el = document.createElement('div'); el.className = 'quote';\n"
+            "  el.innerHTML = '<span class=\"text\"></span><span>by <small class=\"author\"></small></span>';\n"
+            "  el.querySelector('.text').textContent = d.text;\n"
+            "  el.querySelector('.author').textContent = d.author.name;\n"
+            "  document.querySelector('.col-md-8').appendChild(el); }</script>"
+        )
+        return self._page(script, n, "/quotes/js/")
+
+    def scroll_page(self) -> str:
+        script = """<div class="quotes"></div><div class="loading">Loading...</div>
+<script>
+var page = 1, hasNext = true, busy = false;
+function load() {
+  if (!hasNext || busy) return; busy = true;
+  fetch('/quotes/api/quotes?page=' + page).then(r => r.json()).then(data => {
+    for (const d of data.quotes) {
+      const el = document.createElement('div'); el.className = 'quote';
+      el.innerHTML = '<span class="text"></span><span>by <small class="author"></small></span>';
+      el.querySelector('.text').textContent = d.text;
+      el.querySelector('.author').textContent = d.author.name;
+      document.querySelector('.quotes').appendChild(el);
+    }
+    hasNext = data.has_next; page += 1; busy = false;
+    if (!hasNext) document.querySelector('.loading').remove();
+  });
+}
+window.addEventListener('scroll', () => {
+  if (window.innerHeight + window.scrollY >= document.body.offsetHeight - 100) load();
+});
+load();
+</script>"""
+        return self._page(script, 0, "/quotes/scroll/")
+
+    def loadmore_page(self) -> str:
+        script = """<div class="quotes"></div><button class="load-more">Load more</button>
+<script>
+var page = 1;
+function load() {
+  const button = document.querySelector('.load-more'); button.disabled = true;
+  fetch('/quotes/api/quotes?page=' + page).then(r => r.json()).then(data => {
+    for (const d of data.quotes) {
+      const el = document.createElement('div'); el.className = 'quote';
+      el.innerHTML = '<span class="text"></span><span>by <small class="author"></small></span>';
+      el.querySelector('.text').textContent = d.text;
+      el.querySelector('.author').textContent = d.author.name;
+      document.querySelector('.quotes').appendChild(el);
+    }
+    page += 1; button.disabled = false;
+    if (!data.has_next) button.remove();
+  });
+}
+document.querySelector('.load-more').addEventListener('click', load);
+load();
+</script>"""
+        return self._page(script, 0, "/quotes/loadmore/")
+
+    def _page(self, content: str, n: int, base: str) -> str:
+        pager = ""
+        if 0 < n < self.page_count:
+            pager = f'<nav><ul class="pager"><li class="next"><a href="{base}page/{n + 1}/">Next <span>→</span></a></li></ul></nav>'
+        return (
+            '<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>Quotes to Scrape</title>'
+            '<link rel="stylesheet" href="/static/main.css"></head><body><div class="container">'
+            f'<div class="row"><div class="col-md-8">{content}</div></div>{pager}</div></body></html>'
+        )
+
+
+LISTING_RE = re.compile(r"^/(?:index\.html)?$|^/catalogue/page-(\d+)\.html$")
+DETAIL_RE = re.compile(r"^/catalogue/([^/]+)/index\.html$")
+QUOTES_RE = re.compile(r"^/quotes/(?:(js)/)?(?:page/(\d+)/)?$")
+ASSET_TYPES: List[Tuple[str, str, str]] = [
+    (".jpg", "image/jpeg", "image"),
+    (".css", "text/css", "css"),
+    (".js", "application/javascript", "js"),
+    (".woff", "font/woff", "font"),
+]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    server: "FixtureServer"
+
+    def log_message(self, format: str, *args) -> None:  # keep benchmark output clean
+        pass
+
+    def do_GET(self) -> None:
+        if self.server.latency_s:
+            time.sleep(self.server.latency_s)
+        if self.server.throttled():
+            self.server.rejected += 1
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.inject_error():
+            return self._send(503, "text/html; charset=utf-8", b"<h1>503 Service Unavailable</h1>")
+        path, _, query = self.path.partition("?")
+        catalogue = self.server.catalogue
+        quotes = self.server.quotes
+
+        m = QUOTES_RE.match(path)
+        if m:
+            n = int(m.group(2) or 1)
+            page_html = quotes.js_page(n) if m.group(1) else quotes.static_page(n)
+            if page_html is not None:
+                return self._send(200, "text/html; charset=utf-8", page_html.encode("utf-8"))
+        if path in ("/quotes/scroll", "/quotes/scroll/"):
+            return self._send(200, "text/html; charset=utf-8", quotes.scroll_page().encode("utf-8"))
+        if path in ("/quotes/loadmore", "/quotes/loadmore/"):
+            return self._send(200, "text/html; charset=utf-8", quotes.loadmore_page().encode("utf-8"))
+        if path == "/quotes/api/quotes":
+            m = re.search(r"(?:^|&)page=(\d+)", query)
+            body = quotes.api_page(int(m.group(1)) if m else 1)
+            return self._send(200, "application/json", body.encode("utf-8"))
+
+        m = LISTING_RE.match(path)
+        if m:
+            page_html = catalogue.listing(int(m.group(1) or 1))
+            if page_html is not None:
+                return self._send(200, "text/html; charset=utf-8", page_html.encode("utf-8"))
+
+        m = DETAIL_RE.match(path)
+        if m:
+            page_html = catalogue.detail(m.group(1))
+            if page_html is not None:
+                return self._send(200, "text/html; charset=utf-8", page_html.encode("utf-8"))
+
+        for ext, content_type, kind in ASSET_TYPES:
+            if path.endswith(ext):
+                return self._send(200, content_type, b"\0" * ASSET_SIZES[kind])
+
+        self._send(404, "text/html; charset=utf-8", b"<h1>404 Not Found</h1>")
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.server.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        catalogue: Catalogue,
+        latency_ms: int = 0,
+        max_rps: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 42,
+        n_quotes: int = 100,
+    ) -> None:
+        super().__init__(address, FixtureHandler)
+        self.catalogue = catalogue
+        self.quotes = QuoteCatalogue(n_quotes)
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.latency_s = latency_ms / 1000
+        self.max_rps = max_rps  # 0 = no throttling
+        self.served = 0
+        self.rejected = 0
+        self.error_rate = error_rate  # share of requests answered with 503
+        self.errors = 0
+        self._error_rng = random.Random(seed)
+        self._tokens = max_rps
+        self._refilled_at = time.monotonic()
+        self._bucket_lock = threading.Lock()
+
+    def throttled(self) -> bool:
+        """Server-side token bucket (burst = one second's worth of requests)."""
+        if not self.max_rps:
+            return False
+        with self._bucket_lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps, self._tokens + (now - self._refilled_at) * self.max_rps)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            self.served += 1
+            return False
+
+    def inject_error(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._bucket_lock:
+            if self._error_rng.random() >= self.error_rate:
+                return False
+            self.errors += 1
+            return True
+
+
+class FixtureSite:
+    """
+    Run the fixture server on a background thread.
+
+        with FixtureSite() as site:
+            page.goto(site.base_url)
+    """
+
+    def __init__(
+        self,
+        n_books: int = 1000,
+        per_page: int = 20,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 42,
+        latency_ms: int = 0,
+        max_rps: float = 0.0,
+        error_rate: float = 0.0,
+        n_quotes: int = 100,
+    ) -> None:
+        self.catalogue = Catalogue(n_books, per_page, seed)
+        self._server = FixtureServer((host, port), self.catalogue, latency_ms, max_rps, error_rate, seed, n_quotes)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def page_count(self) -> int:
+        return self.catalogue.page_count
+
+    @property
+    def quotes_url(self) -> str:
+        return f"{self.base_url}quotes/"
+
+    @property
+    def quote_page_count(self) -> int:
+        return self._server.quotes.page_count
+
+    @property
+    def server(self) -> FixtureServer:
+        return self._server
+
+    def listing_url(self, n: int) -> str:
+        return self.base_url if n == 1 else f"{self.base_url}catalogue/page-{n}.html"
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local books.toscrape.com fixture server (Day 3)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--quotes", type=int, default=100, help="Quotes (10 per page/API call).")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every response.")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Throttle: answer 429 above this rate.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+    ns = parser.parse_args()
+
+    site = FixtureSite(
+        n_books=ns.books, port=ns.port, latency_ms=ns.latency_ms, max_rps=ns.max_rps, error_rate=ns.error_rate,
+        n_quotes=ns.quotes,
+    )
+    print(f"[i] Serving {site.page_count} listing pages at {site.base_url} (Ctrl+C to stop)")
+    try:
+        site._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# day3_frontier.py
+# ------------------------------------------------------------
+# Goal: A crawl queue that survives crashes.
+#   • SQLite table of URLs with a state:
+#       pending → in_flight → done | failed
+#     plus attempt count, last error and timestamps
+#   • URLs are de-duplicated on a normalized form (unique index)
+#   • next_batch() leases URLs; a lease that is never finished expires
+#     and the URL becomes pending again → a restarted job resumes
+#     exactly where the old one stopped
+#   • results are committed in batches (WAL mode) so 100k+ URLs stay fast
+#
+# Usage:
+#   python day3/code/day3_frontier.py --db crawl.sqlite --out books.csv
+#   (Ctrl+C half-way, run the same command again → it continues)
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import posixpath
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+STATES = ("pending", "in_flight", "done", "failed")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id           INTEGER PRIMARY KEY,
+    url          TEXT    NOT NULL,
+    norm_url     TEXT    NOT NULL UNIQUE,
+    state        TEXT    NOT NULL DEFAULT 'pending',
+    priority     INTEGER NOT NULL DEFAULT 0,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT,
+    enqueued_at  REAL    NOT NULL,
+    updated_at   REAL    NOT NULL,
+    leased_until REAL
+);
+CREATE INDEX IF NOT EXISTS ix_frontier_queue ON frontier (state, priority DESC, id);
+CREATE INDEX IF NOT EXISTS ix_frontier_lease ON frontier (state, leased_until);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used for de-duplication:
+    lower-case scheme/host, no default port, no fragment, no tracking params,
+    sorted query, "." and ".." segments resolved.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if path != "/":
+        normalized = posixpath.normpath(path)
+        path = normalized + ("/" if path.endswith("/") and normalized != "/" else "")
+    query = urlencode(
+        sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith(TRACKING_PARAMS))
+    )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class FrontierItem:
+    id: int
+    url: str
+    attempts: int
+
+
+class Frontier:
+    """
+    Durable URL queue backed by SQLite.
+
+        with Frontier("crawl.sqlite") as frontier:
+            frontier.add([start_url])
+            while batch := frontier.next_batch(10):
+                for item in batch:
+                    ...
+                    frontier.mark_done(item)
+    """
+
+    def __init__(
+        self,
+        path: str = "frontier.sqlite",
+        commit_every: int = 500,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        # Finished items waiting for the next batched commit: (state, error, id)
+        self._pending_updates: List[Tuple[str, Optional[str], int]] = []
+
+    # -- enqueue ---------------------------------------------------
+
+    def add(self, urls: Iterable[str], priority: int = 0) -> int:
+        """Insert new URLs (duplicates by normalized URL are ignored). Returns how many were new."""
+        now = time.time()
+        rows = [(u, normalize_url(u), priority, now, now) for u in urls]
+        if not rows:
+            return 0
+        before = self._db.total_changes
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, norm_url, priority, enqueued_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return self._db.total_changes - before
+
+    def seen(self, url: str) -> bool:
+        cur = self._db.execute("SELECT 1 FROM frontier WHERE norm_url = ?", (normalize_url(url),))
+        return cur.fetchone() is not None
+
+    # -- dequeue ---------------------------------------------------
+
+    def next_batch(self, n: int = 10) -> List[FrontierItem]:
+        """Lease up to n URLs: pending ones first, then in_flight ones whose lease expired
+        (those already leased max_attempts times are marked failed instead)."""
+        self.flush()
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")  # one writer at a time → no double leases across processes
+        try:
+            rows = self._db.execute(
+                "SELECT id, url, attempts FROM frontier WHERE state = 'pending' "
+                "ORDER BY priority DESC, id LIMIT ?",
+                (n,),
+            ).fetchall()
+            # A lease that expired on its last attempt (the worker died every time) is given up on.
+            self._db.execute(
+                "UPDATE frontier SET state = 'failed', last_error = 'lease expired after max attempts', updated_at = ? "
+                "WHERE state = 'in_flight' AND leased_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            if len(rows) < n:
+                rows += self._db.execute(
+                    "SELECT id, url, attempts FROM frontier WHERE state = 'in_flight' AND leased_until < ? "
+                    "AND attempts < ? ORDER BY id LIMIT ?",
+                    (now, self.max_attempts, n - len(rows)),
+                ).fetchall()
+            self._db.executemany(
+                "UPDATE frontier SET state = 'in_flight', attempts = attempts + 1, leased_until = ?, updated_at = ? "
+                "WHERE id = ?",
+                [(now + self.lease_seconds, now, r[0]) for r in rows],
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return [FrontierItem(id=r[0], url=r[1], attempts=r[2] + 1) for r in rows]
+
+    def mark_done(self, item: FrontierItem) -> None:
+        self._queue_update("done", None, item.id)
+
+    def mark_failed(self, item: FrontierItem, error: str, retry: bool = True) -> None:
+        """Failed attempt: back to pending while attempts remain, else failed for good."""
+        state = "pending" if retry and item.attempts < self.max_attempts else "failed"
+        self._queue_update(state, error[:500], item.id)
+
+    def _queue_update(self, state: str, error: Optional[str], item_id: int) -> None:
+        self._pending_updates.append((state, error, item_id))
+        if len(self._pending_updates) >= self.commit_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit queued state changes in one transaction."""
+        if not self._pending_updates:
+            return
+        now = time.time()
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                "UPDATE frontier SET state = ?, last_error = ?, leased_until = NULL, updated_at = ? WHERE id = ?",
+                [(state, error, now, item_id) for state, error, item_id in self._pending_updates],
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")  # the updates stay queued for the next flush()
+            raise
+        self._pending_updates = []
+
+    # -- maintenance -----------------------------------------------
+
+    def requeue_in_flight(self) -> int:
+        """Single-process resume: everything left in_flight by a crashed run becomes pending now."""
+        cur = self._db.execute(
+            "UPDATE frontier SET state = 'pending', leased_until = NULL, updated_at = ? WHERE state = 'in_flight'",
+            (time.time(),),
+        )
+        return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        self.flush()
+        counts = {s: 0 for s in STATES}
+        counts.update(dict(self._db.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state")))
+        return counts
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+    def __enter__(self) -> "Frontier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main() -> None:
+    """Day 2 pagination, but every URL goes through the frontier (resumable)."""
+    from playwright.sync_api import sync_playwright
+
+    from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows
+    from day3_sinks import open_sink
+
+    parser = argparse.ArgumentParser(description="Resumable listing crawl with a SQLite frontier (Day 3)")
+    parser.add_argument("--url", default="http://books.toscrape.com/")
+    parser.add_argument("--db", default="frontier.sqlite")
+    parser.add_argument("--out", default="books_frontier.csv")
+    ns = parser.parse_args()
+
+    with Frontier(ns.db, commit_every=1) as frontier, open_sink(ns.out, batch_size=20) as sink:
+        recovered = frontier.requeue_in_flight()
+        frontier.add([ns.url])
+        print(f"[i] Frontier: {frontier.counts()} (recovered {recovered} in-flight URL(s))")
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            while True:
+                batch = frontier.next_batch(1)
+                if not batch:
+                    break
+                item = batch[0]
+                try:
+                    page.goto(item.url, wait_until="domcontentloaded", timeout=15000)
+                    page.wait_for_selector(BOOK_LISTING_SCHEMA.item_selector, timeout=15000)
+                    sink.write_rows(extract_rows(page, BOOK_LISTING_SCHEMA))
+                    sink.flush()  # rows are on disk before the URL is marked done
+                    next_href = page.eval_on_selector_all(".next a", "els => els.map(e => e.href)")
+                    frontier.add(next_href)
+                    frontier.mark_done(item)
+                    print(f"[✓] {item.url}")
+                except Exception as e:
+                    frontier.mark_failed(item, str(e))
+                    print(f"[!] {item.url} (attempt {item.attempts}): {e}")
+            browser.close()
+
+        print(f"\n[✓] Frontier: {frontier.counts()}; {sink.rows_written} new rows, {sink.rows_existing} from earlier runs.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+# day3_har.py
+# ------------------------------------------------------------
+# Goal: Record a crawl once, re-run it offline as often as needed.
+#   • record: one HAR per crawl — browser contexts via record_har_path
+#     (minimal mode), or HarWriter around the HTTP client
+#   • .har.zip files keep each response body once, named by its SHA-1
+#     (Playwright's "attach" layout), deflate-compressed; identical
+#     bodies across pages are stored a single time
+#   • compact: turn a plain .har (embedded bodies) into that layout and
+#     drop images/fonts/media the extraction never reads
+#   • replay (browser): context.route_from_har(..., not_found="abort"),
+#     so nothing reaches the network; the crawl code is unchanged
+#   • replay (http) / extract: HarIndex serves responses straight from
+#     the archive, so re-extraction of old runs needs no browser and no
+#     sockets — only CPU
+#
+# Usage:
+#   python day3/code/day3_har.py record --fixture --pages 50 --har runs/books.har.zip
+#   python day3/code/day3_har.py replay --har runs/books.har.zip --backend browser
+#   python day3/code/day3_har.py extract runs/*.har.zip --out rows.jsonl
+#   python day3/code/day3_har.py compact recorded.har recorded.har.zip
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urljoin, urlsplit
+
+from day3_extraction import BOOK_DETAIL_SCHEMA, BOOK_LISTING_SCHEMA, QUOTE_SCHEMA, extract_rows, extract_rows_html
+from day3_http_client import HttpClient, HttpResponse
+
+SCHEMAS = {"listing": BOOK_LISTING_SCHEMA, "detail": BOOK_DETAIL_SCHEMA, "quotes": QUOTE_SCHEMA}
+DROP_MIME_PREFIXES = ("image/", "font/", "audio/", "video/")
+HAR_NAME = "har.har"  # entry name inside .har.zip archives
+
+
+@dataclass
+class HarStats:
+    entries: int = 0
+    dropped: int = 0
+    bodies: int = 0
+    unique_bodies: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+
+    def summary(self) -> str:
+        ratio = self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+        return (
+            f"{self.entries} entries ({self.dropped} dropped), {self.unique_bodies}/{self.bodies} unique bodies, "
+            f"{self.raw_bytes / 1024:.0f} KB → {self.stored_bytes / 1024:.0f} KB ({ratio:.1f}x)"
+        )
+
+
+def _is_zip(path: str) -> bool:
+    return str(path).endswith(".zip")
+
+
+def _header_list(headers: Dict[str, str]) -> List[Dict[str, str]]:
+    return [{"name": k, "value": v} for k, v in headers.items()]
+
+
+def _iso8601(ts: float) -> str:
+    """HAR startedDateTime: ISO 8601 with milliseconds, e.g. 2026-10-17T08:30:00.123Z."""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# HttpClient hands back decoded, de-chunked bodies: these headers would describe the wire format.
+DECODED_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+# -- writing ------------------------------------------------------------
+
+
+class HarWriter:
+    """Collect responses and write them as .har (embedded) or .har.zip (deduplicated bodies)."""
+
+    def __init__(self, path: str, drop_mime_prefixes: Sequence[str] = ()) -> None:
+        self.path = Path(path)
+        self.drop = tuple(drop_mime_prefixes)
+        self.stats = HarStats()
+        self._entries: List[Dict[str, Any]] = []
+        self._bodies: Dict[str, bytes] = {}  # zip entry name → body
+
+    def add(
+        self,
+        url: str,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        method: str = "GET",
+        request_headers: Optional[Dict[str, str]] = None,
+        started: Optional[float] = None,
+        elapsed_ms: float = 0.0,
+    ) -> None:
+        mime = next((v for k, v in headers.items() if k.lower() == "content-type"), "")
+        if mime.startswith(self.drop):
+            self.stats.dropped += 1
+            return
+        content: Dict[str, Any] = {"size": len(body), "mimeType": mime}
+        if body:
+            self._store(content, body)
+        self._entries.append(
+            {
+                "startedDateTime": _iso8601(started or time.time()),
+                "time": elapsed_ms,
+                "request": {
+                    "method": method,
+                    "url": url,
+                    "httpVersion": "HTTP/1.1",
+                    "cookies": [],
+                    "headers": _header_list(request_headers or {}),
+                    "queryString": [{"name": k, "value": v} for k, v in parse_qsl(urlsplit(url).query)],
+                    "headersSize": -1,
+                    "bodySize": 0,
+                },
+                "response": {
+                    "status": status,
+                    "statusText": "",
+                    "httpVersion": "HTTP/1.1",
+                    "cookies": [],
+                    "headers": _header_list(headers),
+                    "content": content,
+                    "redirectURL": headers.get("location", ""),
+                    "headersSize": -1,
+                    "bodySize": len(body),
+                },
+                "cache": {},
+                "timings": {"send": 0, "wait": elapsed_ms, "receive": 0},
+            }
+        )
+        self.stats.entries += 1
+
+    def add_response(self, resp: HttpResponse, started: Optional[float] = None, elapsed_ms: float = 0.0) -> None:
+        headers = resp.headers
+        if "content-encoding" in headers or "transfer-encoding" in headers:
+            headers = {k: v for k, v in headers.items() if k not in DECODED_BODY_HEADERS}
+        self.add(resp.url, resp.status, headers, resp.body, started=started, elapsed_ms=elapsed_ms)
+
+    def _store(self, content: Dict[str, Any], body: bytes) -> None:
+        self.stats.bodies += 1
+        self.stats.raw_bytes += len(body)
+        if not _is_zip(str(self.path)):
+            try:
+                content["text"] = body.decode("utf-8")
+            except UnicodeDecodeError:
+                content["text"] = base64.b64encode(body).decode("ascii")
+                content["encoding"] = "base64"
+            return
+        ext = mimetypes.guess_extension(content["mimeType"].split(";")[0].strip()) or ".dat"
+        name = hashlib.sha1(body).hexdigest() + ext
+        if name not in self._bodies:
+            self._bodies[name] = body
+            self.stats.unique_bodies += 1
+        content["_file"] = name
+
+    def close(self) -> HarStats:
+        creator = {"name": "day3_har", "version": "1"}
+        har = {"log": {"version": "1.2", "creator": creator, "pages": [], "entries": self._entries}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if _is_zip(str(self.path)):
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                zf.writestr(HAR_NAME, json.dumps(har))
+                for name, body in self._bodies.items():
+                    zf.writestr(name, body)
+        else:
+            self.stats.unique_bodies = self.stats.bodies
+            self.path.write_text(json.dumps(har), encoding="utf-8")
+        self.stats.stored_bytes = self.path.stat().st_size
+        return self.stats
+
+    def __enter__(self) -> "HarWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RecordingClient:
+    """HttpClient that also writes every response into a HarWriter."""
+
+    def __init__(self, writer: HarWriter, client: Optional[HttpClient] = None) -> None:
+        self.writer = writer
+        self.client = client or HttpClient()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        started, t0 = time.time(), time.perf_counter()
+        resp = self.client.get(url, headers=headers)
+        self.writer.add_response(resp, started, 1000 * (time.perf_counter() - t0))
+        return resp
+
+    def close(self) -> None:
+        self.client.close()
+
+
+# -- reading ------------------------------------------------------------
+
+
+class HarIndex:
+    """Responses of a .har / .har.zip by URL (first GET entry wins, like route_from_har)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        self._zip: Optional[zipfile.ZipFile] = None
+        if _is_zip(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+            name = next(n for n in self._zip.namelist() if n.endswith(".har"))
+            har = json.loads(self._zip.read(name))
+        else:
+            har = json.loads(Path(self.path).read_text(encoding="utf-8"))
+        self.entries: List[Dict[str, Any]] = har["log"]["entries"]
+        self._by_url: Dict[str, Dict[str, Any]] = {}
+        for entry in self.entries:
+            if entry["request"]["method"] == "GET":
+                self._by_url.setdefault(entry["request"]["url"], entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def body(self, entry: Dict[str, Any]) -> bytes:
+        content = entry["response"]["content"]
+        if "_file" in content:
+            if self._zip is not None:
+                return self._zip.read(content["_file"])
+            return (Path(self.path).parent / content["_file"]).read_bytes()
+        text = content.get("text", "")
+        return base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+
+    def response(self, entry: Dict[str, Any]) -> HttpResponse:
+        r = entry["response"]
+        headers = {h["name"].lower(): h["value"] for h in r["headers"]}
+        return HttpResponse(entry["request"]["url"], r["status"], headers, self.body(entry))
+
+    def get(self, url: str) -> Optional[HttpResponse]:
+        entry = self._by_url.get(url)
+        return self.response(entry) if entry is not None else None
+
+    def documents(self) -> Iterator[HttpResponse]:
+        """Successful HTML responses in recording order."""
+        for entry in self.entries:
+            r = entry["response"]
+            if r["status"] == 200 and r["content"].get("mimeType", "").startswith("text/html"):
+                yield self.response(entry)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+
+
+class ReplayClient:
+    """HttpClient stand-in answering from a HAR; unknown URLs get a 404, never the network."""
+
+    def __init__(self, index: HarIndex) -> None:
+        self.index = index
+        self.misses = 0
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        resp = self.index.get(url)
+        if resp is None:
+            self.misses += 1
+            return HttpResponse(url, 404)
+        return resp
+
+    def close(self) -> None:
+        self.index.close()
+
+
+def compact_har(src: str, dst: str, drop_mime_prefixes: Sequence[str] = DROP_MIME_PREFIXES) -> HarStats:
+    """Rewrite a HAR into dst (.har.zip → one copy per distinct body), dropping media entries."""
+    index = HarIndex(src)
+    writer = HarWriter(dst, drop_mime_prefixes)
+    try:
+        for entry in index.entries:
+            req, r = entry["request"], entry["response"]
+            writer.add(
+                req["url"],
+                r["status"],
+                {h["name"]: h["value"] for h in r["headers"]},
+                index.body(entry),
+                method=req["method"],
+                request_headers={h["name"]: h["value"] for h in req.get("headers", [])},
+                elapsed_ms=entry.get("time", 0.0),
+            )
+    finally:
+        index.close()
+    stats = writer.close()
+    stats.raw_bytes = Path(src).stat().st_size
+    return stats
+
+
+# -- browser record / replay ---------------------------------------------
+
+
+def record_context(browser: Any, har_path: str, url_filter: Optional[str] = None, **context_kwargs: Any) -> Any:
+    """New context that records its traffic to har_path (written when the context closes)."""
+    Path(har_path).parent.mkdir(parents=True, exist_ok=True)
+    options: Dict[str, Any] = {
+        "record_har_path": har_path,
+        "record_har_mode": "minimal",  # only what replay needs
+        "record_har_content": "attach" if _is_zip(har_path) else "embed",
+    }
+    if url_filter:
+        options["record_har_url_filter"] = url_filter
+    return browser.new_context(**options, **context_kwargs)
+
+
+def replay_context(browser: Any, har_path: str, **context_kwargs: Any) -> Any:
+    """New context served entirely from har_path; requests missing from it are aborted."""
+    context = browser.new_context(**context_kwargs)
+    context.route_from_har(har_path, not_found="abort")
+    return context
+
+
+async def replay_context_async(browser: Any, har_path: str, **context_kwargs: Any) -> Any:
+    context = await browser.new_context(**context_kwargs)
+    await context.route_from_har(har_path, not_found="abort")
+    return context
+
+
+# -- the crawl that gets recorded and replayed -----------------------------
+
+
+def crawl_listing_browser(page: Any, start_url: str, max_pages: int) -> Tuple[List[Dict[str, str]], int]:
+    """Follow "Next" from start_url; returns (rows, pages visited)."""
+    rows: List[Dict[str, str]] = []
+    url: Optional[str] = start_url
+    pages = 0
+    while url is not None and pages < max_pages:
+        page.goto(url, wait_until="domcontentloaded")
+        rows += extract_rows(page, BOOK_LISTING_SCHEMA)
+        pages += 1
+        href = page.locator(".next a").first.get_attribute("href") if page.locator(".next a").count() else None
+        url = urljoin(page.url, href) if href else None
+    return rows, pages
+
+
+def crawl_listing_http(client: Any, start_url: str, max_pages: int) -> Tuple[List[Dict[str, str]], int]:
+    """Same crawl over HttpClient / RecordingClient / ReplayClient."""
+    from day3_detail_pipeline import NEXT_LINK_SCHEMA
+
+    rows: List[Dict[str, str]] = []
+    url: Optional[str] = start_url
+    pages = 0
+    while url is not None and pages < max_pages:
+        resp = client.get(url)
+        if resp.status != 200:
+            print(f"[!] {url}: HTTP {resp.status}")
+            break
+        html = resp.text
+        rows += extract_rows_html(html, BOOK_LISTING_SCHEMA)
+        pages += 1
+        next_links = extract_rows_html(html, NEXT_LINK_SCHEMA)
+        url = urljoin(url, next_links[0]["href"]) if next_links else None
+    return rows, pages
+
+
+def first_document_url(har_path: str) -> str:
+    index = HarIndex(har_path)
+    try:
+        return next(index.documents()).url
+    finally:
+        index.close()
+
+
+def extract_file(har_path: str, schema_name: str) -> List[Dict[str, str]]:
+    """All rows of one HAR (every HTML document in it), tagged with their URL."""
+    index = HarIndex(har_path)
+    rows: List[Dict[str, str]] = []
+    try:
+        for doc in index.documents():
+            rows += [{"url": doc.url, **row} for row in extract_rows_html(doc.text, SCHEMAS[schema_name])]
+    finally:
+        index.close()
+    return rows
+
+
+# -- CLI ------------------------------------------------------------------
+
+
+def cmd_record(ns: argparse.Namespace) -> None:
+    from day3_fixture_site import FixtureSite
+
+    site = FixtureSite(latency_ms=ns.latency_ms).start() if ns.fixture else None
+    start_url = site.base_url if site is not None else ns.url
+    t0 = time.perf_counter()
+    try:
+        if ns.backend == "http":
+            writer = HarWriter(ns.har, DROP_MIME_PREFIXES)
+            client = RecordingClient(writer)
+            try:
+                rows, _ = crawl_listing_http(client, start_url, ns.pages)
+            finally:
+                client.close()
+            summary = writer.close().summary()
+        else:
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                browser = p.chromium.launch()
+                context = record_context(browser, ns.har)
+                rows, _ = crawl_listing_browser(context.new_page(), start_url, ns.pages)
+                context.close()  # flushes the HAR
+                browser.close()
+            summary = f"{Path(ns.har).stat().st_size / 1024:.0f} KB"
+    finally:
+        if site is not None:
+            site.stop()
+    print(f"[✓] Recorded {len(rows)} rows in {time.perf_counter() - t0:.1f}s → {ns.har} ({summary})")
+
+
+def cmd_replay(ns: argparse.Namespace) -> None:
+    start_url = first_document_url(ns.har)
+    t0 = time.perf_counter()
+    if ns.backend == "http":
+        client = ReplayClient(HarIndex(ns.har))
+        try:
+            rows, pages = crawl_listing_http(client, start_url, ns.pages)
+        finally:
+            client.close()
+    else:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            context = replay_context(browser, ns.har)
+            rows, pages = crawl_listing_browser(context.new_page(), start_url, ns.pages)
+            context.close()
+            browser.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[✓] Replayed {pages} page(s), {len(rows)} rows in {elapsed:.2f}s ({pages / elapsed:.0f} pages/s), no network")
+
+
+def cmd_extract(ns: argparse.Namespace) -> None:
+    from day3_sinks import open_sink
+
+    t0 = time.perf_counter()
+    sink = open_sink(ns.out, append=False)
+    with ProcessPoolExecutor(max_workers=ns.workers) as pool:
+        for rows in pool.map(extract_file, ns.hars, [ns.schema] * len(ns.hars)):
+            sink.write_rows(rows)
+    sink.close()
+    print(f"[✓] {sink.rows_written} rows from {len(ns.hars)} HAR file(s) in {time.perf_counter() - t0:.2f}s → {ns.out}")
+
+
+def cmd_compact(ns: argparse.Namespace) -> None:
+    print(f"[✓] {ns.dst}: {compact_har(ns.src, ns.dst).summary()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HAR record / replay / re-extraction (Day 3)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Crawl and save the traffic as a HAR.")
+    rec.add_argument("--url", default="http://books.toscrape.com/")
+    rec.add_argument("--fixture", action="store_true", help="Record the local fixture site.")
+    rec.add_argument("--latency-ms", type=int, default=20)
+    rec.add_argument("--pages", type=int, default=50)
+    rec.add_argument("--backend", choices=["browser", "http"], default="browser")
+    rec.add_argument("--har", default="runs/books.har.zip")
+    rec.set_defaults(func=cmd_record)
+
+    rep = sub.add_parser("replay", help="Run the same crawl against a HAR, without network.")
+    rep.add_argument("--har", default="runs/books.har.zip")
+    rep.add_argument("--pages", type=int, default=50)
+    rep.add_argument("--backend", choices=["browser", "http"], default="browser")
+    rep.set_defaults(func=cmd_replay)
+
+    ext = sub.add_parser("extract", help="Re-extract rows from recorded HTML documents.")
+    ext.add_argument("hars", nargs="+")
+    ext.add_argument("--schema", choices=sorted(SCHEMAS), default="listing")
+    ext.add_argument("--out", default="rows.jsonl")
+    ext.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count).")
+    ext.set_defaults(func=cmd_extract)
+
+    cmp_ = sub.add_parser("compact", help="Deduplicate + compress a HAR, dropping media.")
+    cmp_.add_argument("src")
+    cmp_.add_argument("dst")
+    cmp_.set_defaults(func=cmd_compact)
+
+    ns = parser.parse_args()
+    ns.func(ns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# day3_http_client.py
+# ------------------------------------------------------------
+# Goal: A small keep-alive HTTP client (standard library only).
+#   • connections are pooled per (scheme, host) and reused
+#   • gzip responses are decoded
+#   • redirects are followed (up to 5)
+#   • per-response timing: connect (DNS + TCP/TLS, new connections only),
+#     ttfb and download, in resp.timing
+#   • thread-safe: many worker threads can share one client
+#
+# Usage:
+#   client = HttpClient()
+#   resp = client.get("http://books.toscrape.com/")
+#   print(resp.status, len(resp.text))
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import gzip
+import http.client
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip",
+    "Connection": "keep-alive",
+}
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+
+
+@dataclass
+class HttpResponse:
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)  # lower-cased names
+    body: bytes = b""
+    timing: Dict[str, float] = field(default_factory=dict)  # seconds: connect (new connection), ttfb, download
+
+    @property
+    def text(self) -> str:
+        m = re.search(r"charset=([\w-]+)", self.headers.get("content-type", ""))
+        return self.body.decode(m.group(1) if m else "utf-8", errors="replace")
+
+
+class HttpClient:
+    def __init__(
+        self,
+        timeout: float = 15.0,
+        max_idle_per_host: int = 8,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, max_redirects: int = 5) -> HttpResponse:
+        for _ in range(max_redirects + 1):
+            resp = self._request(url, headers)
+            location = resp.headers.get("location")
+            if resp.status not in REDIRECT_CODES or not location:
+                return resp
+            url = urljoin(url, location)
+        return resp
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- internals -------------------------------------------------
+
+    def _request(self, url: str, headers: Optional[Dict[str, str]]) -> HttpResponse:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        all_headers = {**self.headers, **(headers or {})}
+
+        timing: Dict[str, float] = {}
+        conn, reused = self._checkout(key)
+        try:
+            if not reused:
+                timing["connect"] = self._connect(conn)
+            t0 = time.perf_counter()
+            resp = self._send(conn, path, all_headers)
+        except (http.client.HTTPException, ConnectionError, OSError):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive connection: retry once on a fresh one.
+            conn, _ = self._checkout(key, fresh=True)
+            timing["connect"] = self._connect(conn)
+            t0 = time.perf_counter()
+            resp = self._send(conn, path, all_headers)
+
+        t1 = time.perf_counter()
+        body = resp.read()
+        timing["ttfb"], timing["download"] = t1 - t0, time.perf_counter() - t1
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if resp_headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        return HttpResponse(url=url, status=resp.status, headers=resp_headers, body=body, timing=timing)
+
+    @staticmethod
+    def _connect(conn: http.client.HTTPConnection) -> float:
+        t0 = time.perf_counter()
+        conn.connect()  # name lookup + TCP (+ TLS) handshake
+        return time.perf_counter() - t0
+
+    def _send(self, conn: http.client.HTTPConnection, path: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        conn.request("GET", path, headers=headers)
+        with self._lock:
+            self.requests_sent += 1
+        return conn.getresponse()
+
+    def _checkout(self, key: Tuple[str, str], fresh: bool = False) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle and not fresh:
+                return idle.pop(), True
+            self.connections_opened += 1
+        scheme, netloc = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout), False
+
+    def _checkin(self, key: Tuple[str, str], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
@@ -0,0 +1,175 @@
+# day3_hybrid_fetcher.py
+# ------------------------------------------------------------
+# Goal: Only pay for Chromium when the page really needs JavaScript.
+#   1. Try a pooled keep-alive HTTP GET + lxml with the SAME selectors
+#      as scrape_listing_page (BOOK_LISTING_SCHEMA)
+#   2. Fall back to Playwright when
+#        - the URL matches a "needs JS" glob (quotes.toscrape.com/js/), or
+#        - the HTTP response is not 200, or the selectors come back empty
+#   3. Report, per URL, which path produced the rows
+#
+# Usage:
+#   python day3/code/day3_hybrid_fetcher.py http://books.toscrape.com/ https://quotes.toscrape.com/js/
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Sequence
+
+from playwright.sync_api import sync_playwright, Playwright
+
+from day3_browser_pool import BrowserPool
+from day3_extraction import BOOK_LISTING_SCHEMA, QUOTE_SCHEMA, ExtractionSchema, extract_rows, extract_rows_html
+from day3_http_client import HttpClient
+
+NEEDS_JS_GLOBS: List[str] = ["*quotes.toscrape.com/js/*"]
+
+
+@dataclass
+class FetchResult:
+    url: str
+    path: str  # "http" or "browser"
+    rows: List[Dict[str, str]] = field(default_factory=list)
+    status: Optional[int] = None
+    fallback_reason: str = ""
+    elapsed_s: float = 0.0
+    error: str = ""
+
+
+class HybridFetcher:
+    """
+    HTTP first, browser second.
+
+        with HybridFetcher() as fetcher:
+            for r in fetcher.fetch_many(urls):
+                print(r.url, r.path, len(r.rows))
+    """
+
+    def __init__(
+        self,
+        schema: ExtractionSchema = BOOK_LISTING_SCHEMA,
+        needs_js: Sequence[str] = NEEDS_JS_GLOBS,
+        http_workers: int = 8,
+        force_browser: bool = False,
+        client: Optional[HttpClient] = None,
+        pool: Optional[BrowserPool] = None,
+        timeout_ms: int = 15000,
+    ) -> None:
+        self.schema = schema
+        self.needs_js = list(needs_js)
+        self.http_workers = http_workers
+        self.force_browser = force_browser
+        self.client = client or HttpClient(timeout=timeout_ms / 1000)
+        self.timeout_ms = timeout_ms
+        self._pool = pool
+        self._own_playwright: Optional[Playwright] = None
+        self._pw_manager = None
+
+    # -- HTTP path -------------------------------------------------
+
+    def try_http(self, url: str) -> FetchResult:
+        """Fetch + parse without a browser. path == "browser" means: please fall back."""
+        t0 = time.perf_counter()
+        result = FetchResult(url=url, path="browser")
+        if self.force_browser:
+            result.fallback_reason = "forced"
+        elif any(fnmatch(url, g) for g in self.needs_js):
+            result.fallback_reason = "needs-js"
+        else:
+            try:
+                resp = self.client.get(url)
+                result.status = resp.status
+                if resp.status != 200:
+                    result.fallback_reason = f"http-{resp.status}"
+                else:
+                    rows = extract_rows_html(resp.text, self.schema)
+                    if rows:
+                        result.path, result.rows = "http", rows
+                    else:
+                        result.fallback_reason = "empty-selectors"
+            except Exception as e:
+                result.fallback_reason = f"http-error: {e}"
+        result.elapsed_s = time.perf_counter() - t0
+        return result
+
+    # -- browser path ----------------------------------------------
+
+    def fetch_with_browser(self, url: str, result: Optional[FetchResult] = None) -> FetchResult:
+        t0 = time.perf_counter()
+        result = result or FetchResult(url=url, path="browser")
+        result.path = "browser"
+        with self._browser_pool().context() as ctx:
+            page = ctx.new_page()
+            try:
+                resp = page.goto(url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+                result.status = resp.status if resp else None
+                page.wait_for_selector(self.schema.item_selector, timeout=self.timeout_ms)
+                result.rows = extract_rows(page, self.schema)
+            except Exception as e:
+                result.error = str(e)
+        result.elapsed_s += time.perf_counter() - t0
+        return result
+
+    def _browser_pool(self) -> BrowserPool:
+        if self._pool is None:
+            # Started lazily: a fully static crawl never launches Chromium.
+            self._pw_manager = sync_playwright()
+            self._own_playwright = self._pw_manager.start()
+            self._pool = BrowserPool(self._own_playwright)
+        return self._pool
+
+    # -- public API ------------------------------------------------
+
+    def fetch(self, url: str) -> FetchResult:
+        result = self.try_http(url)
+        return result if result.path == "http" else self.fetch_with_browser(url, result)
+
+    def fetch_many(self, urls: Sequence[str]) -> List[FetchResult]:
+        """HTTP attempts run on a thread pool; fallbacks run on this thread (sync Playwright)."""
+        with ThreadPoolExecutor(max_workers=self.http_workers) as executor:
+            results = list(executor.map(self.try_http, urls))
+        return [r if r.path == "http" else self.fetch_with_browser(r.url, r) for r in results]
+
+    def close(self) -> None:
+        self.client.close()
+        if self._own_playwright is not None:
+            self._pool.close()
+            self._pw_manager.__exit__(None, None, None)
+            self._own_playwright = None
+            self._pool = None
+
+    def __enter__(self) -> "HybridFetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def print_report(results: List[FetchResult]) -> None:
+    for r in results:
+        note = f" ({r.fallback_reason})" if r.path == "browser" and r.fallback_reason else ""
+        err = f" [!] {r.error}" if r.error else ""
+        print(f" - [{r.path:<7}] {len(r.rows):>3} rows {1000 * r.elapsed_s:>7.1f} ms  {r.url}{note}{err}")
+    http_count = sum(r.path == "http" for r in results)
+    print(f"[✓] {len(results)} URL(s): {http_count} via HTTP, {len(results) - http_count} via browser.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP-first fetcher with Playwright fallback (Day 3)")
+    parser.add_argument("urls", nargs="*", default=["http://books.toscrape.com/"])
+    parser.add_argument("--quotes", action="store_true", help="Use the quotes schema (div.quote).")
+    parser.add_argument("--force-browser", action="store_true")
+    ns = parser.parse_args()
+
+    schema = QUOTE_SCHEMA if ns.quotes else BOOK_LISTING_SCHEMA
+    with HybridFetcher(schema=schema, force_browser=ns.force_browser) as fetcher:
+        print_report(fetcher.fetch_many(ns.urls))
+
+
+if __name__ == "__main__":
+    main()
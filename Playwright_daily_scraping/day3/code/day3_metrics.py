@@ -0,0 +1,388 @@
+# day3_metrics.py
+# ------------------------------------------------------------
+# Goal: Measure where a daily run spends its time instead of guessing.
+#   • spans per URL and phase: goto, wait (wait_for_selector / expect),
+#     extract, write … → one histogram per phase
+#   • network timing per request + bytes received:
+#       - browser: instrument_page(page) → dns, connect, ttfb, download
+#         from Playwright's request timing
+#       - HTTP: record_http(resp) → connect (DNS included, new connections
+#         only), ttfb, download from HttpClient
+#   • counters: retries_total / failures_total per error class, fed by
+#     RetryScheduler(metrics=...) and day1 run(metrics=...); errors_total
+#     per phase; gauges (browser RSS via browser_rss_mb)
+#   • exports: Prometheus text, JSON Lines (one span per line),
+#     OTLP/JSON traces (OpenTelemetry collector / Jaeger import)
+#   • summary() prints a per-phase table at the end of a run
+#
+# Usage:
+#   metrics = Metrics()
+#   with metrics.trace(url):
+#       with metrics.span("goto"):
+#           page.goto(url)
+#       with metrics.span("extract"):
+#           rows = extract_rows(page, schema)
+#   print(metrics.summary()); metrics.write_prometheus("run.prom")
+#   python day3/code/day3_metrics.py --backend http --out-dir metrics/
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Seconds: 1 ms … 60 s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+# Bytes: 1 KB … 10 MB
+SIZE_BUCKETS: Tuple[float, ...] = tuple(float(1024 * 4**i) for i in range(8))
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (what Prometheus would estimate)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start: float  # unix seconds
+    end: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Metrics:
+    """Thread- and asyncio-safe registry (the current span lives in a contextvar)."""
+
+    def __init__(self, service: str = "playwright-daily-scraping", keep_spans: int = 100_000) -> None:
+        self.service = service
+        self.keep_spans = keep_spans
+        self.spans: List[Span] = []
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._counters: Dict[LabelKey, float] = {}
+        self._gauges: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    # -- recording -------------------------------------------------
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    @contextmanager
+    def trace(self, url: str, **attributes: Any) -> Iterator[Span]:
+        """Root span for one URL; phases inside become its children."""
+        with self._span("page", None, {"url": url, **attributes}) as span:
+            yield span
+
+    @contextmanager
+    def span(self, phase: str, **attributes: Any) -> Iterator[Span]:
+        """Time one phase; observed into phase_seconds{phase=...}."""
+        with self._span(phase, _current.get(), attributes) as span:
+            yield span
+
+    @contextmanager
+    def _span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Iterator[Span]:
+        span = Span(
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            name=name,
+            start=time.time(),
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        t0 = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = type(e).__name__
+            self.inc("errors_total", phase=name, error=type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            span.end = span.start + elapsed
+            _current.reset(token)
+            self.observe("phase_seconds", elapsed, phase=name)
+            with self._lock:
+                if len(self.spans) < self.keep_spans:
+                    self.spans.append(span)
+
+    # -- Playwright hooks ------------------------------------------
+
+    def record_request(self, request: Any) -> None:
+        """Network timing + size of a finished Playwright request (sync API)."""
+        kind = request.resource_type
+        timing = request.timing  # ms relative to startTime, -1 when not applicable
+        for phase, start, end in (
+            ("dns", "domainLookupStart", "domainLookupEnd"),
+            ("connect", "connectStart", "connectEnd"),
+            ("ttfb", "requestStart", "responseStart"),
+            ("download", "responseStart", "responseEnd"),
+        ):
+            a, b = timing.get(start, -1), timing.get(end, -1)
+            if a >= 0 and b >= a:
+                self.observe("network_seconds", (b - a) / 1000, phase=phase, resource_type=kind)
+        try:
+            sizes = request.sizes()
+            received = sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        except Exception:
+            return
+        self.inc("bytes_received_total", received, resource_type=kind)
+        self.observe("response_bytes", received, SIZE_BUCKETS, resource_type=kind)
+
+    def record_http(self, resp: Any, resource_type: str = "document") -> None:
+        """Network timing + size of an HttpClient response (day3_http_client.HttpResponse)."""
+        for phase, seconds in resp.timing.items():
+            self.observe("network_seconds", seconds, phase=phase, resource_type=resource_type)
+        self.inc("bytes_received_total", len(resp.body), resource_type=resource_type)
+        self.observe("response_bytes", len(resp.body), SIZE_BUCKETS, resource_type=resource_type)
+
+    def record_retry(self, error_class: str, gave_up: bool = False) -> None:
+        """One failed attempt: retried (retries_total) or final (failures_total)."""
+        self.inc("failures_total" if gave_up else "retries_total", error_class=error_class)
+
+    def instrument_page(self, page: Any) -> None:
+        page.on("requestfinished", self.record_request)
+        page.on("requestfailed", lambda request: self.inc("requests_failed_total", resource_type=request.resource_type))
+
+    def sample_browser(self, browser: Any) -> None:
+        from day3_browser_pool import browser_rss_mb
+
+        rss = browser_rss_mb(browser)
+        if rss is not None:
+            self.set_gauge("browser_rss_mb", rss)
+
+    # -- export ----------------------------------------------------
+
+    def to_prometheus(self) -> str:
+        def labels(pairs: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+            parts = [f'{k}="{v}"' for k, v in pairs] + ([extra] if extra else [])
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        lines: List[str] = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({n for n, _ in series}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    lines += [f"{name}{labels(l)} {v:g}" for (n, l), v in sorted(series.items()) if n == name]
+            for name in sorted({n for n, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (n, l), h in sorted(self._histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, c in zip(list(h.buckets) + [float("inf")], h.counts):
+                        cumulative += c
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        le_label = 'le="' + le + '"'
+                        lines.append(f"{name}_bucket{labels(l, le_label)} {cumulative}")
+                    lines.append(f"{name}_sum{labels(l)} {h.sum:g}")
+                    lines.append(f"{name}_count{labels(l)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+    def write_jsonl(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for s in self.spans:
+                f.write(json.dumps({**s.__dict__, "duration": s.duration}, default=str) + "\n")
+
+    def write_otlp_json(self, path: str) -> None:
+        """Spans as an OTLP/JSON ExportTraceServiceRequest."""
+
+        def attrs(d: Dict[str, Any]) -> List[Dict[str, Any]]:
+            out = []
+            for k, v in d.items():
+                if isinstance(v, bool):
+                    value = {"boolValue": v}
+                elif isinstance(v, int):
+                    value = {"intValue": str(v)}
+                elif isinstance(v, float):
+                    value = {"doubleValue": v}
+                else:
+                    value = {"stringValue": str(v)}
+                out.append({"key": k, "value": value})
+            return out
+
+        spans = [
+            {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(int(s.start * 1e9)),
+                "endTimeUnixNano": str(int(s.end * 1e9)),
+                "attributes": attrs(s.attributes),
+                "status": {"code": 2 if "error" in s.attributes else 1},
+            }
+            for s in self.spans
+        ]
+        doc = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": attrs({"service.name": self.service})},
+                    "scopeSpans": [{"scope": {"name": "day3_metrics"}, "spans": spans}],
+                }
+            ]
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f)
+
+    def summary(self) -> str:
+        """Per-phase table: count, p50/p95 (bucket bounds), max and share of the total time."""
+        with self._lock:
+            phases = {dict(l).get("phase", ""): h for (n, l), h in self._histograms.items() if n == "phase_seconds"}
+            network = {dict(l).get("phase", ""): h for (n, l), h in self._histograms.items() if n == "network_seconds"}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        work = sum(h.sum for p, h in phases.items() if p != "page") or 1.0
+        lines = [f"{'phase':<12}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'total s':>9}{'share':>7}"]
+        for phase, h in sorted(phases.items(), key=lambda kv: -kv[1].sum):
+            share = "" if phase == "page" else f"{h.sum / work:.0%}"
+            lines.append(
+                f"{phase:<12}{h.count:>7}{h.quantile(0.5) * 1000:>9.0f}{h.quantile(0.95) * 1000:>9.0f}"
+                f"{h.max * 1000:>9.0f}{h.sum:>9.2f}{share:>7}"
+            )
+        for phase, h in sorted(network.items(), key=lambda kv: -kv[1].sum):
+            lines.append(
+                f"{'net:' + phase:<12}{h.count:>7}{h.quantile(0.5) * 1000:>9.0f}{h.quantile(0.95) * 1000:>9.0f}"
+                f"{h.max * 1000:>9.0f}{h.sum:>9.2f}{'':>7}"
+            )
+        fmt = lambda l: "{" + ", ".join(f"{k}={v}" for k, v in l) + "}" if l else ""
+        for (name, l), v in sorted(counters.items()):
+            lines.append(f"{name}{fmt(l)}: {v:g}")
+        for (name, l), v in sorted(gauges.items()):
+            lines.append(f"{name}{fmt(l)}: {v:.1f}")
+        return "\n".join(lines)
+
+
+def main() -> None:
+    """Instrumented listing crawl on the fixture (browser or HTTP), then every export."""
+    from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows, extract_rows_html
+    from day3_fixture_site import FixtureSite
+    from day3_sinks import open_sink
+
+    parser = argparse.ArgumentParser(description="Per-phase timing and metrics export (Day 3)")
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--out-dir", default="metrics")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fixture 503 rate (HTTP backend: retried).")
+    ns = parser.parse_args()
+
+    os.makedirs(ns.out_dir, exist_ok=True)
+    metrics = Metrics()
+    site = FixtureSite(latency_ms=20, error_rate=ns.error_rate if ns.backend == "http" else 0.0)
+    with site, open_sink(os.path.join(ns.out_dir, "books.csv"), append=False) as sink:
+        urls = [site.listing_url(n) for n in range(1, min(ns.pages, site.page_count) + 1)]
+        if ns.backend == "http":
+            from day3_http_client import HttpClient
+            from day3_retry import HttpStatusError, RetryPolicy, RetryScheduler
+
+            def fetch(url: str) -> None:
+                with metrics.trace(url):
+                    with metrics.span("fetch"):
+                        resp = client.get(url)
+                    metrics.record_http(resp)
+                    if resp.status != 200:
+                        raise HttpStatusError(resp.status, url)
+                    with metrics.span("extract"):
+                        rows = extract_rows_html(resp.text, BOOK_LISTING_SCHEMA)
+                    with metrics.span("write"):
+                        sink.write_rows(rows)
+
+            with HttpClient() as client:
+                scheduler = RetryScheduler(RetryPolicy(base_delay_s=0.05), workers=1, seed=1, metrics=metrics)
+                scheduler.run(urls, fetch)
+        else:
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                browser = p.chromium.launch()
+                page = browser.new_page()
+                metrics.instrument_page(page)
+                for url in urls:
+                    with metrics.trace(url):
+                        with metrics.span("goto"):
+                            page.goto(url, wait_until="domcontentloaded")
+                        with metrics.span("wait"):
+                            page.wait_for_selector(BOOK_LISTING_SCHEMA.item_selector)
+                        with metrics.span("extract"):
+                            rows = extract_rows(page, BOOK_LISTING_SCHEMA)
+                        with metrics.span("write"):
+                            sink.write_rows(rows)
+                metrics.sample_browser(browser)
+                browser.close()
+
+    metrics.write_prometheus(os.path.join(ns.out_dir, "metrics.prom"))
+    metrics.write_jsonl(os.path.join(ns.out_dir, "spans.jsonl"))
+    metrics.write_otlp_json(os.path.join(ns.out_dir, "traces.otlp.json"))
+    print(metrics.summary())
+    print(f"\n[✓] Wrote metrics.prom, spans.jsonl, traces.otlp.json to {ns.out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+# day3_pagination.py
+# ------------------------------------------------------------
+# Goal: One pagination layer for the four ways sites split a list.
+# Day 2 only follows "Next" links (day2_pagination.crawl); a scroll
+# page there means scrolling the DOM one API call at a time.
+#   • NextLink     follow a "Next" href (books listing, quotes static)
+#   • UrlTemplate  page URLs are predictable ("catalogue/page-{n}.html"):
+#                  over plain HTTP they are fetched in parallel windows
+#   • InfiniteScroll / LoadMore  the list grows as you scroll / click;
+#                  the JSON calls the page makes while it loads are
+#                  watched, and if one carries a page/offset parameter
+#                  the rest of the list is fetched straight from that
+#                  API, in parallel, with no more scrolling or clicking
+#                  (falls back to driving the DOM when nothing is found)
+#   • over plain HTTP, the API can also be found in the page's own
+#     inline script (fetch('/api/quotes?page=' + page)) — no browser
+#   • every strategy returns rows + a PaginationResult (pages,
+#     requests, via dom/api/http, seconds)
+#
+# Usage:
+#   result = InfiniteScroll(QUOTE_SCHEMA, api_fields=QUOTE_FIELDS).crawl(page, url)
+#   result = UrlTemplate(BOOK_LISTING_SCHEMA, base + "catalogue/page-{n}.html").crawl_http(client)
+#   python day3/code/day3_pagination.py --quotes 1000 --latency-ms 100
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from playwright.sync_api import Page, Response, TimeoutError as PlaywrightTimeoutError
+
+from day3_api_capture import QUOTE_FIELDS, CapturedResponse, Extractor, json_list_extractor
+from day3_extraction import ExtractionSchema, QUOTE_SCHEMA, extract_rows, extract_rows_html
+from day3_http_client import HttpClient
+from day3_readiness import ReadinessEngine, ReadySpec
+from day3_retry import HttpStatusError, RetryPolicy
+
+Row = Dict[str, Any]
+
+PAGE_PARAMS = ("page", "p", "pg", "pagenum", "page_number")
+OFFSET_PARAMS = ("offset", "start", "skip", "from")
+HAS_NEXT_KEYS = ("has_next", "hasNext", "has_more", "hasMore")
+
+# '/api/quotes?page=' + page   or   `/api/items?offset=${offset}`
+SCRIPT_API_RE = re.compile(
+    r"""["'`]([^"'`\s]*\?(?:[^"'`\s]*&)?(?:%s)=)(?:["'`]\s*\+|\$\{|\d+["'`])""" % "|".join(PAGE_PARAMS + OFFSET_PARAMS)
+)
+
+
+@dataclass
+class PaginationResult:
+    mode: str
+    via: str  # "dom", "api" (found while loading, fetched directly) or "http"
+    rows: List[Row] = field(default_factory=list)
+    pages: int = 0
+    requests: int = 0
+    seconds: float = 0.0
+    api: Optional[str] = None  # the template used, e.g. ".../api/quotes?page={n}"
+
+    def summary(self) -> str:
+        rate = self.pages / self.seconds if self.seconds else 0.0
+        api = f" via {self.api}" if self.api else ""
+        return (
+            f"{self.mode:<28}{self.via:<5} {len(self.rows):>6} rows {self.pages:>5} pages "
+            f"{self.seconds:>7.2f}s ({rate:.0f} pages/s){api}"
+        )
+
+
+# -- paginated JSON APIs ---------------------------------------------
+
+
+@dataclass(frozen=True)
+class ApiTemplate:
+    """A JSON endpoint paged by one integer query parameter."""
+
+    url: str  # with the parameter set to "{n}"
+    param: str
+    kind: str = "page"  # "page" (1, 2, 3...) or "offset" (0, step, 2*step...)
+    first: int = 1
+    step: int = 1
+
+    def url_for(self, index: int) -> str:
+        """URL of the index-th page (0-based)."""
+        return self.url.replace("{n}", str(self.first + index * self.step))
+
+    @classmethod
+    def from_url(cls, url: str, page_size: int = 0) -> Optional["ApiTemplate"]:
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        for i, (name, value) in enumerate(query):
+            kind = "page" if name.lower() in PAGE_PARAMS else "offset" if name.lower() in OFFSET_PARAMS else None
+            if kind is None or not (value.isdigit() or value == ""):
+                continue
+            marked = query[:i] + [(name, "{n}")] + query[i + 1 :]
+            template = urlunsplit(parts._replace(query=urlencode(marked, safe="{}")))
+            if kind == "page":
+                return cls(template, name, "page", 1, 1)
+            return cls(template, name, "offset", 0, page_size or 10)
+        return None
+
+
+def find_item_list(payload: Any) -> Tuple[str, List[Any]]:
+    """Where the items are in a JSON page: ("", payload) for a bare list, else the longest list of objects."""
+    if isinstance(payload, list):
+        return "", payload
+    best: Tuple[str, List[Any]] = ("", [])
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if isinstance(value, list) and (not value or isinstance(value[0], dict)) and len(value) >= len(best[1]):
+                best = (key, value)
+            elif isinstance(value, dict):
+                path, items = find_item_list(value)
+                if len(items) > len(best[1]):
+                    best = (f"{key}.{path}" if path else key, items)
+    return best
+
+
+def has_next(payload: Any, items: Sequence[Any]) -> bool:
+    if isinstance(payload, dict):
+        for key in HAS_NEXT_KEYS:
+            if key in payload:
+                return bool(payload[key])
+        if "next" in payload:
+            return bool(payload["next"])
+    return bool(items)
+
+
+def api_in_script(html: str, base_url: str) -> Optional[ApiTemplate]:
+    """A paginated endpoint built in the page's inline script, e.g. fetch('/api/quotes?page=' + page)."""
+    m = SCRIPT_API_RE.search(html)
+    if not m:
+        return None
+    return ApiTemplate.from_url(urljoin(base_url, m.group(1)) + "1", page_size=0)
+
+
+class ApiPager:
+    """
+    Fetch every page of a paginated JSON API over plain HTTP.
+
+    Pages are requested in windows of `workers` at a time; the first page
+    that is empty, says has_next=false or answers 4xx (past page 0: many
+    APIs return 404/400 for a page past the end) ends the crawl — pages
+    past it in the same window are dropped.
+    """
+
+    def __init__(
+        self,
+        template: ApiTemplate,
+        extract: Optional[Extractor] = None,
+        client: Optional[HttpClient] = None,
+        workers: int = 8,
+        headers: Optional[Dict[str, str]] = None,
+        retry: Optional[RetryPolicy] = None,
+    ) -> None:
+        self.template = template
+        self.extract = extract
+        self.client = client
+        self.workers = max(1, workers)
+        self.headers = headers or {}
+        self.retry = retry or RetryPolicy(max_attempts=3, base_delay_s=0.2)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _get(self, http: HttpClient, index: int) -> Optional[CapturedResponse]:
+        """The page's response; None for a 4xx (not 429) after page 0: the end of the list."""
+        url = self.template.url_for(index)
+        attempt = 0
+        while True:
+            attempt += 1
+            with self._lock:
+                self.requests += 1
+            resp = http.get(url, headers=self.headers)
+            if 200 <= resp.status < 300:
+                return CapturedResponse(url, resp.status, resp.headers.get("content-type", ""), resp.body, source="replay")
+            error = HttpStatusError(resp.status, url)
+            delay = self.retry.next_delay(attempt, error)
+            if delay is None:
+                if index > 0 and 400 <= resp.status < 500 and resp.status != 429:
+                    return None
+                raise error
+            time.sleep(delay)
+
+    def _rows(self, captured: CapturedResponse) -> Tuple[List[Row], bool]:
+        payload = captured.json()
+        path, items = find_item_list(payload)
+        if self.extract is not None:
+            rows = self.extract(captured)
+        else:
+            rows = [item if isinstance(item, dict) else {"value": item} for item in items]
+        return rows, has_next(payload, items)
+
+    def fetch_all(
+        self, max_pages: int = 10_000, known: Optional[Dict[int, CapturedResponse]] = None
+    ) -> Tuple[List[Row], int]:
+        """Rows of every page in order + the number of pages; `known` = bodies already seen (by index)."""
+        known: Dict[int, Optional[CapturedResponse]] = dict(known or {})
+        http = self.client or HttpClient()
+        rows: List[Row] = []
+        index = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while index < max_pages:
+                    window = range(index, min(max_pages, index + self.workers))
+                    todo = [i for i in window if i not in known]
+                    for i, captured in zip(todo, executor.map(lambda i: self._get(http, i), todo)):
+                        known[i] = captured
+                    for i in window:
+                        if known[i] is None:  # 4xx: past the last page
+                            return rows, index
+                        page_rows, more = self._rows(known[i])
+                        rows.extend(page_rows)
+                        index = i + 1
+                        if not more or not page_rows:
+                            return rows, index
+        finally:
+            if self.client is None:
+                http.close()
+        return rows, index
+
+
+class ApiWatcher:
+    """JSON fetch/XHR responses of a page, kept while it loads (attach before goto)."""
+
+    def __init__(self, page: Page, url_glob: Optional[str] = None) -> None:
+        self.page = page
+        self.url_glob = url_glob
+        self.seen: List[Tuple[str, Dict[str, str], bytes]] = []
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response) -> None:
+        if response.request.resource_type not in ("fetch", "xhr"):
+            return
+        if "json" not in response.headers.get("content-type", "") or not 200 <= response.status < 300:
+            return
+        if self.url_glob and not fnmatch(response.url, self.url_glob):
+            return
+        try:
+            self.seen.append((response.url, dict(response.request.headers), response.body()))
+        except Exception:  # body evicted after navigation
+            pass
+
+    def detect(self) -> Optional[Tuple[ApiTemplate, Dict[int, CapturedResponse], Dict[str, str]]]:
+        """Template + the pages already downloaded (by index) + the request headers to reuse."""
+        for url, headers, body in self.seen:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                continue
+            _, items = find_item_list(payload)
+            template = ApiTemplate.from_url(url, page_size=len(items))
+            if template is None or not items:
+                continue
+            known: Dict[int, CapturedResponse] = {}
+            for other_url, _, other_body in self.seen:
+                for i in range(len(self.seen) + 1):
+                    if template.url_for(i) == other_url:
+                        known[i] = CapturedResponse(other_url, 200, "application/json", other_body, source="browser")
+            replay_headers = {
+                k: v for k, v in headers.items() if k.lower() not in ("host", "content-length", "connection", "accept-encoding")
+            }
+            return template, known, replay_headers
+        return None
+
+    def detach(self) -> None:
+        self.page.remove_listener("response", self._on_response)
+
+
+# -- strategies --------------------------------------------------------
+
+
+@dataclass
+class NextLink:
+    """Follow a "Next" link until there is none (day2_pagination.crawl, any schema)."""
+
+    schema: ExtractionSchema
+    next_selector: str = ".next a"
+    ready: Optional[ReadySpec] = None
+
+    def crawl(self, page: Page, url: str, max_pages: int = 10_000, readiness: Optional[ReadinessEngine] = None) -> PaginationResult:
+        readiness = readiness or ReadinessEngine()
+        ready = self.ready or ReadySpec(selector=self.schema.item_selector)
+        result = PaginationResult("next-link", "dom")
+        t0 = time.perf_counter()
+        while url and result.pages < max_pages:
+            readiness.goto(page, url, ready)
+            result.rows += extract_rows(page, self.schema)
+            result.pages += 1
+            result.requests += 1
+            link = page.locator(self.next_selector)
+            url = urljoin(page.url, link.first.get_attribute("href") or "") if link.count() else ""
+        result.seconds = time.perf_counter() - t0
+        return result
+
+    def crawl_http(self, url: str, client: Optional[HttpClient] = None, max_pages: int = 10_000) -> PaginationResult:
+        """Same over plain HTTP (server-rendered pages only; still one page at a time)."""
+        http = client or HttpClient()
+        result = PaginationResult("next-link", "http")
+        t0 = time.perf_counter()
+        try:
+            while url and result.pages < max_pages:
+                resp = http.get(url)
+                result.requests += 1
+                if resp.status != 200:
+                    raise HttpStatusError(resp.status, url)
+                result.rows += extract_rows_html(resp.text, self.schema)
+                result.pages += 1
+                m = re.search(r'<li class="next">\s*<a href="([^"]+)"', resp.text)
+                url = urljoin(url, m.group(1)) if m else ""
+        finally:
+            if client is None:
+                http.close()
+        result.seconds = time.perf_counter() - t0
+        return result
+
+
+@dataclass
+class UrlTemplate:
+    """Page URLs from a template with {n}; stops at the first 404 or empty page."""
+
+    schema: ExtractionSchema
+    template: str  # e.g. "http://books.toscrape.com/catalogue/page-{n}.html"
+    first: int = 1
+    first_url: Optional[str] = None  # page 1 often has its own URL ("/" instead of page-1.html)
+
+    def url_for(self, n: int) -> str:
+        return self.first_url if n == self.first and self.first_url else self.template.replace("{n}", str(n))
+
+    def crawl(self, page: Page, max_pages: int = 10_000, readiness: Optional[ReadinessEngine] = None) -> PaginationResult:
+        readiness = readiness or ReadinessEngine()
+        result = PaginationResult("url-template", "dom")
+        t0 = time.perf_counter()
+        n = self.first
+        while result.pages < max_pages:
+            response = page.goto(self.url_for(n), wait_until="domcontentloaded", timeout=readiness.timeout_ms(self.url_for(n)))
+            result.requests += 1
+            rows = extract_rows(page, self.schema) if response is not None and response.ok else []
+            if not rows:
+                break
+            result.rows += rows
+            result.pages += 1
+            n += 1
+        result.seconds = time.perf_counter() - t0
+        return result
+
+    def crawl_http(self, client: Optional[HttpClient] = None, workers: int = 8, max_pages: int = 10_000) -> PaginationResult:
+        """Fetch pages in parallel windows of `workers` until one is missing or empty."""
+        http = client or HttpClient()
+        result = PaginationResult("url-template", "http")
+        t0 = time.perf_counter()
+        n = self.first
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                while result.pages < max_pages:
+                    numbers = range(n, n + min(workers, max_pages - result.pages))
+                    responses = list(executor.map(lambda i: http.get(self.url_for(i)), numbers))
+                    result.requests += len(responses)
+                    for resp in responses:
+                        rows = extract_rows_html(resp.text, self.schema) if resp.status == 200 else []
+                        if not rows:
+                            result.seconds = time.perf_counter() - t0
+                            return result
+                        result.rows += rows
+                        result.pages += 1
+                    n += len(numbers)
+        finally:
+            if client is None:
+                http.close()
+        result.seconds = time.perf_counter() - t0
+        return result
+
+
+@dataclass
+class _GrowingList:
+    """Shared by InfiniteScroll and LoadMore: the list grows on an action until it stops."""
+
+    schema: ExtractionSchema
+    api_fields: Optional[Dict[str, str]] = None  # JSON item → row, e.g. QUOTE_FIELDS; None = items as-is
+    prefer_api: bool = True
+    api_glob: Optional[str] = None  # restrict API detection to these URLs
+    workers: int = 8
+    grow_timeout_ms: int = 5000  # no new items for this long → end of the list
+    mode = "growing"
+
+    def _advance(self, page: Page) -> bool:
+        raise NotImplementedError
+
+    def _count(self, page: Page) -> int:
+        return page.locator(self.schema.item_selector).count()
+
+    def _extractor(self, template: ApiTemplate, sample: Optional[CapturedResponse]) -> Optional[Extractor]:
+        if self.api_fields is None:
+            return None
+        path = find_item_list(sample.json())[0] if sample is not None else ""
+        return json_list_extractor(path, self.api_fields)
+
+    def crawl(self, page: Page, url: str, max_pages: int = 10_000, client: Optional[HttpClient] = None) -> PaginationResult:
+        t0 = time.perf_counter()
+        watcher = ApiWatcher(page, self.api_glob) if self.prefer_api else None
+        try:
+            page.goto(url, wait_until="domcontentloaded")
+            try:
+                page.locator(self.schema.item_selector).first.wait_for(state="attached", timeout=self.grow_timeout_ms)
+            except PlaywrightTimeoutError:
+                pass
+            found = watcher.detect() if watcher is not None else None
+        finally:
+            if watcher is not None:
+                watcher.detach()
+
+        if found is not None:
+            template, known, headers = found
+            pager = ApiPager(template, self._extractor(template, known.get(0)), client, self.workers, headers)
+            rows, pages = pager.fetch_all(max_pages, known)
+            result = PaginationResult(self.mode, "api", rows, pages, pager.requests + len(known), api=template.url)
+        else:
+            result = self._crawl_dom(page, max_pages)
+        result.seconds = time.perf_counter() - t0
+        return result
+
+    def _crawl_dom(self, page: Page, max_pages: int) -> PaginationResult:
+        result = PaginationResult(self.mode, "dom", pages=1)
+        count = self._count(page)
+        while result.pages < max_pages and self._advance(page):
+            try:
+                page.wait_for_function(
+                    "([sel, n]) => document.querySelectorAll(sel).length > n",
+                    arg=[self.schema.item_selector, count],
+                    timeout=self.grow_timeout_ms,
+                )
+            except PlaywrightTimeoutError:
+                break
+            count = self._count(page)
+            result.pages += 1
+        result.rows = extract_rows(page, self.schema)
+        result.requests = result.pages
+        return result
+
+    def crawl_http(self, url: str, client: Optional[HttpClient] = None, max_pages: int = 10_000) -> PaginationResult:
+        """No browser: find the API in the page's inline script and fetch it directly."""
+        http = client or HttpClient()
+        t0 = time.perf_counter()
+        try:
+            resp = http.get(url)
+            template = api_in_script(resp.text, url)
+            if template is None:
+                raise ValueError(f"No paginated API found in the scripts of {url}; use crawl() with a browser")
+            pager = ApiPager(template, None, http, self.workers)
+            first = pager._get(http, 0)  # tells where the item list is (and its size)
+            if template.kind == "offset":
+                pager.template = template = replace(template, step=max(1, len(find_item_list(first.json())[1])))
+            pager.extract = self._extractor(template, first)
+            rows, pages = pager.fetch_all(max_pages, {0: first})
+        finally:
+            if client is None:
+                http.close()
+        return PaginationResult(self.mode, "http", rows, pages, pager.requests + 1, time.perf_counter() - t0, template.url)
+
+
+@dataclass
+class InfiniteScroll(_GrowingList):
+    mode = "infinite-scroll"
+
+    def _advance(self, page: Page) -> bool:
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        return True
+
+
+@dataclass
+class LoadMore(_GrowingList):
+    button_selector: str = "button.load-more"
+    mode = "load-more"
+
+    def _advance(self, page: Page) -> bool:
+        button = page.locator(self.button_selector)
+        try:
+            button.first.wait_for(state="visible", timeout=self.grow_timeout_ms)
+            page.wait_for_function(
+                "sel => { const b = document.querySelector(sel); return !b || !b.disabled; }",
+                arg=self.button_selector,
+                timeout=self.grow_timeout_ms,
+            )
+            if not button.count():
+                return False
+            button.first.click()
+        except PlaywrightTimeoutError:
+            return False
+        return True
+
+
+def main() -> None:
+    from playwright.sync_api import sync_playwright
+
+    from day3_extraction import BOOK_LISTING_SCHEMA
+    from day3_fixture_site import FixtureSite
+
+    parser = argparse.ArgumentParser(description="Pagination strategies: DOM vs API/HTTP (Day 3)")
+    parser.add_argument("--quotes", type=int, default=1000, help="Quotes on the fixture (10 per API page).")
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--books", type=int, default=400)
+    ns = parser.parse_args()
+
+    results: List[PaginationResult] = []
+    with FixtureSite(n_books=ns.books, latency_ms=ns.latency_ms, n_quotes=ns.quotes) as site:
+        scroll_url, loadmore_url = f"{site.quotes_url}scroll", f"{site.quotes_url}loadmore"
+        listing = UrlTemplate(BOOK_LISTING_SCHEMA, f"{site.base_url}catalogue/page-{{n}}.html", first_url=site.base_url)
+        scroll = InfiniteScroll(QUOTE_SCHEMA, api_fields=QUOTE_FIELDS, workers=ns.workers)
+
+        print("[i] HTTP only ...")
+        results.append(NextLink(BOOK_LISTING_SCHEMA).crawl_http(site.base_url))
+        results.append(listing.crawl_http(workers=ns.workers))
+        sequential = InfiniteScroll(QUOTE_SCHEMA, api_fields=QUOTE_FIELDS, workers=1).crawl_http(scroll_url)
+        sequential.mode += " (1 worker)"  # one call at a time, like scrolling
+        results += [sequential, scroll.crawl_http(scroll_url)]
+        results.append(LoadMore(QUOTE_SCHEMA, api_fields=QUOTE_FIELDS, workers=ns.workers).crawl_http(loadmore_url))
+
+        with sync_playwright() as p:
+            try:
+                browser = p.chromium.launch()
+            except Exception as e:
+                print(f"[!] Chromium not available, browser modes skipped: {e}".splitlines()[0])
+                browser = None
+            if browser is not None:
+                print("[i] Browser ...")
+                for strategy, url in [
+                    (InfiniteScroll(QUOTE_SCHEMA, prefer_api=False), scroll_url),
+                    (scroll, scroll_url),
+                    (LoadMore(QUOTE_SCHEMA, prefer_api=False), loadmore_url),
+                    (LoadMore(QUOTE_SCHEMA, api_fields=QUOTE_FIELDS, workers=ns.workers), loadmore_url),
+                ]:
+                    page = browser.new_page()
+                    results.append(strategy.crawl(page, url))
+                    page.close()
+                page = browser.new_page()
+                results.append(NextLink(BOOK_LISTING_SCHEMA).crawl(page, site.base_url))
+                page.close()
+                browser.close()
+
+    print(f"\n[i] {ns.quotes} quotes, {ns.books} books, {ns.latency_ms} ms per request")
+    for result in results:
+        print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+# day3_rate_limit.py
+# ------------------------------------------------------------
+# Goal: Go as fast as each site allows — and no faster — instead of
+# sleeping 1.2–2.8 s after every page.
+#   • one token bucket per host, shared by every worker thread / context
+#     (waiters re-check after each wait, so a new rate applies at once)
+#   • AIMD: slow start (rate doubles every second) until the first sign of trouble,
+#     then each success adds +increase/rate (≈ +increase req/s per second);
+#     a 429/503 or slow responses cut the rate (×decrease), once per window
+#   • Retry-After is honoured: the host is paused, nobody sends until it ends
+#   • optional random spacing (spacing_jitter) when evenly spaced requests
+#     look too robotic — a fraction of the slot, not a fixed 2 s
+#   • every rate change is logged as a Decision; stats() per host
+#
+# Usage:
+#   limiter = AdaptiveRateLimiter(initial_rps=2, max_rps=50)
+#   resp = limited_get(client, limiter, url)            # HTTP path
+#   response = limited_goto(page, limiter, url)         # Playwright path
+#   python day3/code/day3_rate_limit.py --server-rps 40 --workers 16
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from day3_http_client import HttpClient, HttpResponse
+
+THROTTLE_STATUSES = {429, 503}
+SLOW_START_STEP = 0.7  # req/s added per success: at r req/s → ×2 per second
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class Decision:
+    at: float  # seconds since the limiter was created
+    host: str
+    reason: str
+    old_rps: float
+    new_rps: float
+
+
+@dataclass
+class HostState:
+    host: str
+    rps: float
+    tokens: float
+    refilled_at: float
+    paused_until: float = 0.0
+    last_decrease: float = float("-inf")
+    logged_rps: float = 0.0
+    requests: int = 0
+    throttled: int = 0
+    waited_s: float = 0.0
+    latency_ewma: Optional[float] = None
+    slow_start: bool = True
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        initial_rps: float = 2.0,
+        min_rps: float = 0.2,
+        max_rps: float = 50.0,
+        burst: float = 1.0,
+        increase_rps: float = 1.0,
+        decrease_factor: float = 0.7,
+        latency_target_s: Optional[float] = None,
+        spacing_jitter: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.initial_rps = initial_rps
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.burst = max(1.0, burst)
+        self.increase_rps = increase_rps
+        self.decrease_factor = decrease_factor
+        self.latency_target_s = latency_target_s  # EWMA latency above this → back off
+        self.spacing_jitter = spacing_jitter  # 0.5 → up to half a slot of random extra wait
+        self.decisions: Deque[Decision] = deque(maxlen=1000)
+        self._hosts: Dict[str, HostState] = {}
+        self._hosts_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._started = time.monotonic()
+
+    # -- pacing ----------------------------------------------------
+
+    def _try_take(self, url: str) -> float:
+        """Take a token if one is free (returns 0), else return how long to wait before asking again."""
+        st = self._host(url)
+        with st.lock:
+            now = time.monotonic()
+            if now > st.refilled_at:
+                st.tokens = min(self.burst, st.tokens + (now - st.refilled_at) * st.rps)
+                st.refilled_at = now
+            if st.tokens >= 1:
+                st.tokens -= 1
+                st.requests += 1
+                return 0.0
+            # Re-checked after the wait, so a rate change applies to callers already waiting.
+            return max(0.0, st.refilled_at - now) + (1 - st.tokens) / st.rps
+
+    def _spacing(self, url: str) -> float:
+        return self._rng.uniform(0, self.spacing_jitter / self._host(url).rps) if self.spacing_jitter else 0.0
+
+    def acquire(self, url: str) -> float:
+        """Block until this URL's host may be hit again; returns the time waited."""
+        waited = 0.0
+        while (wait := self._try_take(url)) > 0:
+            time.sleep(wait)
+            waited += wait
+        extra = self._spacing(url)
+        if extra:
+            time.sleep(extra)
+        st = self._host(url)
+        with st.lock:  # shared by every worker on this host
+            st.waited_s += waited + extra
+        return waited + extra
+
+    async def acquire_async(self, url: str) -> float:
+        waited = 0.0
+        while (wait := self._try_take(url)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        extra = self._spacing(url)
+        if extra:
+            await asyncio.sleep(extra)
+        st = self._host(url)
+        with st.lock:  # shared by every worker on this host
+            st.waited_s += waited + extra
+        return waited + extra
+
+    # -- feedback --------------------------------------------------
+
+    def feedback(
+        self,
+        url: str,
+        status: Optional[int] = None,
+        latency_s: Optional[float] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """Report how a request went; adjusts the host's rate."""
+        st = self._host(url)
+        pause = parse_retry_after(retry_after)
+        with st.lock:
+            now = time.monotonic()
+            if latency_s is not None:
+                st.latency_ewma = latency_s if st.latency_ewma is None else 0.8 * st.latency_ewma + 0.2 * latency_s
+            if status in THROTTLE_STATUSES or pause:
+                st.throttled += 1
+                if pause:
+                    self._pause(st, now + pause)
+                self._decrease(st, now, f"http {status}" + (f", retry-after {pause:.1f}s" if pause else ""))
+            elif self.latency_target_s and st.latency_ewma and st.latency_ewma > self.latency_target_s:
+                self._decrease(st, now, f"latency {st.latency_ewma * 1000:.0f} ms")
+            elif status is None or status < 400:
+                old = st.rps
+                step = SLOW_START_STEP if st.slow_start else self.increase_rps / st.rps
+                st.rps = min(self.max_rps, st.rps + step)
+                if st.rps >= st.logged_rps * 1.25 or (st.rps == self.max_rps and old < self.max_rps):
+                    self._log(st, now, "increase", st.logged_rps, st.rps)
+                    st.logged_rps = st.rps
+
+    def rate(self, url: str) -> float:
+        return self._host(url).rps
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            host: {
+                "rps": round(st.rps, 2),
+                "requests": st.requests,
+                "throttled": st.throttled,
+                "waited_s": round(st.waited_s, 2),
+                "latency_ms": round((st.latency_ewma or 0) * 1000, 1),
+            }
+            for host, st in self._hosts.items()
+        }
+
+    # -- internals -------------------------------------------------
+
+    def _host(self, url: str) -> HostState:
+        host = urlsplit(url).netloc
+        st = self._hosts.get(host)
+        if st is None:
+            with self._hosts_lock:
+                st = self._hosts.setdefault(
+                    host, HostState(host=host, rps=self.initial_rps, tokens=self.burst, refilled_at=time.monotonic(), logged_rps=self.initial_rps)
+                )
+        return st
+
+    def _pause(self, st: HostState, until: float) -> None:
+        if until > st.paused_until:
+            st.paused_until = until
+            st.tokens = min(st.tokens, 0.0)
+            st.refilled_at = max(st.refilled_at, until)
+
+    def _decrease(self, st: HostState, now: float, reason: str) -> None:
+        # Requests already in flight were sent at the old rate; one cut per window is enough.
+        if now - st.last_decrease < max(1.0, 1.0 / st.rps):
+            return
+        old = st.rps
+        st.rps = max(self.min_rps, st.rps * self.decrease_factor)
+        st.slow_start = False
+        st.last_decrease = now
+        st.logged_rps = st.rps
+        self._log(st, now, reason, old, st.rps)
+
+    def _log(self, st: HostState, now: float, reason: str, old: float, new: float) -> None:
+        self.decisions.append(Decision(now - self._started, st.host, reason, old, new))
+
+
+def limited_get(client: HttpClient, limiter: AdaptiveRateLimiter, url: str, **kwargs: Any) -> HttpResponse:
+    limiter.acquire(url)
+    t0 = time.monotonic()
+    resp = client.get(url, **kwargs)
+    limiter.feedback(url, resp.status, time.monotonic() - t0, resp.headers.get("retry-after"))
+    return resp
+
+
+def limited_goto(page: Any, limiter: AdaptiveRateLimiter, url: str, **kwargs: Any) -> Any:
+    """page.goto() through the limiter (sync Playwright Page)."""
+    limiter.acquire(url)
+    t0 = time.monotonic()
+    response = page.goto(url, **kwargs)
+    if response is not None:
+        limiter.feedback(url, response.status, time.monotonic() - t0, response.headers.get("retry-after"))
+    return response
+
+
+def main() -> None:
+    """Workers share one limiter against a fixture that throttles at --server-rps."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from day3_fixture_site import FixtureSite
+
+    parser = argparse.ArgumentParser(description="Adaptive per-host rate limiter demo (Day 3)")
+    parser.add_argument("--server-rps", type=float, default=40.0, help="Fixture answers 429 above this rate.")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra spacing, as a fraction of a slot.")
+    ns = parser.parse_args()
+
+    limiter = AdaptiveRateLimiter(initial_rps=2.0, max_rps=200.0, spacing_jitter=ns.jitter)
+    with FixtureSite(n_books=4000, latency_ms=10, max_rps=ns.server_rps) as site, HttpClient() as client:
+        urls = [site.listing_url(1 + i % site.page_count) for i in range(ns.requests)]
+
+        def fetch(url: str) -> int:
+            attempts = 0
+            while True:
+                attempts += 1
+                if limited_get(client, limiter, url).status == 200:
+                    return attempts
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=ns.workers) as executor:
+            attempts: List[int] = list(executor.map(fetch, urls))
+        elapsed = time.perf_counter() - t0
+        rejected = site.server.rejected
+
+    print(f"\n[i] Rate decisions ({len(limiter.decisions)}):")
+    for d in list(limiter.decisions)[-15:]:
+        print(f"   {d.at:6.2f}s  {d.reason:<28} {d.old_rps:6.1f} → {d.new_rps:6.1f} req/s")
+    print(f"\n[✓] {len(urls)} pages in {elapsed:.1f}s → {len(urls) / elapsed:.1f} pages/s (server limit {ns.server_rps:g}/s)")
+    print(f"   429 responses: {rejected} ({rejected / sum(attempts):.1%} of requests)")
+    print(f"   human_delay() pacing would take ≈ {len(urls) * 2.0 / ns.workers:.0f}s with {ns.workers} workers")
+    print(f"   per host: {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# day3_readiness.py
+# ------------------------------------------------------------
+# Goal: Wait for what the extraction needs, not for fixed timeouts.
+# Day 1/2 navigate with goto() (full "load" event: every image and
+# stylesheet) and then wait_for_selector(..., timeout=5000-10000):
+# fast pages wait for assets nobody reads, slow pages hit the timeout.
+#   • navigation can stop at "commit" or "domcontentloaded"
+#   • selector-count readiness: at least N matches (e.g. 20
+#     article.product_pod) and, for JS-rendered pages, a count that has
+#     stopped changing for stable_ms
+#   • network idle only for given URL globs (e.g. "*/api/*"), not for
+#     every tracker and image on the page
+#   • timeouts come from observed per-host latency (p95 × factor,
+#     clamped), so a slow host gets more time and a fast one fails fast;
+#     a timeout counts as a slow sample
+#   • an error response (503, 404, ...) is returned as soon as it arrives:
+#     its page will never show the selector, and it is not a latency sample
+#
+# Usage:
+#   ready = ReadinessEngine()
+#   response = ready.goto(page, url, LISTING_READY)
+#   response = ready.goto(page, url, selector="div.quote", wait_until="commit", stable_ms=50)
+#   response = await ready.goto_async(page, url, QUOTES_JS_READY)
+#   python day3/code/day3_readiness.py --pages 30 --latency-ms 20
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatch
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+# Counts matches of a selector; true once there are >= min and the
+# count has not changed for stable_ms (state kept per selector on window).
+STABLE_COUNT_JS = """([selector, minCount, stableMs]) => {
+    const n = document.querySelectorAll(selector).length;
+    const now = performance.now();
+    const all = window.__readiness || (window.__readiness = {});
+    const s = all[selector] || (all[selector] = {n: -1, since: now});
+    if (n !== s.n) { s.n = n; s.since = now; }
+    return n >= minCount && now - s.since >= stableMs;
+}"""
+
+
+@dataclass(frozen=True)
+class ReadySpec:
+    wait_until: str = "domcontentloaded"  # "commit" | "domcontentloaded" | "load" | "networkidle"
+    selector: Optional[str] = None
+    min_count: int = 1
+    stable_ms: int = 0  # >0: count must stop changing (JS-rendered lists)
+    idle_globs: Tuple[str, ...] = ()  # requests that must be finished...
+    idle_ms: int = 300  # ...for this long
+
+
+LISTING_READY = ReadySpec(selector="article.product_pod", min_count=20)
+QUOTES_JS_READY = ReadySpec(wait_until="commit", selector="div.quote", stable_ms=50)
+QUOTES_SCROLL_READY = ReadySpec(wait_until="commit", selector="div.quote", idle_globs=("*/api/quotes*",))
+
+
+class LatencyTracker:
+    """Per-host window of observed page-ready times → timeout for the next page."""
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 5,
+        factor: float = 3.0,
+        default_ms: int = 10000,
+        min_ms: int = 2000,
+        max_ms: int = 30000,
+    ) -> None:
+        self.window = window
+        self.min_samples = min_samples
+        self.factor = factor
+        self.default_ms = default_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.timeouts = 0
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def _host(self, url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def record(self, url: str, seconds: float) -> None:
+        self._samples.setdefault(self._host(url), deque(maxlen=self.window)).append(seconds)
+
+    def record_timeout(self, url: str, timeout_ms: int) -> None:
+        self.timeouts += 1
+        self.record(url, timeout_ms / 1000)
+
+    def percentile(self, url: str, q: float) -> Optional[float]:
+        samples = self._samples.get(self._host(url))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout_ms(self, url: str) -> int:
+        p95 = self.percentile(url, 0.95)
+        if p95 is None:
+            return self.default_ms
+        return int(min(self.max_ms, max(self.min_ms, p95 * 1000 * self.factor)))
+
+
+class NetworkIdleWatcher:
+    """In-flight requests whose URL matches one of the globs (attach before goto)."""
+
+    def __init__(self, page: Any, globs: Tuple[str, ...]) -> None:
+        self.page = page
+        self.globs = globs
+        self.inflight: Set[Any] = set()
+        self.last_change = time.monotonic()
+        page.on("request", self._started)
+        page.on("requestfinished", self._ended)
+        page.on("requestfailed", self._ended)
+
+    def _started(self, request: Any) -> None:
+        if any(fnmatch(request.url, g) for g in self.globs):
+            self.inflight.add(request)
+            self.last_change = time.monotonic()
+
+    def _ended(self, request: Any) -> None:
+        if request in self.inflight:
+            self.inflight.discard(request)
+            self.last_change = time.monotonic()
+
+    def idle_for_ms(self) -> float:
+        return 0.0 if self.inflight else 1000 * (time.monotonic() - self.last_change)
+
+    def detach(self) -> None:
+        self.page.remove_listener("request", self._started)
+        self.page.remove_listener("requestfinished", self._ended)
+        self.page.remove_listener("requestfailed", self._ended)
+
+
+@dataclass
+class ReadinessEngine:
+    tracker: LatencyTracker = field(default_factory=LatencyTracker)
+    poll_ms: int = 25
+
+    def timeout_ms(self, url: str) -> int:
+        return self.tracker.timeout_ms(url)
+
+    def record(self, url: str, seconds: float) -> None:
+        self.tracker.record(url, seconds)
+
+    def record_timeout(self, url: str, timeout_ms: int) -> None:
+        self.tracker.record_timeout(url, timeout_ms)
+
+    @staticmethod
+    def _spec(spec: Optional[ReadySpec], fields: Dict[str, Any]) -> ReadySpec:
+        return replace(spec or ReadySpec(), **fields)
+
+    # -- sync API ----------------------------------------------------
+
+    def goto(self, page: Any, url: str, spec: Optional[ReadySpec] = None, **fields: Any) -> Any:
+        """Navigate and wait until the spec is met (not for an error response); returns the main response."""
+        spec = self._spec(spec, fields)
+        timeout_ms = self.timeout_ms(url)
+        watcher = NetworkIdleWatcher(page, spec.idle_globs) if spec.idle_globs else None
+        t0 = time.monotonic()
+        deadline = t0 + timeout_ms / 1000
+        try:
+            response = page.goto(url, wait_until=spec.wait_until, timeout=timeout_ms)
+            if response is not None and not response.ok:
+                return response
+            if spec.selector:
+                self.wait_for_count(page, spec.selector, spec.min_count, spec.stable_ms, self._left_ms(deadline))
+            if watcher is not None:
+                self._wait_idle(page, watcher, spec.idle_ms, deadline)
+        except PlaywrightTimeoutError:
+            self.tracker.record_timeout(url, timeout_ms)
+            raise
+        finally:
+            if watcher is not None:
+                watcher.detach()
+        self.record(url, time.monotonic() - t0)
+        return response
+
+    def wait_for_count(
+        self, page: Any, selector: str, min_count: int = 1, stable_ms: int = 0, timeout_ms: Optional[int] = None
+    ) -> None:
+        """At least min_count matches, unchanged for stable_ms."""
+        if timeout_ms is None:
+            timeout_ms = self.timeout_ms(page.url)
+        if not stable_ms:
+            page.locator(selector).nth(min_count - 1).wait_for(state="attached", timeout=timeout_ms)
+            return
+        page.wait_for_function(STABLE_COUNT_JS, arg=[selector, min_count, stable_ms], timeout=timeout_ms)
+
+    def _wait_idle(self, page: Any, watcher: NetworkIdleWatcher, idle_ms: int, deadline: float) -> None:
+        while watcher.idle_for_ms() < idle_ms:
+            if time.monotonic() >= deadline:
+                raise PlaywrightTimeoutError(f"{len(watcher.inflight)} request(s) still in flight")
+            page.wait_for_timeout(self.poll_ms)  # lets Playwright deliver request events
+
+    # -- async API ---------------------------------------------------
+
+    async def goto_async(self, page: Any, url: str, spec: Optional[ReadySpec] = None, **fields: Any) -> Any:
+        """Same as goto() for playwright.async_api pages."""
+        spec = self._spec(spec, fields)
+        timeout_ms = self.timeout_ms(url)
+        watcher = NetworkIdleWatcher(page, spec.idle_globs) if spec.idle_globs else None
+        t0 = time.monotonic()
+        deadline = t0 + timeout_ms / 1000
+        try:
+            response = await page.goto(url, wait_until=spec.wait_until, timeout=timeout_ms)
+            if response is not None and not response.ok:
+                return response
+            if spec.selector:
+                left = self._left_ms(deadline)
+                if spec.stable_ms:
+                    await page.wait_for_function(
+                        STABLE_COUNT_JS, arg=[spec.selector, spec.min_count, spec.stable_ms], timeout=left
+                    )
+                else:
+                    await page.locator(spec.selector).nth(spec.min_count - 1).wait_for(state="attached", timeout=left)
+            if watcher is not None:
+                while watcher.idle_for_ms() < spec.idle_ms:
+                    if time.monotonic() >= deadline:
+                        raise PlaywrightTimeoutError(f"{len(watcher.inflight)} request(s) still in flight")
+                    await page.wait_for_timeout(self.poll_ms)
+        except PlaywrightTimeoutError:
+            self.tracker.record_timeout(url, timeout_ms)
+            raise
+        finally:
+            if watcher is not None:
+                watcher.detach()
+        self.record(url, time.monotonic() - t0)
+        return response
+
+    @staticmethod
+    def _left_ms(deadline: float) -> int:
+        return max(1, int(1000 * (deadline - time.monotonic())))
+
+
+def main() -> None:
+    from playwright.sync_api import sync_playwright
+
+    from day3_fixture_site import FixtureSite
+
+    parser = argparse.ArgumentParser(description="Fixed waits vs readiness engine (Day 3)")
+    parser.add_argument("--pages", type=int, default=30, help="Listing pages and JS quote pages per mode.")
+    parser.add_argument("--latency-ms", type=int, default=20)
+    ns = parser.parse_args()
+
+    with FixtureSite(latency_ms=ns.latency_ms) as site, sync_playwright() as p:
+        browser = p.chromium.launch()
+        jobs = [(site.listing_url(1 + i % site.page_count), LISTING_READY) for i in range(ns.pages)]
+        jobs += [(f"{site.quotes_url}js/page/{1 + i % site.quote_page_count}/", QUOTES_JS_READY) for i in range(ns.pages)]
+        engine = ReadinessEngine()
+        results = {}
+        for mode in ("fixed", "readiness"):
+            page = browser.new_page()
+            times, failures = [], 0
+            for url, spec in jobs:
+                t0 = time.perf_counter()
+                try:
+                    if mode == "fixed":  # Day 1/2 style
+                        page.goto(url, timeout=15000)
+                        page.wait_for_selector(spec.selector, timeout=10000)
+                    else:
+                        engine.goto(page, url, spec)
+                    times.append(time.perf_counter() - t0)
+                except PlaywrightTimeoutError:
+                    failures += 1
+            page.close()
+            results[mode] = (times, failures)
+        browser.close()
+
+    print(f"\n{'mode':<11}{'pages':>6}{'failed':>7}{'median ms':>11}{'p95 ms':>8}")
+    for mode, (times, failures) in results.items():
+        p95 = sorted(times)[int(0.95 * (len(times) - 1))] if times else 0.0
+        median = statistics.median(times) if times else 0.0
+        print(f"{mode:<11}{len(times):>6}{failures:>7}{1000 * median:>11.0f}{1000 * p95:>8.0f}")
+    print(f"[i] Derived timeout for {site.base_url}: {engine.timeout_ms(site.base_url)} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# day3_resource_blocking.py
+# ------------------------------------------------------------
+# Goal: Stop downloading what the scraper never reads.
+#   • context.route("**/*") decides per request: continue or abort
+#   • built-in profiles: "none", "no-media", "text-only"
+#   • custom allow/deny rules by resource type or URL glob
+#   • per-page counters: requests allowed/blocked (by type) and bytes received
+#
+# Decision order for a request:
+#   1. allow_globs match      → continue
+#   2. deny_globs match       → abort
+#   3. resource type blocked  → abort
+#   4. third-party + blocked  → abort
+#   5. otherwise              → continue (route.fallback, so other routes still run)
+#
+# Usage:
+#   flt = RequestFilter.from_profile("text-only", deny_globs=["*google-analytics*"])
+#   stats = flt.install(context)          # sync API
+#   stats = await flt.install_async(ctx)  # async API
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatch
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from playwright.sync_api import BrowserContext, Request, Response, Route
+from playwright.async_api import BrowserContext as AsyncBrowserContext, Route as AsyncRoute
+
+# Resource types as reported by request.resource_type
+MEDIA_TYPES: FrozenSet[str] = frozenset({"image", "media", "font"})
+TEXT_ONLY_TYPES: FrozenSet[str] = MEDIA_TYPES | {"stylesheet", "texttrack", "eventsource", "manifest", "other"}
+
+
+@dataclass
+class PageTraffic:
+    allowed: int = 0
+    blocked: int = 0
+    blocked_by_type: Counter = field(default_factory=Counter)
+    bytes_received: int = 0  # from Content-Length of allowed responses
+
+
+@dataclass
+class TrafficStats:
+    per_page: Dict[str, PageTraffic] = field(default_factory=dict)
+
+    def page(self, url: str) -> PageTraffic:
+        if url not in self.per_page:
+            self.per_page[url] = PageTraffic()
+        return self.per_page[url]
+
+    def totals(self) -> PageTraffic:
+        total = PageTraffic()
+        for t in self.per_page.values():
+            total.allowed += t.allowed
+            total.blocked += t.blocked
+            total.blocked_by_type.update(t.blocked_by_type)
+            total.bytes_received += t.bytes_received
+        return total
+
+
+@dataclass(frozen=True)
+class RequestFilter:
+    name: str = "custom"
+    block_types: FrozenSet[str] = frozenset()
+    allow_globs: Tuple[str, ...] = ()
+    deny_globs: Tuple[str, ...] = ()
+    block_third_party: bool = False
+
+    @classmethod
+    def from_profile(
+        cls,
+        profile: str,
+        allow_globs: Iterable[str] = (),
+        deny_globs: Iterable[str] = (),
+    ) -> "RequestFilter":
+        """A built-in profile, optionally extended with extra URL rules."""
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}; choose from {sorted(PROFILES)}")
+        base = PROFILES[profile]
+        return replace(
+            base,
+            allow_globs=base.allow_globs + tuple(allow_globs),
+            deny_globs=base.deny_globs + tuple(deny_globs),
+        )
+
+    def block_reason(self, url: str, resource_type: str, page_url: str, is_navigation: bool) -> Optional[str]:
+        """Why this request should be aborted, or None to let it through."""
+        if any(fnmatch(url, g) for g in self.allow_globs):
+            return None
+        if any(fnmatch(url, g) for g in self.deny_globs):
+            return "deny-glob"
+        if is_navigation:
+            return None
+        if resource_type in self.block_types:
+            return resource_type
+        if self.block_third_party and page_url.startswith("http"):
+            if urlparse(url).hostname != urlparse(page_url).hostname:
+                return "third-party"
+        return None
+
+    # -- wiring ----------------------------------------------------
+
+    def _decide(self, request: Request, stats: TrafficStats) -> Optional[str]:
+        try:
+            page_url = request.frame.page.url
+            is_navigation = request.is_navigation_request()
+        except Exception:  # service-worker requests have no frame
+            page_url, is_navigation = "", False
+        reason = self.block_reason(request.url, request.resource_type, page_url, is_navigation)
+        traffic = stats.page(request.url if is_navigation else page_url)
+        if reason is None:
+            traffic.allowed += 1
+        else:
+            traffic.blocked += 1
+            traffic.blocked_by_type[reason] += 1
+        return reason
+
+    @staticmethod
+    def _on_response(stats: TrafficStats, response: Response) -> None:
+        try:
+            page_url = response.frame.page.url
+        except Exception:
+            page_url = ""
+        size = response.headers.get("content-length")
+        if size and size.isdigit():
+            key = response.url if response.request.is_navigation_request() else page_url
+            stats.page(key).bytes_received += int(size)
+
+    def install(self, context: BrowserContext) -> TrafficStats:
+        """Route every request of a sync context through this filter."""
+        stats = TrafficStats()
+
+        def handler(route: Route) -> None:
+            if self._decide(route.request, stats) is None:
+                route.fallback()
+            else:
+                route.abort("blockedbyclient")
+
+        context.route("**/*", handler)
+        context.on("response", lambda r: self._on_response(stats, r))
+        return stats
+
+    async def install_async(self, context: AsyncBrowserContext) -> TrafficStats:
+        """Same as install() for playwright.async_api contexts."""
+        stats = TrafficStats()
+
+        async def handler(route: AsyncRoute) -> None:
+            if self._decide(route.request, stats) is None:  # type: ignore[arg-type]
+                await route.fallback()
+            else:
+                await route.abort("blockedbyclient")
+
+        await context.route("**/*", handler)
+        context.on("response", lambda r: self._on_response(stats, r))  # type: ignore[arg-type]
+        return stats
+
+
+PROFILES: Dict[str, RequestFilter] = {
+    "none": RequestFilter(name="none"),
+    "no-media": RequestFilter(name="no-media", block_types=MEDIA_TYPES),
+    "text-only": RequestFilter(name="text-only", block_types=TEXT_ONLY_TYPES, block_third_party=True),
+}
@@ -0,0 +1,343 @@
+# day3_retry.py
+# ------------------------------------------------------------
+# Goal: Retry individual URLs, not whole jobs, and never block the crawl
+# while one URL is backing off.
+#   • errors are classified: timeout, http_4xx, http_5xx, selector_missing,
+#     network, other → the policy decides per class whether to retry
+#   • exponential backoff with full jitter (delay = rand(0, base * 2^n), capped)
+#   • per-host circuit breaker: after K consecutive failures a host is
+#     paused for a cool-down, then a single probe decides whether it reopens
+#   • delay queue (heap ordered by ready time): workers keep taking URLs
+#     that are ready while others wait out their backoff
+#   • counters: retries per error class, backoff scheduled, time workers sat
+#     idle because nothing was ready, breaker trips
+#
+# Usage:
+#   scheduler = RetryScheduler(RetryPolicy(max_attempts=4), workers=8)
+#   results = scheduler.run(urls, fetch_one)     # fetch_one(url) raises on failure
+#   print(scheduler.stats.summary())
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import random
+import socket
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from playwright.sync_api import Error as PlaywrightError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+TIMEOUT = "timeout"
+HTTP_4XX = "http_4xx"
+HTTP_5XX = "http_5xx"
+SELECTOR_MISSING = "selector_missing"
+NETWORK = "network"
+OTHER = "other"
+ERROR_CLASSES = (TIMEOUT, HTTP_4XX, HTTP_5XX, SELECTOR_MISSING, NETWORK, OTHER)
+
+# Classes that say something about the host (count towards its circuit breaker).
+HOST_FAILURES = frozenset({TIMEOUT, HTTP_5XX, NETWORK})
+
+
+class HttpStatusError(Exception):
+    """Raise from a fetch function for a non-2xx response."""
+
+    def __init__(self, status: int, url: str = "") -> None:
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+
+
+class SelectorMissing(Exception):
+    """Raise when the page loaded but the expected elements are not there."""
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, HttpStatusError):
+        return HTTP_5XX if exc.status >= 500 else HTTP_4XX
+    if isinstance(exc, SelectorMissing):
+        return SELECTOR_MISSING
+    if isinstance(exc, PlaywrightTimeoutError):
+        # wait_for_selector / locator waits time out with "waiting for locator(...)"
+        message = str(exc)
+        return SELECTOR_MISSING if "waiting for locator" in message or "wait_for_selector" in message else TIMEOUT
+    if isinstance(exc, (TimeoutError, socket.timeout)):
+        return TIMEOUT
+    if isinstance(exc, PlaywrightError):
+        return NETWORK if "net::ERR_" in str(exc) else OTHER
+    if isinstance(exc, (ConnectionError, OSError)):
+        return NETWORK
+    return OTHER
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay_s: float = 0.5
+    max_delay_s: float = 30.0
+    retry_on: FrozenSet[str] = frozenset({TIMEOUT, HTTP_5XX, SELECTOR_MISSING, NETWORK})
+    retry_statuses: FrozenSet[int] = frozenset({408, 429})  # 4xx that are worth another try
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        if isinstance(exc, HttpStatusError) and exc.status in self.retry_statuses:
+            return True
+        return classify_error(exc) in self.retry_on
+
+    def delay_for(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """Full jitter: uniform between 0 and the capped exponential step."""
+        cap = min(self.max_delay_s, self.base_delay_s * (2 ** (attempt - 1)))
+        return (rng or random).uniform(0, cap)
+
+    def next_delay(self, attempt: int, exc: BaseException) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up."""
+        return self.delay_for(attempt) if self.should_retry(exc, attempt) else None
+
+
+class CircuitBreaker:
+    """closed → (K failures) → open for cooldown_s → half-open: one probe → closed | open."""
+
+    def __init__(self, failure_threshold: int = 5, cooldown_s: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def wait_time(self, now: float) -> float:
+        """0 if a request may go out now, else seconds until it is worth asking again."""
+        if self.state == "closed":
+            return 0.0
+        if self.state == "open":
+            remaining = self.opened_at + self.cooldown_s - now
+            if remaining > 0:
+                return remaining
+            self.state = "half_open"
+        if self._probing:
+            return min(1.0, self.cooldown_s / 2)
+        self._probing = True
+        return 0.0
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self, now: float) -> bool:
+        """Returns True when this failure trips the breaker."""
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            tripped = self.state != "open"
+            self.state = "open"
+            self.opened_at = now
+            return tripped
+        return False
+
+
+@dataclass
+class RetryStats:
+    attempts: int = 0
+    succeeded: int = 0
+    gave_up: int = 0
+    retries_by_class: Counter = field(default_factory=Counter)
+    failures_by_class: Counter = field(default_factory=Counter)
+    backoff_s: float = 0.0  # sum of scheduled delays (what fixed sleeps would have cost)
+    idle_s: float = 0.0  # time with no work in flight because everything was backing off
+    breaker_trips: int = 0
+    breaker_deferrals: int = 0
+
+    def summary(self) -> str:
+        retries = ", ".join(f"{k}={v}" for k, v in sorted(self.retries_by_class.items())) or "none"
+        return (
+            f"{self.succeeded} ok, {self.gave_up} gave up, {self.attempts} attempts | retries: {retries} | "
+            f"backoff scheduled {self.backoff_s:.1f}s, idle {self.idle_s:.1f}s | "
+            f"breaker trips {self.breaker_trips}, deferrals {self.breaker_deferrals}"
+        )
+
+
+@dataclass
+class Task:
+    url: str
+    index: int
+    attempt: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TaskResult:
+    url: str
+    ok: bool
+    value: Any = None
+    attempts: int = 0
+    error: Optional[str] = None
+    error_class: Optional[str] = None
+
+
+class RetryScheduler:
+    """
+    Runs fn(url) for many URLs on a thread pool. Failed URLs go back into a
+    delay queue instead of sleeping, so the workers stay busy with the rest.
+    All bookkeeping happens in the calling thread; only fn runs in workers.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        workers: int = 8,
+        breaker_threshold: int = 5,
+        breaker_cooldown_s: float = 30.0,
+        seed: Optional[int] = None,
+        metrics: Optional[Any] = None,
+    ) -> None:
+        self.policy = policy or RetryPolicy()
+        self.metrics = metrics  # day3_metrics.Metrics: retries_total / failures_total per error class
+        self.workers = workers
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats = RetryStats()
+        self._rng = random.Random(seed)
+        self._seq = itertools.count()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown_s)
+        return self.breakers[host]
+
+    def run(self, urls: Sequence[str], fn: Callable[[str], Any]) -> List[TaskResult]:
+        queue: List[Tuple[float, int, Task]] = []
+        now = time.monotonic()
+        for i, url in enumerate(urls):
+            heapq.heappush(queue, (now, next(self._seq), Task(url, i)))
+        results: List[Optional[TaskResult]] = [None] * len(urls)
+        in_flight: Dict[Future, Task] = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while queue or in_flight:
+                now = time.monotonic()
+                while queue and queue[0][0] <= now and len(in_flight) < self.workers:
+                    _, _, task = heapq.heappop(queue)
+                    hold = self.breaker(task.url).wait_time(now)
+                    if hold > 0:
+                        self.stats.breaker_deferrals += 1
+                        heapq.heappush(queue, (now + hold, next(self._seq), task))
+                        continue
+                    task.attempt += 1
+                    self.stats.attempts += 1
+                    in_flight[executor.submit(fn, task.url)] = task
+
+                timeout = max(0.0, queue[0][0] - now) if queue and len(in_flight) < self.workers else None
+                idle = not in_flight
+                t0 = time.monotonic()
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(timeout or 0.0)
+                    done = set()
+                if idle:
+                    self.stats.idle_s += time.monotonic() - t0
+
+                for future in done:
+                    task = in_flight.pop(future)
+                    self._finish(task, future, queue, results)
+
+        return [r for r in results if r is not None]
+
+    def _finish(self, task: Task, future: Future, queue: list, results: List[Optional[TaskResult]]) -> None:
+        now = time.monotonic()
+        breaker = self.breaker(task.url)
+        exc = future.exception()
+        if exc is None:
+            breaker.record_success()
+            self.stats.succeeded += 1
+            results[task.index] = TaskResult(task.url, True, future.result(), task.attempt)
+            return
+
+        error_class = classify_error(exc)
+        task.errors.append(f"{error_class}: {exc}")
+        self.stats.failures_by_class[error_class] += 1
+        if error_class in HOST_FAILURES:
+            if breaker.record_failure(now):
+                self.stats.breaker_trips += 1
+        elif breaker.state == "half_open":
+            breaker.record_success()  # the host answered; the page itself is the problem
+
+        if self.policy.should_retry(exc, task.attempt):
+            delay = self.policy.delay_for(task.attempt, self._rng)
+            self.stats.retries_by_class[error_class] += 1
+            self.stats.backoff_s += delay
+            if self.metrics is not None:
+                self.metrics.record_retry(error_class)
+            heapq.heappush(queue, (now + delay, next(self._seq), task))
+            return
+        self.stats.gave_up += 1
+        if self.metrics is not None:
+            self.metrics.record_retry(error_class, gave_up=True)
+        results[task.index] = TaskResult(task.url, False, None, task.attempt, str(exc), error_class)
+
+
+def main() -> None:
+    """Listing pages over HTTP with injected failures: retries happen per URL, the rest keeps flowing."""
+    from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows_html
+    from day3_fixture_site import FixtureSite
+    from day3_http_client import HttpClient
+
+    parser = argparse.ArgumentParser(description="Per-URL retry scheduler demo (Day 3)")
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="Share of attempts that fail on purpose.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--breaker-cooldown", type=float, default=1.0, help="Seconds a tripped host is paused.")
+    ns = parser.parse_args()
+
+    rng = random.Random(ns.seed)
+    with FixtureSite(latency_ms=20) as site, HttpClient() as client:
+        urls = [site.listing_url(n) for n in range(1, site.page_count + 1)]
+        urls.append(site.base_url + "catalogue/missing/index.html")  # a real 404: not retried
+
+        def fetch_one(url: str) -> int:
+            roll = rng.random()
+            if roll < ns.fail_rate / 2:
+                raise socket.timeout("injected timeout")
+            if roll < ns.fail_rate:
+                raise HttpStatusError(503, url)
+            resp = client.get(url)
+            if resp.status >= 400:
+                raise HttpStatusError(resp.status, url)
+            rows = extract_rows_html(resp.text, BOOK_LISTING_SCHEMA)
+            if not rows:
+                raise SelectorMissing(f"no {BOOK_LISTING_SCHEMA.item_selector} on {url}")
+            return len(rows)
+
+        scheduler = RetryScheduler(
+            RetryPolicy(max_attempts=ns.max_attempts, base_delay_s=0.2, max_delay_s=2.0),
+            workers=ns.workers,
+            breaker_cooldown_s=ns.breaker_cooldown,
+            seed=ns.seed,
+        )
+        t0 = time.perf_counter()
+        results = scheduler.run(urls, fetch_one)
+        elapsed = time.perf_counter() - t0
+
+    rows = sum(r.value for r in results if r.ok)
+    print(f"[✓] {len(urls)} URLs, {rows} rows in {elapsed:.2f}s")
+    for r in results:
+        if not r.ok:
+            print(f"[!] {r.url} ({r.error_class}, {r.attempts} attempt(s)): {r.error}")
+    print(f"[i] {scheduler.stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+# day3_session.py
+# ------------------------------------------------------------
+# Goal: Keep a long crawl at a flat memory footprint.
+# One Page (day1 run() across retries) or one context (day2 crawl)
+# navigated thousands of times keeps growing: JS heap, detached DOM
+# nodes, HTTP/back-forward caches, storage the scrape never reads.
+#   • memory is sampled every N navigations: JS heap, DOM nodes,
+#     documents and listeners of the page (CDP Performance.getMetrics)
+#     and RSS of the browser / renderer / GPU processes (CDP
+#     SystemInfo.getProcessInfo + psutil)
+#   • the page is replaced after K navigations or when its heap passes
+#     a threshold; the context after M navigations or when browser RSS
+#     passes one (cookies carried over, everything else dropped)
+#   • rotation happens between URLs: run() keeps its position in the
+#     queue, checkpoint() reopens the current URL on the new page, and a
+#     crashed page is replaced and the same URL tried again
+#   • every few navigations the HTTP cache and the storage the scrape
+#     does not need (Cache Storage, IndexedDB, service workers...) are
+#     cleared through CDP
+#   • the samples form a memory-over-time profile (CSV) with a growth
+#     rate per 1000 navigations, so a leak shows up as a slope
+#
+# Usage:
+#   with ManagedSession(browser, SessionPolicy(page_max_navigations=200)) as session:
+#       for url, rows in session.run(urls, lambda page, url: extract_rows(page, SCHEMA)): ...
+#       crawl(session.page, max_pages=5000, session=session)   # day2_pagination.py
+#   python day3/code/day3_session.py --navigations 2000 --profile memory.csv
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import csv
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from playwright.sync_api import Browser, BrowserContext, Error as PlaywrightError, Page
+
+from day3_browser_pool import browser_process_rss_mb
+
+# Storage a scraper almost never reads back; clears keep cookies and localStorage.
+CLEAR_STORAGE_TYPES = "cache_storage,indexeddb,service_workers,websql,shader_cache,file_systems"
+CRASH_MARKERS = ("crash", "Target closed", "has been closed")
+
+
+@dataclass(frozen=True)
+class SessionPolicy:
+    page_max_navigations: int = 200  # 0 = never rotate the page by count
+    context_max_navigations: int = 2000  # 0 = never rotate the context by count
+    max_heap_mb: Optional[float] = 150.0  # page JS heap → rotate the page
+    max_rss_mb: Optional[float] = None  # browser + renderers → rotate the context
+    sample_every: int = 25  # navigations between memory samples
+    clear_every: int = 50  # navigations between cache/storage clears (0 = never)
+    clear_storage_types: str = CLEAR_STORAGE_TYPES
+    keep_cookies: bool = True  # carried over to the new context
+    gc_before_sample: bool = False  # force a JS GC so samples show retained memory only
+
+
+@dataclass
+class MemorySample:
+    seconds: float
+    navigations: int
+    page_navigations: int
+    heap_mb: Optional[float]
+    dom_nodes: Optional[int]
+    documents: Optional[int]
+    listeners: Optional[int]
+    browser_mb: Optional[float]
+    renderer_mb: Optional[float]
+    total_mb: Optional[float]
+    event: str = ""  # "page" / "context" rotation, "crash" right before this sample
+
+
+@dataclass
+class SessionStats:
+    navigations: int = 0
+    page_rotations: int = 0
+    context_rotations: int = 0
+    crashes: int = 0
+    clears: int = 0
+    rotation_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.navigations} navigations, {self.page_rotations} page / {self.context_rotations} context "
+            f"rotation(s) ({self.rotation_seconds:.1f}s), {self.clears} clear(s), {self.crashes} crash(es)"
+        )
+
+
+def growth_mb_per_1k(samples: List[MemorySample], attr: str = "total_mb") -> Optional[float]:
+    """Least-squares slope of a memory series, in MB per 1000 navigations."""
+    points = [(s.navigations, getattr(s, attr)) for s in samples if getattr(s, attr) is not None]
+    if len(points) < 3:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return None
+    return 1000 * sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+class ManagedSession:
+    """
+    A page/context that rotates and cleans itself up during a long crawl.
+
+    Give it a browser (contexts are created with `context_kwargs`) or a
+    BrowserPool (contexts are acquired from / released to the pool).
+    """
+
+    def __init__(
+        self,
+        browser: Optional[Browser] = None,
+        policy: Optional[SessionPolicy] = None,
+        pool: Optional[Any] = None,
+        **context_kwargs: Any,
+    ) -> None:
+        if browser is None and pool is None:
+            raise ValueError("ManagedSession needs a browser or a pool")
+        self.browser = browser
+        self.pool = pool
+        self.policy = policy or SessionPolicy()
+        self.context_kwargs = context_kwargs
+        self.stats = SessionStats()
+        self.samples: List[MemorySample] = []
+        self._context: Optional[BrowserContext] = None
+        self._page: Optional[Page] = None
+        self._cdp: Any = None
+        self._page_navs = 0
+        self._context_navs = 0
+        self._pending_event = ""
+        self._t0 = time.monotonic()
+
+    # -- page / context lifecycle -------------------------------------
+
+    @property
+    def page(self) -> Page:
+        if self._page is None:
+            self._open_page()
+        return self._page
+
+    def _open_context(self, storage_state: Optional[Dict[str, Any]] = None) -> None:
+        kwargs = dict(self.context_kwargs)
+        if storage_state is not None:
+            kwargs["storage_state"] = storage_state
+        if self.pool is not None:
+            self._context = self.pool.acquire(**kwargs)
+        else:
+            self._context = self.browser.new_context(**kwargs)
+        self._context_navs = 0
+
+    def _open_page(self) -> None:
+        if self._context is None:
+            self._open_context()
+        self._page = self._context.new_page()
+        self._cdp = self._context.new_cdp_session(self._page)
+        self._cdp.send("Performance.enable")
+        self._page_navs = 0
+
+    def _close_page(self) -> None:
+        page, self._page, self._cdp = self._page, None, None
+        if page is not None:
+            try:
+                page.close()
+            except PlaywrightError:
+                pass  # already gone (crash)
+
+    def _close_context(self) -> Optional[Dict[str, Any]]:
+        """Close the context; returns the cookies to carry over (if the policy keeps them)."""
+        self._close_page()
+        context, self._context = self._context, None
+        if context is None:
+            return None
+        state = None
+        if self.policy.keep_cookies:
+            try:
+                state = {"cookies": context.storage_state()["cookies"], "origins": []}
+            except PlaywrightError:
+                state = None
+        if self.pool is not None:
+            self.pool.release(context)
+        else:
+            try:
+                context.close()
+            except PlaywrightError:
+                pass
+        return state
+
+    def rotate_page(self, resume_url: Optional[str] = None) -> Page:
+        t0 = time.perf_counter()
+        self._close_page()
+        self._open_page()
+        self.stats.page_rotations += 1
+        self._pending_event = self._pending_event or "page"
+        if resume_url:
+            self._page.goto(resume_url, wait_until="domcontentloaded")
+        self.stats.rotation_seconds += time.perf_counter() - t0
+        return self._page
+
+    def rotate_context(self, resume_url: Optional[str] = None) -> Page:
+        t0 = time.perf_counter()
+        self._open_context(self._close_context())
+        self._open_page()
+        self.stats.context_rotations += 1
+        self._pending_event = "context"
+        if resume_url:
+            self._page.goto(resume_url, wait_until="domcontentloaded")
+        self.stats.rotation_seconds += time.perf_counter() - t0
+        return self._page
+
+    def close(self) -> None:
+        self._close_context()
+
+    def __enter__(self) -> "ManagedSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- hygiene ------------------------------------------------------
+
+    def clear(self) -> None:
+        """Drop the HTTP cache and unneeded storage of the current origin."""
+        if self._cdp is None:
+            return
+        try:
+            self._cdp.send("Network.clearBrowserCache")
+            origin = self._origin(self._page.url)
+            if origin and self.policy.clear_storage_types:
+                self._cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": self.policy.clear_storage_types})
+            self.stats.clears += 1
+        except PlaywrightError as e:
+            print(f"[!] Clearing caches failed: {e}".splitlines()[0])
+
+    @staticmethod
+    def _origin(url: str) -> Optional[str]:
+        scheme, _, rest = url.partition("://")
+        return f"{scheme}://{rest.split('/', 1)[0]}" if rest and scheme in ("http", "https") else None
+
+    def sample(self) -> MemorySample:
+        heap_mb = dom_nodes = documents = listeners = None
+        if self._cdp is not None:
+            try:
+                if self.policy.gc_before_sample:
+                    self._cdp.send("HeapProfiler.collectGarbage")
+                metrics = {m["name"]: m["value"] for m in self._cdp.send("Performance.getMetrics")["metrics"]}
+                heap_mb = metrics.get("JSHeapUsedSize", 0) / (1024 * 1024)
+                dom_nodes = int(metrics.get("Nodes", 0))
+                documents = int(metrics.get("Documents", 0))
+                listeners = int(metrics.get("JSEventListeners", 0))
+            except PlaywrightError:
+                pass
+        browser = self.browser or (self._context.browser if self._context is not None else None)
+        by_type = browser_process_rss_mb(browser) if browser is not None else None
+        sample = MemorySample(
+            seconds=round(time.monotonic() - self._t0, 2),
+            navigations=self.stats.navigations,
+            page_navigations=self._page_navs,
+            heap_mb=round(heap_mb, 2) if heap_mb is not None else None,
+            dom_nodes=dom_nodes,
+            documents=documents,
+            listeners=listeners,
+            browser_mb=round(by_type.get("browser", 0.0), 1) if by_type else None,
+            renderer_mb=round(by_type.get("renderer", 0.0), 1) if by_type else None,
+            total_mb=round(sum(by_type.values()), 1) if by_type else None,
+            event=self._pending_event,
+        )
+        self._pending_event = ""
+        self.samples.append(sample)
+        return sample
+
+    # -- crawl hooks ----------------------------------------------------
+
+    def checkpoint(self, page: Optional[Page] = None, resume: bool = True) -> Page:
+        """
+        Call after every navigation. Counts it, samples/clears on schedule and
+        rotates when the policy says so; returns the page to keep using (a new
+        one is reopened at the current URL when `resume`).
+        """
+        page = page or self.page
+        self.stats.navigations += 1
+        self._page_navs += 1
+        self._context_navs += 1
+        policy = self.policy
+        if policy.clear_every and self.stats.navigations % policy.clear_every == 0:
+            self.clear()
+        sample = self.sample() if policy.sample_every and self.stats.navigations % policy.sample_every == 0 else None
+        url = page.url if resume else None
+
+        over_rss = sample is not None and policy.max_rss_mb is not None and (sample.total_mb or 0) > policy.max_rss_mb
+        if over_rss or (policy.context_max_navigations and self._context_navs >= policy.context_max_navigations):
+            if over_rss:
+                print(f"[i] Browser RSS {sample.total_mb:.0f} MB > {policy.max_rss_mb:.0f} MB: new context.")
+            return self.rotate_context(url)
+        over_heap = sample is not None and policy.max_heap_mb is not None and (sample.heap_mb or 0) > policy.max_heap_mb
+        if over_heap or (policy.page_max_navigations and self._page_navs >= policy.page_max_navigations):
+            return self.rotate_page(url)
+        return page
+
+    def run(self, urls: Iterable[str], handler: Callable[[Page, str], Any], retries_after_crash: int = 1) -> Iterator[Tuple[str, Any]]:
+        """goto + handler(page, url) per URL, in order; rotation and crash recovery never skip one."""
+        for url in urls:
+            for attempt in range(retries_after_crash + 1):
+                page = self.page
+                try:
+                    page.goto(url, wait_until="domcontentloaded")
+                    result = handler(page, url)
+                except PlaywrightError as e:
+                    if attempt < retries_after_crash and any(m in str(e) for m in CRASH_MARKERS):
+                        print(f"[!] Page crashed on {url}: new context, same URL.")
+                        self.stats.crashes += 1
+                        self._pending_event = "crash"
+                        self.rotate_context()
+                        continue
+                    raise
+                self.checkpoint(page, resume=False)
+                yield url, result
+                break
+
+    # -- profile --------------------------------------------------------
+
+    def write_profile(self, path: str) -> None:
+        if not self.samples:
+            return
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(asdict(self.samples[0])))
+            writer.writeheader()
+            writer.writerows(asdict(s) for s in self.samples)
+
+    def profile_summary(self, tail: float = 0.5) -> Dict[str, Optional[float]]:
+        """First/last/peak RSS and growth rates; growth over the last `tail` share of samples (after warm-up)."""
+        totals = [s.total_mb for s in self.samples if s.total_mb is not None]
+        recent = self.samples[int(len(self.samples) * (1 - tail)) :]
+        return {
+            "samples": len(self.samples),
+            "rss_first_mb": totals[0] if totals else None,
+            "rss_last_mb": totals[-1] if totals else None,
+            "rss_peak_mb": max(totals) if totals else None,
+            "rss_growth_mb_per_1k": growth_mb_per_1k(recent, "total_mb"),
+            "heap_growth_mb_per_1k": growth_mb_per_1k(recent, "heap_mb"),
+        }
+
+
+def main() -> None:
+    from playwright.sync_api import sync_playwright
+
+    from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows
+    from day3_fixture_site import FixtureSite
+
+    parser = argparse.ArgumentParser(description="Memory over a long crawl: one page vs managed session (Day 3)")
+    parser.add_argument("--navigations", type=int, default=2000)
+    parser.add_argument("--page-max", type=int, default=200, help="Navigations per page.")
+    parser.add_argument("--context-max", type=int, default=1000, help="Navigations per context.")
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--profile", default=None, help="CSV prefix for the memory profiles (<prefix>_<mode>.csv).")
+    ns = parser.parse_args()
+
+    unmanaged = SessionPolicy(
+        page_max_navigations=0, context_max_navigations=0, max_heap_mb=None, sample_every=ns.sample_every, clear_every=0
+    )
+    managed = SessionPolicy(
+        page_max_navigations=ns.page_max, context_max_navigations=ns.context_max, sample_every=ns.sample_every
+    )
+    results = {}
+    with FixtureSite() as site, sync_playwright() as p:
+        try:
+            browser = p.chromium.launch()
+        except PlaywrightError as e:
+            print(f"[!] Chromium not available: {e}".splitlines()[0])
+            return
+        urls = [site.listing_url(1 + n % site.page_count) for n in range(ns.navigations)]
+        for mode, policy in (("one page", unmanaged), ("managed", managed)):
+            t0 = time.perf_counter()
+            with ManagedSession(browser, policy) as session:
+                rows = sum(len(r) for _, r in session.run(urls, lambda page, url: extract_rows(page, BOOK_LISTING_SCHEMA)))
+                results[mode] = (rows, time.perf_counter() - t0, session.stats.summary(), session.profile_summary())
+                if ns.profile:
+                    session.write_profile(f"{ns.profile}_{mode.replace(' ', '_')}.csv")
+        browser.close()
+
+    for mode, (rows, seconds, stats, profile) in results.items():
+        print(f"\n[i] {mode}: {rows} rows in {seconds:.1f}s — {stats}")
+        for key, value in profile.items():
+            print(f"   {key:<24} {value:.1f}" if isinstance(value, float) else f"   {key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+# day3_sharded_crawl.py
+# ------------------------------------------------------------
+# Goal: Use every core (and more than one machine) for one crawl.
+# A single Python process is bound by its own event loop and its pipe
+# to the Playwright driver, so we run several processes, each with its
+# own browser pool.
+#   • URLs are split by consistent hashing (normalized URL → hash ring with
+#     virtual nodes): the same URL always lands in the same shard, and
+#     changing the shard count moves only ~1/N of the URLs
+#   • a tiny coordinator (one SQLite file) hands out shards as leases:
+#       - one machine: --processes N spawns N workers
+#       - several machines: point every node at the same coordinator file
+#         (shared disk) and run the same command; expired leases are re-run
+#       - a heartbeat thread keeps extending the lease while a shard runs;
+#         a worker that loses its lease stops, and only the owner can
+#         complete or release a shard
+#   • a bad URL (non-200, goto error) is logged and counted, the rest of
+#     the shard carries on
+#   • every shard writes its own JSONL file (to a temporary name, renamed
+#     when done); merge_outputs() combines them into one dataset,
+#     de-duplicated by URL
+#
+# Usage:
+#   python day3/code/day3_sharded_crawl.py --fixture --processes 4 --out shards/
+#   # several nodes:
+#   python day3/code/day3_sharded_crawl.py --coordinator /shared/crawl.sqlite --init --urls-file urls.txt --shards 32
+#   python day3/code/day3_sharded_crawl.py --coordinator /shared/crawl.sqlite --processes 4 --out /shared/shards   (each node)
+#   python day3/code/day3_sharded_crawl.py --merge /shared/shards --out books_all.jsonl
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from day3_extraction import BOOK_DETAIL_SCHEMA, BOOK_LISTING_SCHEMA, ExtractionSchema, extract_rows, extract_rows_html
+from day3_frontier import normalize_url
+from day3_sinks import JsonlSink
+
+COORDINATOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, shard INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_urls_shard ON urls (shard);
+CREATE TABLE IF NOT EXISTS shards (
+    shard        INTEGER PRIMARY KEY,
+    state        TEXT NOT NULL DEFAULT 'pending',
+    owner        TEXT,
+    leased_until REAL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    rows         INTEGER,
+    elapsed_s    REAL,
+    failed_urls  INTEGER
+);
+"""
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """Everything a node needs to agree on: number of shards and ring layout."""
+
+    shards: int
+    vnodes: int = 64
+
+    def ring(self) -> "HashRing":
+        return HashRing(self.shards, self.vnodes)
+
+
+class HashRing:
+    def __init__(self, shards: int, vnodes: int = 64) -> None:
+        points = sorted((_hash(f"shard-{s}#{v}"), s) for s in range(shards) for v in range(vnodes))
+        self._keys = [h for h, _ in points]
+        self._shards = [s for _, s in points]
+
+    def shard_for(self, url: str) -> int:
+        i = bisect.bisect(self._keys, _hash(normalize_url(url))) % len(self._keys)
+        return self._shards[i]
+
+
+def split_urls(urls: Iterable[str], spec: ShardSpec) -> Dict[int, List[str]]:
+    ring = spec.ring()
+    out: Dict[int, List[str]] = {s: [] for s in range(spec.shards)}
+    for url in urls:
+        out[ring.shard_for(url)].append(url)
+    return out
+
+
+def schema_for(url: str) -> Tuple[str, ExtractionSchema]:
+    """books.toscrape.com layout: "/" and "/catalogue/page-N.html" are listings, the rest detail pages."""
+    path = urlsplit(url).path
+    if path in ("", "/", "/index.html") or path.startswith("/catalogue/page-"):
+        return "listing", BOOK_LISTING_SCHEMA
+    return "detail", BOOK_DETAIL_SCHEMA
+
+
+def row_key(row: Dict[str, Any], position: int = 0) -> str:
+    """Identity of a row in the merged dataset: its page URL + its position on that page."""
+    return f"{normalize_url(row.get('url') or '')}#{position}"
+
+
+class LeaseLost(Exception):
+    """Another worker took over the shard (our lease expired)."""
+
+
+# -- coordinator ------------------------------------------------------
+
+
+class ShardCoordinator:
+    """Shard leases in one SQLite file (works across processes, and across nodes on a shared disk)."""
+
+    def __init__(self, path: str, lease_seconds: float = 600.0) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._db = sqlite3.connect(path, isolation_level=None, timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(COORDINATOR_SCHEMA)
+        try:  # coordinator files created before failed_urls existed
+            self._db.execute("ALTER TABLE shards ADD COLUMN failed_urls INTEGER")
+        except sqlite3.OperationalError:
+            pass
+
+    def init(self, urls: Iterable[str], spec: ShardSpec) -> Dict[int, int]:
+        """Store the spec and the URL → shard assignment. Re-running with the same spec adds new URLs only."""
+        existing = self.spec()
+        if existing is not None and existing != spec:
+            raise ValueError(f"{self.path} was initialised with {existing}, not {spec}")
+        ring = spec.ring()
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('spec', ?)", (json.dumps(asdict(spec)),))
+        self._db.executemany("INSERT OR IGNORE INTO urls VALUES (?, ?)", ((u, ring.shard_for(u)) for u in urls))
+        self._db.executemany("INSERT OR IGNORE INTO shards (shard) VALUES (?)", ((s,) for s in range(spec.shards)))
+        self._db.execute("COMMIT")
+        return dict(self._db.execute("SELECT shard, COUNT(*) FROM urls GROUP BY shard"))
+
+    def spec(self) -> Optional[ShardSpec]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'spec'").fetchone()
+        return ShardSpec(**json.loads(row[0])) if row else None
+
+    def lease(self, owner: str) -> Optional[int]:
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT shard FROM shards WHERE state = 'pending' OR (state = 'leased' AND leased_until < ?) "
+                "ORDER BY attempts, shard LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE shards SET state = 'leased', owner = ?, leased_until = ?, attempts = attempts + 1 "
+                    "WHERE shard = ?",
+                    (owner, now + self.lease_seconds, row[0]),
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def urls(self, shard: int) -> List[str]:
+        return [r[0] for r in self._db.execute("SELECT url FROM urls WHERE shard = ? ORDER BY url", (shard,))]
+
+    def renew(self, shard: int, owner: str) -> bool:
+        """Extend our lease; False if the shard is no longer ours."""
+        cur = self._db.execute(
+            "UPDATE shards SET leased_until = ? WHERE shard = ? AND owner = ? AND state = 'leased'",
+            (time.time() + self.lease_seconds, shard, owner),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, shard: int, owner: str, rows: int, elapsed_s: float, failed_urls: int = 0) -> bool:
+        cur = self._db.execute(
+            "UPDATE shards SET state = 'done', leased_until = NULL, rows = ?, elapsed_s = ?, failed_urls = ? "
+            "WHERE shard = ? AND owner = ? AND state = 'leased'",
+            (rows, elapsed_s, failed_urls, shard, owner),
+        )
+        return cur.rowcount == 1
+
+    def release(self, shard: int, owner: str, max_attempts: int = 3) -> None:
+        """Give a shard back after a failure (another worker may take it), or mark it failed for good."""
+        self._db.execute(
+            "UPDATE shards SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "leased_until = NULL WHERE shard = ? AND owner = ? AND state = 'leased'",
+            (max_attempts, shard, owner),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._db.execute("SELECT state, COUNT(*) FROM shards GROUP BY state"))
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class LeaseHeartbeat:
+    """Renews a shard lease on a background thread (own SQLite connection) while the shard runs."""
+
+    def __init__(self, coordinator_path: str, shard: int, owner: str, lease_seconds: float) -> None:
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._args = (coordinator_path, shard, owner, lease_seconds)
+        self._thread = threading.Thread(target=self._run, name=f"lease-{shard}", daemon=True)
+
+    def _run(self) -> None:
+        path, shard, owner, lease_seconds = self._args
+        coordinator = ShardCoordinator(path, lease_seconds)
+        try:
+            while not self._stop.wait(lease_seconds / 3):
+                if not coordinator.renew(shard, owner):
+                    print(f"[!] {owner}: lease on shard {shard} lost.")
+                    self.lost.set()
+                    return
+        finally:
+            coordinator.close()
+
+    def check(self) -> None:
+        if self.lost.is_set():
+            raise LeaseLost()
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _never_lost() -> None:
+    pass
+
+
+# -- per-process workers ----------------------------------------------
+
+
+def crawl_shard_http(
+    urls: Sequence[str], sink: JsonlSink, concurrency: int = 4, check: Callable[[], None] = _never_lost
+) -> Tuple[int, int]:
+    """Returns (rows, failed URLs); a failed URL is logged and skipped."""
+    from day3_http_client import HttpClient
+
+    def fetch(url: str) -> Optional[List[Dict[str, Any]]]:
+        check()
+        kind, schema = schema_for(url)
+        try:
+            resp = client.get(url)
+        except (OSError, http.client.HTTPException) as e:
+            print(f"[!] {url}: {type(e).__name__}: {e}")
+            return None
+        if resp.status != 200:
+            print(f"[!] HTTP {resp.status} for {url}")
+            return None
+        try:
+            return [{"kind": kind, "url": url, **row} for row in extract_rows_html(resp.text, schema)]
+        except Exception as e:  # a page that breaks the schema fails alone, not the whole shard
+            print(f"[!] {url}: extraction failed: {type(e).__name__}: {e}")
+            return None
+
+    rows = failed = 0
+    with HttpClient() as client, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for page_rows in executor.map(fetch, urls):
+            if page_rows is None:
+                failed += 1
+                continue
+            sink.write_rows(page_rows)
+            rows += len(page_rows)
+    return rows, failed
+
+
+def crawl_shard_browser(
+    urls: Sequence[str], sink: JsonlSink, pages_per_context: int = 50, check: Callable[[], None] = _never_lost
+) -> Tuple[int, int]:
+    """One browser pool per process; a context is reused for a batch of pages, then recycled.
+    Returns (rows, failed URLs); a failed URL is logged and skipped."""
+    from playwright.sync_api import Error as PlaywrightError
+    from playwright.sync_api import sync_playwright
+
+    from day3_browser_pool import BrowserPool
+    from day3_resource_blocking import PROFILES
+
+    rows = failed = 0
+    with sync_playwright() as p, BrowserPool(p, size=1) as pool:
+        for start in range(0, len(urls), pages_per_context):
+            with pool.context() as ctx:
+                PROFILES["text-only"].install(ctx)
+                page = ctx.new_page()
+                for url in urls[start : start + pages_per_context]:
+                    check()
+                    kind, schema = schema_for(url)
+                    try:
+                        response = page.goto(url, wait_until="domcontentloaded", timeout=15000)
+                        if response is not None and response.status != 200:
+                            raise PlaywrightError(f"HTTP {response.status}")
+                        page_rows = [{"kind": kind, "url": url, **row} for row in extract_rows(page, schema)]
+                    except Exception as e:  # navigation, HTTP status, extraction, ...
+                        print(f"[!] {url}: {type(e).__name__}: {e}".splitlines()[0])
+                        failed += 1
+                        if page.is_closed():
+                            page = ctx.new_page()
+                        continue
+                    sink.write_rows(page_rows)
+                    rows += len(page_rows)
+    return rows, failed
+
+
+def node_worker(coordinator_path: str, out_dir: str, backend: str = "browser", concurrency: int = 4) -> Dict[str, Any]:
+    """Process entry point: lease shards until none are left."""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    coordinator = ShardCoordinator(coordinator_path)
+    done: List[int] = []
+    try:
+        while (shard := coordinator.lease(owner)) is not None:
+            t0 = time.perf_counter()
+            out = Path(out_dir) / f"shard-{shard:05d}.jsonl"
+            tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")  # never shared with another worker
+            try:
+                with LeaseHeartbeat(coordinator_path, shard, owner, coordinator.lease_seconds) as heartbeat:
+                    with JsonlSink(str(tmp), append=False, batch_size=200) as sink:
+                        urls = coordinator.urls(shard)
+                        if backend == "http":
+                            rows, failed = crawl_shard_http(urls, sink, concurrency, heartbeat.check)
+                        else:
+                            rows, failed = crawl_shard_browser(urls, sink, check=heartbeat.check)
+                    heartbeat.check()
+                    os.replace(tmp, out)
+            except LeaseLost:
+                print(f"[!] {owner}: shard {shard} was taken over, dropping this run of it.")
+                tmp.unlink(missing_ok=True)
+                continue
+            except Exception as e:
+                print(f"[!] {owner}: shard {shard} failed: {e}")
+                tmp.unlink(missing_ok=True)
+                coordinator.release(shard, owner)
+                continue
+            if failed:
+                print(f"[!] {owner}: shard {shard}: {failed} URL(s) failed, {rows} rows kept.")
+            if coordinator.complete(shard, owner, rows, time.perf_counter() - t0, failed):
+                done.append(shard)
+    finally:
+        coordinator.close()
+    return {"owner": owner, "shards": done}
+
+
+def run_processes(coordinator_path: str, out_dir: str, processes: int, backend: str, concurrency: int = 4) -> float:
+    """Start N worker processes on this node and wait for them; returns elapsed seconds."""
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")  # no Playwright state is ever forked
+    t0 = time.perf_counter()
+    with ctx.Pool(processes) as pool:
+        reports = pool.starmap(node_worker, [(coordinator_path, out_dir, backend, concurrency)] * processes)
+    elapsed = time.perf_counter() - t0
+    for r in reports:
+        print(f"[i] {r['owner']}: shards {r['shards']}")
+    return elapsed
+
+
+def merge_outputs(paths: Iterable[Path], out_path: str) -> Tuple[int, int]:
+    """Concatenate shard files into one JSONL, dropping duplicate rows (by row_key). Returns (kept, dropped)."""
+    seen = set()
+    kept = dropped = 0
+    with JsonlSink(out_path, append=False) as sink:
+        for path in sorted(paths):
+            with open(path, encoding="utf-8") as f:
+                last_url, position = None, 0
+                for line in f:
+                    row = json.loads(line)
+                    position = position + 1 if row.get("url") == last_url else 0
+                    last_url = row.get("url")
+                    key = hashlib.sha1(row_key(row, position).encode("utf-8")).digest()
+                    if key in seen:
+                        dropped += 1
+                        continue
+                    seen.add(key)
+                    sink.write(row)
+                    kept += 1
+    return kept, dropped
+
+
+def fixture_urls(site: Any) -> List[str]:
+    listing = [site.listing_url(n) for n in range(1, site.page_count + 1)]
+    details = [f"{site.base_url}catalogue/{b.slug}/index.html" for b in site.catalogue.books]
+    return listing + details
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded multi-process crawl (Day 3)")
+    parser.add_argument("--coordinator", default=None, help="SQLite file shared by all nodes.")
+    parser.add_argument("--init", action="store_true", help="Assign URLs to shards, then exit.")
+    parser.add_argument("--urls-file", default=None, help="One URL per line (for --init).")
+    parser.add_argument("--fixture", action="store_true", help="Crawl a local fixture: listing + detail pages.")
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--out", default="shards")
+    parser.add_argument("--merge", default=None, help="Directory of shard-*.jsonl files to merge into --out.")
+    ns = parser.parse_args()
+
+    if ns.merge:
+        kept, dropped = merge_outputs(Path(ns.merge).glob("shard-*.jsonl"), ns.out)
+        print(f"[✓] Merged {kept} rows into {ns.out} ({dropped} duplicates dropped).")
+        return
+
+    if ns.fixture:
+        from day3_fixture_site import FixtureSite
+
+        with FixtureSite(latency_ms=20) as site:
+            coordinator_path = ns.coordinator or os.path.join(ns.out, "coordinator.sqlite")
+            Path(ns.out).mkdir(parents=True, exist_ok=True)
+            for suffix in ("", "-wal", "-shm"):  # the fixture port changes every run: start clean
+                Path(coordinator_path + suffix).unlink(missing_ok=True)
+            coordinator = ShardCoordinator(coordinator_path)
+            sizes = coordinator.init(fixture_urls(site), ShardSpec(ns.shards))
+            coordinator.close()
+            print(f"[i] {sum(sizes.values())} URLs in {len(sizes)} shards, {ns.processes} process(es)")
+            elapsed = run_processes(coordinator_path, ns.out, ns.processes, ns.backend)
+        kept, dropped = merge_outputs(Path(ns.out).glob("shard-*.jsonl"), os.path.join(ns.out, "merged.jsonl"))
+        print(f"[✓] {sum(sizes.values())} pages in {elapsed:.1f}s; merged {kept} rows ({dropped} duplicates dropped).")
+        return
+
+    if not ns.coordinator:
+        parser.error("--coordinator is required (or use --fixture / --merge)")
+    coordinator = ShardCoordinator(ns.coordinator)
+    if ns.init:
+        if not ns.urls_file:
+            parser.error("--init needs --urls-file")
+        with open(ns.urls_file, encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+        sizes = coordinator.init(urls, ShardSpec(ns.shards))
+        print(f"[✓] {sum(sizes.values())} URLs in {len(sizes)} shards: {coordinator.counts()}")
+        coordinator.close()
+        return
+    coordinator.close()
+    elapsed = run_processes(ns.coordinator, ns.out, ns.processes, ns.backend)
+    coordinator = ShardCoordinator(ns.coordinator)
+    counts = coordinator.counts()
+    coordinator.close()
+    print(f"[✓] This node finished in {elapsed:.1f}s; shards: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# day3_sinks.py
+# ------------------------------------------------------------
+# Goal: Write rows while crawling instead of at the very end.
+#   • one small interface: write_rows(rows) → buffered → flushed every
+#     `batch_size` rows (and on close)
+#   • CSV, JSON Lines and Parquet writers
+#   • read_rows(path) streams an output back (for diffs, merges)
+#   • append/resume: re-opening an existing output keeps what is there
+#     (rows_existing tells you how many rows an earlier run wrote); a
+#     line cut off by a crash is dropped before appending, and Parquet
+#     parts are complete files (one per batch, renamed into place)
+#
+# A crash on page 49 now loses at most one batch, and memory stays
+# flat no matter how many pages are crawled.
+#
+# Usage:
+#   with open_sink("books.csv", fieldnames=["title", "price"]) as sink:
+#       crawl(page, max_pages=50, sink=sink)      # day2_pagination.py
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import pyarrow as pa  # optional: only needed for ParquetSink
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+Row = Dict[str, Any]
+
+
+class RowSink:
+    """Base class: buffer rows and hand them to _write_batch() in batches."""
+
+    def __init__(
+        self,
+        path: str,
+        fieldnames: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        append: bool = True,
+        durable: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.fieldnames: Optional[List[str]] = list(fieldnames) if fieldnames else None
+        self.batch_size = max(1, batch_size)
+        self.append = append
+        self.durable = durable  # fsync after every batch
+        self.rows_written = 0
+        self.rows_existing = 0
+        self._buffer: List[Row] = []
+        self._closed = False
+
+    def write_rows(self, rows: Iterable[Row]) -> None:
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write(self, row: Row) -> None:
+        self.write_rows((row,))
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        if self.fieldnames is None:
+            self.fieldnames = list(self._buffer[0].keys())
+        self._write_batch(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        self._close()
+        self._closed = True
+
+    def __enter__(self) -> "RowSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write_batch(self, rows: List[Row]) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+
+class _TextFileSink(RowSink):
+    """Shared file handling for line-oriented formats."""
+
+    def __init__(self, path: str, **kwargs: Any) -> None:
+        super().__init__(path, **kwargs)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.append and self.path.exists():
+            self._drop_partial_line()
+        resuming = self.append and self.path.exists() and self.path.stat().st_size > 0
+        if resuming:
+            self.rows_existing = self._count_existing()
+        self._new_file = not resuming
+        self._file = open(self.path, "a" if resuming else "w", newline="", encoding="utf-8")
+
+    def _drop_partial_line(self, chunk: int = 64 * 1024) -> None:
+        """Cut the file back to its last newline (a crash mid-write leaves half a row)."""
+        with open(self.path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            while pos > 0:
+                start = max(0, pos - chunk)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                pos = start
+            else:
+                keep = 0
+            if keep < end:
+                print(f"[!] {self.path}: dropping {end - keep} byte(s) of an unfinished last line.")
+                f.truncate(keep)
+
+    def _count_existing(self) -> int:
+        with open(self.path, "rb") as f:
+            return sum(1 for _ in f)
+
+    def _sync(self) -> None:
+        self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class CsvSink(_TextFileSink):
+    def __init__(self, path: str, **kwargs: Any) -> None:
+        super().__init__(path, **kwargs)
+        self._writer: Optional[csv.DictWriter] = None
+
+    def _count_existing(self) -> int:
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header and self.fieldnames is None:
+                self.fieldnames = header
+            return sum(1 for _ in reader)
+
+    def _write_batch(self, rows: List[Row]) -> None:
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+            if self._new_file:
+                self._writer.writeheader()
+        self._writer.writerows(rows)
+        self._sync()
+
+    def _close(self) -> None:
+        if self._writer is None and self._new_file and self.fieldnames:
+            csv.DictWriter(self._file, fieldnames=self.fieldnames).writeheader()  # no rows: header only
+        super()._close()
+
+
+class JsonlSink(_TextFileSink):
+    def _write_batch(self, rows: List[Row]) -> None:
+        self._file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows))
+        self._sync()
+
+
+class ParquetSink(RowSink):
+    """
+    Parquet output as a directory of part files, one complete file per batch.
+    A Parquet file is only readable once its footer is written, so each part is
+    written to a temporary name and renamed when closed: a crash loses at most
+    the batch in progress. Parts that cannot be read (e.g. from an older layout)
+    are moved to quarantine/ when resuming.
+    """
+
+    def __init__(self, path: str, **kwargs: Any) -> None:
+        if pq is None:
+            raise ImportError("ParquetSink needs pyarrow: pip install pyarrow")
+        super().__init__(path, **kwargs)
+        if self.path.exists() and not self.append:
+            for old in self.path.glob("part-*.parquet"):
+                old.unlink()
+        self.path.mkdir(parents=True, exist_ok=True)
+        for tmp in self.path.glob("part-*.parquet.tmp"):
+            tmp.unlink()  # batch in progress when an earlier run died
+        parts = sorted(self.path.glob("part-*.parquet"))
+        for part in parts:
+            try:
+                self.rows_existing += pq.ParquetFile(part).metadata.num_rows
+            except (pa.ArrowInvalid, OSError) as e:
+                quarantine = self.path / "quarantine"
+                quarantine.mkdir(exist_ok=True)
+                part.rename(quarantine / part.name)
+                print(f"[!] Unreadable part {part.name} moved to {quarantine}: {e}")
+        self._next_part = int(parts[-1].stem.split("-")[1]) + 1 if parts else 0
+        self.parts_written: List[Path] = []
+
+    def _write_batch(self, rows: List[Row]) -> None:
+        schema = pa.schema([(name, pa.string()) for name in self.fieldnames])
+        columns = {
+            name: [None if r.get(name) is None else str(r[name]) for r in rows] for name in self.fieldnames
+        }
+        part = self.path / f"part-{self._next_part:05d}.parquet"
+        tmp = part.with_name(part.name + ".tmp")
+        pq.write_table(pa.Table.from_pydict(columns, schema=schema), str(tmp))
+        if self.durable:
+            with open(tmp, "rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp, part)
+        self._next_part += 1
+        self.parts_written.append(part)
+
+
+SINKS = {".csv": CsvSink, ".jsonl": JsonlSink, ".parquet": ParquetSink}
+
+
+def open_sink(path: str, **kwargs: Any) -> RowSink:
+    """Pick a sink from the file extension (.csv, .jsonl, .parquet)."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in SINKS:
+        raise ValueError(f"Unsupported output {path!r}; use one of {sorted(SINKS)}")
+    return SINKS[suffix](path, **kwargs)
+
+
+def read_rows(path: str, batch_size: int = 10_000) -> Iterator[Row]:
+    """Stream rows back from a sink's output (.csv, .jsonl, .parquet file or part directory)."""
+    p = Path(path)
+    suffix = p.suffix.lower()
+    if suffix == ".csv":
+        with open(p, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif suffix == ".jsonl":
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".parquet":
+        if pq is None:
+            raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow")
+        for part in sorted(p.glob("part-*.parquet")) if p.is_dir() else [p]:
+            try:
+                reader = pq.ParquetFile(part)
+            except (pa.ArrowInvalid, OSError) as e:
+                if not p.is_dir():
+                    raise
+                print(f"[!] Skipping unreadable part {part.name}: {e}")
+                continue
+            for batch in reader.iter_batches(batch_size=batch_size):
+                yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported input {path!r}; use one of {sorted(SINKS)}")
@@ -0,0 +1,342 @@
+# day3_validation.py
+# ------------------------------------------------------------
+# Goal: Check data quality on every page without slowing the crawl.
+# day2_assertions.py uses expect(): every check is a round trip to the
+# live browser that waits (and retries) until it passes or times out —
+# fine for a smoke test, too slow to run on every page of a crawl.
+#   • the same rules run on the extracted rows instead: count == 20,
+#     price matches ^£\d+\.\d{2}$, title present
+#   • a field is checked for a whole batch at once: values joined with a
+#     separator and matched by one repeated regex (one C-level scan);
+#     only a failing batch is walked row by row to find the culprits.
+#     Only patterns built from printable literals, \d, \w, escaped
+#     punctuation, groups, quantifiers and positive classes of printable
+#     characters take this path (none of them can match the separator);
+#     anything else (".", "[^...]", "\s", "\x..", lookarounds, ...) is
+#     checked value by value
+#   • inline: check_page(page, rows) after extraction — microseconds;
+#     when a rule breaks, the page is captured through an ArtifactWriter,
+#     sampled per rule (first N failures, then 1 in K)
+#   • offline: validate_file() checks a whole output (CSV/JSONL/Parquet)
+#     in batches on a process pool (worth it with several cores: reading
+#     the file costs more than the checks)
+#
+# Usage:
+#   validator = Validator(BOOK_LISTING_RULES, artifacts=ArtifactWriter("artifacts"))
+#   crawl(page, max_pages=50, validator=validator)          # day2_pagination.py
+#   python day3/code/day3_validation.py --pages 50 --bad-rate 0.01
+#   python day3/code/day3_validation.py --file books.jsonl --workers 4
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from day3_sinks import Row, read_rows
+
+PRICE_PATTERN = r"^£\d+\.\d{2}$"
+SEPARATOR = "\x1f"  # ASCII unit separator: never part of scraped text
+
+
+def batch_safe(pattern: str) -> bool:
+    """
+    True if `pattern` is built only from parts that cannot match the separator (an allowlist):
+    printable literals, \d, \w, escaped punctuation, (...) / (?:...), |, quantifiers, ^/$ and
+    [...] classes of those (no negation, no control characters, so no range can reach \x1f).
+    """
+    i, in_class, class_start = 0, False, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            e = pattern[i + 1 : i + 2]
+            if not e or not (e in "dw" or (e.isprintable() and not e.isalnum() and not e.isspace())):
+                return False
+            i += 2
+            class_start = False
+            continue
+        if not c.isprintable():
+            return False
+        if in_class:
+            if c == "^" and class_start:
+                return False
+            if c == "]" and not class_start:
+                in_class = False
+            class_start = False
+        elif c == "[":
+            in_class = class_start = True
+        elif c == ".":
+            return False
+        elif c == "(" and pattern.startswith("(?", i):
+            if not pattern.startswith("(?:", i):
+                return False  # lookarounds, inline flags, named groups
+            i += 3
+            continue
+        i += 1
+    return not in_class
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    field: str
+    pattern: Optional[str] = None  # must match the whole value
+    required: bool = True
+
+    def _inner(self) -> Optional[str]:
+        if self.pattern is None:
+            return None
+        inner = self.pattern
+        if inner.startswith("^"):
+            inner = inner[1:]
+        if inner.endswith("$") and not inner.endswith("\\$"):
+            inner = inner[:-1]
+        return inner
+
+    def compiled(self) -> Tuple[Optional["re.Pattern[str]"], Optional["re.Pattern[str]"]]:
+        """(single value regex, whole-batch regex — None unless batch_safe(pattern))."""
+        inner = self._inner()
+        if inner is None:
+            return None, None
+        one = re.compile(f"(?:{inner})")
+        if not batch_safe(inner) or one.search(SEPARATOR):
+            return one, None
+        batch = re.compile(f"(?:{inner})(?:{re.escape(SEPARATOR)}(?:{inner}))*")
+        return one, batch
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    name: str
+    fields: Tuple[FieldRule, ...] = ()
+    count: Optional[int] = None  # rows expected per page (None = any)
+    min_count: int = 1
+
+
+BOOK_LISTING_RULES = RuleSet(
+    "books-listing",
+    fields=(FieldRule("title"), FieldRule("price", PRICE_PATTERN)),
+    count=20,
+)
+BOOK_DETAIL_RULES = RuleSet(
+    "books-detail",
+    fields=(FieldRule("title"), FieldRule("price", PRICE_PATTERN), FieldRule("upc", r"^[0-9a-f]{16}$")),
+    count=1,
+)
+
+
+@dataclass
+class Violation:
+    rule: str  # "count", "<field>:required", "<field>:pattern"
+    url: str
+    row: Optional[int] = None  # index within the page/batch
+    value: Any = None
+
+
+@dataclass
+class ValidationStats:
+    pages: int = 0
+    rows: int = 0
+    failed_pages: int = 0
+    violations: Counter = field(default_factory=Counter)  # per rule
+    captured: int = 0
+    seconds: float = 0.0  # spent validating (not capturing)
+
+    def summary(self) -> str:
+        us = 1e6 * self.seconds / self.pages if self.pages else 0.0
+        rules = ", ".join(f"{rule}={n}" for rule, n in self.violations.most_common()) or "none"
+        return (
+            f"{self.pages} page(s), {self.rows} rows, {self.failed_pages} failing; violations: {rules}; "
+            f"{self.captured} captured; {us:.0f} µs per page"
+        )
+
+    def merge(self, other: "ValidationStats") -> None:
+        self.pages += other.pages
+        self.rows += other.rows
+        self.failed_pages += other.failed_pages
+        self.violations.update(other.violations)
+        self.captured += other.captured
+        self.seconds += other.seconds
+
+
+class Validator:
+    """
+    Runs a RuleSet on extracted rows.
+
+        validator = Validator(BOOK_LISTING_RULES, artifacts=writer)
+        rows = extract_rows(page, BOOK_LISTING_SCHEMA)
+        validator.check_page(page, rows)      # captures the page only if a rule breaks
+    """
+
+    def __init__(
+        self,
+        rules: RuleSet,
+        artifacts: Optional[Any] = None,
+        sample_first: int = 5,
+        sample_every: int = 50,
+        max_kept: int = 1000,
+    ) -> None:
+        self.rules = rules
+        self.artifacts = artifacts
+        self.sample_first = sample_first  # captures per rule before sampling kicks in
+        self.sample_every = sample_every  # ...then one failure in this many
+        self.max_kept = max_kept  # violations kept in memory for reports
+        self.stats = ValidationStats()
+        self.kept: List[Violation] = []
+        self._compiled = [(rule, *rule.compiled()) for rule in rules.fields]
+        self._failures_by_rule: Counter = Counter()
+
+    def check(self, rows: Sequence[Row], url: str = "", page_rules: bool = True) -> List[Violation]:
+        """All violations in a page (or any batch of rows when page_rules=False)."""
+        t0 = time.perf_counter()
+        found: List[Violation] = []
+        if page_rules:
+            expected = self.rules.count
+            if (expected is not None and len(rows) != expected) or len(rows) < self.rules.min_count:
+                found.append(Violation("count", url, None, len(rows)))
+        for rule, one, batch in self._compiled:
+            values = [row.get(rule.field) for row in rows]
+            if rule.required and not all(values):
+                found += [Violation(f"{rule.field}:required", url, i, v) for i, v in enumerate(values) if not v]
+            if one is None:
+                continue
+            present = [(i, str(v)) for i, v in enumerate(values) if v]
+            if batch is not None and batch.fullmatch(SEPARATOR.join(v for _, v in present)):
+                continue  # the whole batch is fine: one regex call
+            found += [Violation(f"{rule.field}:pattern", url, i, v) for i, v in present if not one.fullmatch(v)]
+        self.stats.pages += 1
+        self.stats.rows += len(rows)
+        self.stats.seconds += time.perf_counter() - t0
+        if found:
+            self.stats.failed_pages += 1
+            self.stats.violations.update(v.rule for v in found)
+            self.kept += found[: max(0, self.max_kept - len(self.kept))]
+        return found
+
+    def check_page(self, page: Any, rows: Sequence[Row]) -> List[Violation]:
+        """check() + a sampled artifact capture of `page` when something is wrong."""
+        found = self.check(rows, getattr(page, "url", ""))
+        if found and self.artifacts is not None and self._should_capture(found):
+            reason = "; ".join(sorted({f"{v.rule} ({v.value!r})" for v in found}))[:500]
+            if self.artifacts.capture(page, prefix=f"invalid_{self.rules.name}", reason=reason):
+                self.stats.captured += 1
+        return found
+
+    def _should_capture(self, found: List[Violation]) -> bool:
+        capture = False
+        for rule in {v.rule for v in found}:
+            self._failures_by_rule[rule] += 1
+            n = self._failures_by_rule[rule]
+            if n <= self.sample_first or (self.sample_every and (n - self.sample_first) % self.sample_every == 0):
+                capture = True
+        return capture
+
+
+@dataclass
+class HtmlSnapshot:
+    """Page stand-in for HTTP crawls: enough for ArtifactWriter.capture() with screenshot="none"."""
+
+    url: str
+    html: str
+
+    def content(self) -> str:
+        return self.html
+
+
+def _check_batch(rules: RuleSet, rows: List[Row], offset: int) -> Tuple[ValidationStats, List[Violation]]:
+    validator = Validator(rules)
+    found = validator.check(rows, page_rules=False)
+    for v in found:
+        v.row = offset + (v.row or 0)
+    return validator.stats, found
+
+
+def validate_file(
+    path: str, rules: RuleSet, workers: int = 4, batch_size: int = 20_000, max_kept: int = 1000
+) -> Tuple[ValidationStats, List[Violation]]:
+    """Field rules over a whole output (row rules only: there are no pages in a file)."""
+    stats, kept = ValidationStats(), []
+    t0 = time.perf_counter()
+
+    def batches() -> Iterator[Tuple[List[Row], int]]:
+        it, offset = read_rows(path, batch_size), 0
+        while batch := list(islice(it, batch_size)):
+            yield batch, offset
+            offset += len(batch)
+
+    if workers <= 1:
+        results = (_check_batch(rules, batch, offset) for batch, offset in batches())
+        for batch_stats, found in results:
+            stats.merge(batch_stats)
+            kept += found[: max(0, max_kept - len(kept))]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = []
+            for batch, offset in batches():
+                pending.append(executor.submit(_check_batch, rules, batch, offset))
+                if len(pending) >= 2 * workers:  # bounded: the file is never all in memory
+                    batch_stats, found = pending.pop(0).result()
+                    stats.merge(batch_stats)
+                    kept += found[: max(0, max_kept - len(kept))]
+            for future in pending:
+                batch_stats, found = future.result()
+                stats.merge(batch_stats)
+                kept += found[: max(0, max_kept - len(kept))]
+    stats.pages = 0  # batches, not pages
+    stats.seconds = time.perf_counter() - t0
+    return stats, kept
+
+
+def main() -> None:
+    from day3_artifacts import ArtifactWriter
+    from day3_extraction import BOOK_LISTING_SCHEMA, extract_rows_html
+    from day3_fixture_site import FixtureSite
+    from day3_http_client import HttpClient
+
+    parser = argparse.ArgumentParser(description="Row validation instead of live expect() checks (Day 3)")
+    parser.add_argument("--pages", type=int, default=50, help="Listing pages to crawl (fixture, HTTP).")
+    parser.add_argument("--bad-rate", type=float, default=0.01, help="Share of rows corrupted after extraction.")
+    parser.add_argument("--artifacts", default="artifacts_validation")
+    parser.add_argument("--file", default=None, help="Validate an output file instead (.csv/.jsonl/.parquet).")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    ns = parser.parse_args()
+
+    if ns.file:
+        stats, kept = validate_file(ns.file, BOOK_LISTING_RULES, ns.workers)
+        print(f"[✓] {ns.file}: {stats.rows} rows in {stats.seconds:.2f}s — violations: {dict(stats.violations) or 'none'}")
+        for v in kept[:10]:
+            print(f"   row {v.row}: {v.rule} {v.value!r}")
+        return
+
+    rng = random.Random(1)
+    crawl_s = 0.0
+    with FixtureSite(n_books=20 * ns.pages) as site, HttpClient() as http, ArtifactWriter(
+        ns.artifacts, screenshot="none"
+    ) as artifacts:
+        validator = Validator(BOOK_LISTING_RULES, artifacts=artifacts)
+        t0 = time.perf_counter()
+        for n in range(1, site.page_count + 1):
+            resp = http.get(site.listing_url(n))
+            rows = extract_rows_html(resp.text, BOOK_LISTING_SCHEMA)
+            for row in rows:  # simulate a broken selector / changed markup
+                if rng.random() < ns.bad_rate:
+                    row[rng.choice(["price", "title"])] = rng.choice(["", "51.77", "£1,204.5"])
+            validator.check_page(HtmlSnapshot(resp.url, resp.text), rows)
+        crawl_s = time.perf_counter() - t0
+
+    stats = validator.stats
+    print(f"\n[i] {stats.summary()}")
+    print(f"[i] validation: {1000 * stats.seconds:.1f} ms of {crawl_s:.2f}s crawl ({100 * stats.seconds / crawl_s:.2f}%)")
+    for v in validator.kept[:5]:
+        print(f"   {v.url} row {v.row}: {v.rule} {v.value!r}")
+
+
+if __name__ == "__main__":
+    main()